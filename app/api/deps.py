@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from rag_core.admission import AdmissionController
+from rag_core.chat_sessions import ChatSessionService
+from rag_core.db.session import get_async_db, get_db
+from rag_core.document_service import DocumentQueries, DocumentService
+from rag_core.ingestion import IngestionQueue
+from rag_core.model_catalog import ModelCatalog
+from rag_core.vector_store import VectorStore
+
+
+# The vector store, storage backend, ingestion queue, admission controller and model
+# catalog are process-wide and owned by the app lifespan (see app.main).
+
+
+def get_vector_store(request: Request) -> VectorStore:
+    return request.app.state.vector_store
+
+
+def get_ingestion_queue(request: Request) -> IngestionQueue:
+    return request.app.state.ingestion_queue
+
+
+def get_admission_controller(request: Request) -> AdmissionController:
+    return request.app.state.admission
+
+
+def get_model_catalog(request: Request) -> ModelCatalog:
+    return request.app.state.model_catalog
+
+
+def get_document_service(request: Request, db: Session = Depends(get_db)) -> DocumentService:
+    return DocumentService(db, request.app.state.vector_store, request.app.state.storage_backend)
+
+
+def get_document_queries(db: AsyncSession = Depends(get_async_db)) -> DocumentQueries:
+    return DocumentQueries(db)
+
+
+def get_chat_session_service(db: Session = Depends(get_db)) -> ChatSessionService:
+    return ChatSessionService(db)
@@ -1,29 +1,240 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import time
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from app.schemas.chat import ChatRequest
+from app.api.deps import get_admission_controller, get_chat_session_service, get_vector_store
+from app.schemas.chat import ChatRequest, ChatSessionDetail, ChatSessionOut, ChatTurnOut
+from rag_core.admission import AdmissionController, AdmissionRejected, Ticket
+from rag_core.chat_sessions import ChatSessionService, load_conversation, record_exchange, refresh_summary
+from rag_core.config import settings
+from rag_core.metrics import metrics
 from rag_core.rag_service import RagService
+from rag_core.streaming import StreamStats, coalesce, record_stream_end
 from rag_core.vector_store import VectorStore
 
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
-vector_store = VectorStore()
 
 
-def _as_ndjson(generator):
-    for chunk in generator:
-        payload = {"type": "token", "data": chunk}
-        yield json.dumps(payload, ensure_ascii=True) + "\n"
-    yield json.dumps({"type": "done"}) + "\n"
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Ask reverse proxies (nginx and friends) to pass each frame through unbuffered.
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+QUEUE_POSITION_INTERVAL_SECONDS = 1.0
+
+
+def _frame(payload: dict, sse: bool) -> str:
+    if sse:
+        return f"event: {payload['type']}\ndata: {json.dumps(payload, ensure_ascii=True)}\n\n"
+    return json.dumps(payload, ensure_ascii=True) + "\n"
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    # The request body has already been read, so the next message is the disconnect.
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def _until_disconnected(frames, request: Request, stats: StreamStats):
+    # Stops reading the model as soon as the client goes away, even between frames, so
+    # the provider stops generating (and billing) and its HTTP stream is closed.
+    # Cancelling the pending read unwinds the whole chain down to the provider call.
+    iterator = frames.__aiter__()
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(request))
+    next_frame: asyncio.Future | None = None
+    cancelled = True
+    try:
+        while True:
+            next_frame = asyncio.ensure_future(iterator.__anext__())
+            await asyncio.wait({next_frame, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_frame.done():
+                break
+            try:
+                frame = next_frame.result()
+            except StopAsyncIteration:
+                cancelled = False
+                break
+            except Exception:
+                cancelled = False
+                raise
+            next_frame = None
+            yield frame
+    finally:
+        disconnected.cancel()
+        if next_frame is not None and not next_frame.done():
+            next_frame.cancel()
+        elif cancelled:
+            # Closed while suspended between frames (the server gave up on the client).
+            asyncio.ensure_future(iterator.aclose())
+        if cancelled or stats.first_token_at is not None:
+            record_stream_end(stats, cancelled)
+
+
+async def _as_frames(generator, rag: RagService, ticket: Ticket, stats: StreamStats, sse: bool):
+    try:
+        # Queued behind other generations for this provider: report the position until
+        # a slot frees up, or give up after the provider's max wait.
+        position = ticket.position
+        deadline = time.perf_counter() + ticket.gate.limits.max_wait_seconds
+        while position:
+            yield _frame({"type": "queued", "position": position}, sse)
+            while True:
+                remaining = deadline - time.perf_counter()
+                if await ticket.wait(timeout=min(QUEUE_POSITION_INTERVAL_SECONDS, max(remaining, 0))):
+                    position = 0
+                    break
+                if remaining <= QUEUE_POSITION_INTERVAL_SECONDS:
+                    metrics.incr("llm.admission.timeouts")
+                    yield _frame(
+                        {
+                            "type": "error",
+                            "data": "The model is busy right now. Please try again shortly.",
+                            "retry_after": ticket.gate.retry_after(),
+                        },
+                        sse,
+                    )
+                    return
+                if ticket.position != position:
+                    position = ticket.position
+                    break
+
+        stats.started = time.perf_counter()
+        async for text in coalesce(
+            generator,
+            stats,
+            window_seconds=settings.stream_coalesce_ms / 1000,
+            max_bytes=settings.stream_coalesce_bytes,
+        ):
+            yield _frame({"type": "token", "data": text}, sse)
+        metrics.incr("chat.stream.chunks", stats.chunks)
+        metrics.incr("chat.stream.frames", stats.frames)
+        done: dict = {"type": "done", "stats": {**stats.to_dict(), "queued_ms": round(ticket.queued_seconds * 1000, 1)}}
+        if rag.prompt_usage is not None:
+            done["usage"] = rag.prompt_usage.to_dict()
+        yield _frame(done, sse)
+    finally:
+        ticket.release()
+
+
+class _TicketedStreamingResponse(StreamingResponse):
+    # The frames release the ticket when they finish, but they never run if the client
+    # is gone before the response starts; sending the response releases it either way.
+    def __init__(self, *args, ticket: Ticket, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.ticket.release()
+
+
+def _streaming_response(
+    frames,
+    sse: bool,
+    ticket: Ticket,
+    background: BackgroundTask | None = None,
+) -> StreamingResponse:
+    return _TicketedStreamingResponse(
+        frames,
+        media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE,
+        headers=STREAM_HEADERS,
+        background=background,
+        ticket=ticket,
+    )
+
+
+async def _recorded(generator, rag: RagService, session_id: str, message: str):
+    # Stores the exchange once the model has finished answering. An interrupted stream,
+    # a failed model call or a canned reply (no sources, missing key) records nothing,
+    # so it never becomes history the model is later shown as its own answer.
+    parts: list[str] = []
+    async for chunk in generator:
+        parts.append(chunk)
+        yield chunk
+    if rag.answered:
+        await asyncio.to_thread(record_exchange, session_id, message, "".join(parts).strip())
+
+
+@router.post("/sessions", response_model=ChatSessionOut, status_code=201)
+def create_session(service: ChatSessionService = Depends(get_chat_session_service)) -> ChatSessionOut:
+    return ChatSessionOut.model_validate(service.create())
+
+
+@router.get("/sessions/{session_id}", response_model=ChatSessionDetail)
+def get_session(
+    session_id: str,
+    service: ChatSessionService = Depends(get_chat_session_service),
+) -> ChatSessionDetail:
+    chat_session = service.get(session_id)
+    if chat_session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found.")
+    return ChatSessionDetail(
+        id=chat_session.id,
+        created_at=chat_session.created_at,
+        summary=chat_session.summary,
+        turns=[ChatTurnOut.model_validate(turn) for turn in service.list_turns(session_id)],
+    )
+
+
+@router.delete("/sessions/{session_id}")
+def delete_session(
+    session_id: str,
+    service: ChatSessionService = Depends(get_chat_session_service),
+) -> dict[str, str]:
+    if not service.delete(session_id):
+        raise HTTPException(status_code=404, detail="Chat session not found.")
+    return {"message": "Chat session deleted."}
 
 
 @router.post("/stream")
-def chat_stream(body: ChatRequest) -> StreamingResponse:
+async def chat_stream(
+    body: ChatRequest,
+    request: Request,
+    vector_store: VectorStore = Depends(get_vector_store),
+    admission: AdmissionController = Depends(get_admission_controller),
+) -> StreamingResponse:
+    # Served from the event loop end to end, so open streams do not hold threadpool threads.
+    # NDJSON by default; clients sending `Accept: text/event-stream` get Server-Sent Events.
+    sse = SSE_MEDIA_TYPE in request.headers.get("accept", "")
     rag = RagService(vector_store)
-    generator = rag.stream_answer(message=body.message, history=[m.model_dump() for m in body.history])
-    return StreamingResponse(_as_ndjson(generator), media_type="application/x-ndjson")
+    conversation = None
+    if body.session_id:
+        conversation = await asyncio.to_thread(load_conversation, body.session_id)
+        if conversation is None:
+            raise HTTPException(status_code=404, detail="Chat session not found.")
+
+    provider = rag.settings_service.get_effective_settings().provider
+    try:
+        ticket = admission.enter(provider, rag.settings_service.get_provider_limits(provider))
+    except AdmissionRejected as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after)}) from exc
 
+    try:
+        stats = StreamStats(started=time.perf_counter())
+        if conversation is None:
+            generator = rag.astream_answer(message=body.message, history=[m.model_dump() for m in body.history])
+            background = None
+        else:
+            generator = _recorded(
+                rag.astream_answer(message=body.message, history=conversation.turns, summary=conversation.summary),
+                rag,
+                body.session_id,
+                body.message,
+            )
+            # Folding old turns into the summary waits until the response has been sent.
+            background = BackgroundTask(refresh_summary, body.session_id, admission)
+        frames = _until_disconnected(_as_frames(generator, rag, ticket, stats, sse), request, stats)
+        return _streaming_response(frames, sse, ticket, background=background)
+    except BaseException:
+        ticket.release()
+        raise
@@ -1,74 +1,108 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from sqlalchemy.orm import Session
-
-from app.schemas.files import BatchUploadResult, DocumentOut
-from rag_core.db.session import get_db
-from rag_core.document_service import DocumentService, DocumentServiceError
-from rag_core.storage import get_storage_backend
-from rag_core.vector_store import VectorStore
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+
+from app.api.deps import get_document_queries, get_document_service, get_ingestion_queue
+from app.schemas.files import (
+    BatchUploadResult,
+    DocumentOut,
+    DocumentPage,
+    DocumentReplaceOut,
+    DocumentStatsOut,
+    IngestionJobOut,
+    ReindexStatsOut,
+    UploadFailure,
+)
+from rag_core.document_service import DocumentQueries, DocumentService, DocumentServiceError
+from rag_core.ingestion import IngestionQueue
 
 
 router = APIRouter(prefix="/api/files", tags=["files"])
-vector_store = VectorStore()
-storage_backend = get_storage_backend()
 
 
-@router.get("", response_model=list[DocumentOut])
-def list_files(db: Session = Depends(get_db)) -> list[DocumentOut]:
-    service = DocumentService(db, vector_store, storage_backend)
-    return [DocumentOut.model_validate(row) for row in service.list_documents()]
+@router.get("", response_model=DocumentPage)
+async def list_files(
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = Query(default=None),
+    name: str | None = Query(default=None, max_length=200),
+    file_type: str | None = Query(default=None, max_length=16),
+    queries: DocumentQueries = Depends(get_document_queries),
+) -> DocumentPage:
+    try:
+        rows, next_cursor = await queries.list_page(limit, cursor=cursor, name=name, file_type=file_type)
+    except DocumentServiceError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return DocumentPage(items=[DocumentOut.model_validate(row) for row in rows], next_cursor=next_cursor)
+
+
+# Declared before /{document_id} so "stats" is not taken for a document id.
+@router.get("/stats", response_model=DocumentStatsOut)
+async def file_stats(queries: DocumentQueries = Depends(get_document_queries)) -> DocumentStatsOut:
+    return DocumentStatsOut(**await queries.storage_stats())
 
 
 @router.get("/{document_id}", response_model=DocumentOut)
-def get_file(document_id: str, db: Session = Depends(get_db)) -> DocumentOut:
-    service = DocumentService(db, vector_store, storage_backend)
-    row = service.get_document(document_id)
+async def get_file(document_id: str, queries: DocumentQueries = Depends(get_document_queries)) -> DocumentOut:
+    row = await queries.get_document(document_id)
     if row is None:
         raise HTTPException(status_code=404, detail="Document not found.")
     return DocumentOut.model_validate(row)
 
 
-@router.post("", response_model=BatchUploadResult)
+@router.get("/jobs/{job_id}", response_model=IngestionJobOut)
+async def get_job(job_id: str, queries: DocumentQueries = Depends(get_document_queries)) -> IngestionJobOut:
+    job = await queries.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return IngestionJobOut.model_validate(job)
+
+
+@router.post("", response_model=BatchUploadResult, status_code=202)
 async def upload_files(
     files: list[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    service: DocumentService = Depends(get_document_service),
+    ingestion_queue: IngestionQueue = Depends(get_ingestion_queue),
 ) -> BatchUploadResult:
     if not files:
         raise HTTPException(status_code=400, detail="No files uploaded.")
 
-    service = DocumentService(db, vector_store, storage_backend)
-    indexed: list[DocumentOut] = []
-    failed: list[dict[str, str]] = []
+    jobs: list[IngestionJobOut] = []
+    failed: list[UploadFailure] = []
 
     for file in files:
         try:
-            row = await service.upload(file)
-            indexed.append(DocumentOut.model_validate(row))
+            job, queued = await service.stage_upload(file)
+            if queued:
+                ingestion_queue.submit(job.id)
+            jobs.append(IngestionJobOut.model_validate(job))
         except DocumentServiceError as exc:
-            failed.append({"filename": file.filename or "unknown", "reason": str(exc)})
+            failed.append(UploadFailure(filename=file.filename or "unknown", reason=str(exc)))
 
-    return BatchUploadResult(indexed=indexed, failed=failed)
+    return BatchUploadResult(jobs=jobs, failed=failed)
 
 
-@router.put("/{document_id}", response_model=DocumentOut)
+@router.put("/{document_id}", response_model=DocumentReplaceOut)
 async def replace_file(
     document_id: str,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-) -> DocumentOut:
-    service = DocumentService(db, vector_store, storage_backend)
+    service: DocumentService = Depends(get_document_service),
+) -> DocumentReplaceOut:
     try:
-        row = await service.replace(document_id, file)
-        return DocumentOut.model_validate(row)
+        row, stats = await service.replace(document_id, file)
+        return DocumentReplaceOut(
+            **DocumentOut.model_validate(row).model_dump(),
+            reindex=ReindexStatsOut(
+                chunks_reused=stats.reused,
+                chunks_added=stats.added,
+                chunks_removed=stats.removed,
+            ),
+        )
     except DocumentServiceError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @router.delete("/{document_id}")
-def delete_file(document_id: str, db: Session = Depends(get_db)) -> dict[str, str]:
-    service = DocumentService(db, vector_store, storage_backend)
+def delete_file(document_id: str, service: DocumentService = Depends(get_document_service)) -> dict[str, str]:
     try:
         service.delete(document_id)
         return {"message": "Document deleted."}
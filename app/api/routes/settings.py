@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-import httpx
-from fastapi import APIRouter, HTTPException, Query
+from dataclasses import asdict
 
-from app.schemas.settings import ApiKeyUpdate, SettingsOut, SettingsUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.deps import get_model_catalog
+from app.schemas.settings import ApiKeyUpdate, ProviderLimitsOut, ProviderLimitsUpdate, SettingsOut, SettingsUpdate
+from rag_core.model_catalog import ModelCatalog
 from rag_core.settings_service import MODEL_CATALOG, SUPPORTED_PROVIDERS, SettingsService
 
 
@@ -25,6 +28,7 @@ def update_settings(payload: SettingsUpdate) -> SettingsOut:
             model=payload.model,
             ollama_base_url=payload.ollama_base_url,
             temperature=payload.temperature,
+            embedding_provider=payload.embedding_provider,
         )
         return SettingsOut(**updated)
     except ValueError as exc:
@@ -32,7 +36,10 @@ def update_settings(payload: SettingsUpdate) -> SettingsOut:
 
 
 @router.put("/api-keys/{provider}")
-def save_api_key(provider: str, body: ApiKeyUpdate) -> dict[str, str]:
+def save_api_key(
+    provider: str,
+    body: ApiKeyUpdate,
+) -> dict[str, str]:
     service = SettingsService()
     try:
         service.save_api_key(provider=provider, plain_key=body.api_key)
@@ -53,61 +60,50 @@ def remove_api_key(provider: str) -> dict[str, str]:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
+@router.put("/limits/{provider}", response_model=ProviderLimitsOut)
+def update_provider_limits(provider: str, body: ProviderLimitsUpdate) -> ProviderLimitsOut:
+    # Picked up by the chat route on its next request; no restart needed.
+    try:
+        limits = SettingsService().update_provider_limits(
+            provider=provider,
+            max_concurrency=body.max_concurrency,
+            max_queue=body.max_queue,
+            max_wait_seconds=body.max_wait_seconds,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return ProviderLimitsOut(**asdict(limits))
+
+
 @router.get("/ollama-models")
-def list_ollama_models(
+async def list_ollama_models(
     base_url: str | None = Query(default=None),
+    catalog: ModelCatalog = Depends(get_model_catalog),
 ) -> dict[str, list[str]]:
     if not base_url:
-        payload = SettingsService().get_settings_payload()
-        base_url = payload["ollama_base_url"]
-    try:
-        with httpx.Client(timeout=8) as client:
-            response = client.get(f"{base_url.rstrip('/')}/api/tags")
-            response.raise_for_status()
-            payload = response.json()
-        names = [item.get("name") for item in payload.get("models", []) if item.get("name")]
-        return {"models": names}
-    except Exception:
-        return {"models": []}
+        base_url = SettingsService().get_effective_settings().ollama_base_url
+    models = await catalog.models("ollama", base_url=base_url)
+    return {"models": models or []}
 
 
 @router.get("/provider-models/{provider}")
-def list_provider_models(
+async def list_provider_models(
     provider: str,
     base_url: str | None = Query(default=None),
+    catalog: ModelCatalog = Depends(get_model_catalog),
 ) -> dict[str, list[str]]:
+    # Served from the model catalog cache: a slow or unreachable provider costs one
+    # upstream call per cache period, not one per page load.
     service = SettingsService()
     if provider not in SUPPORTED_PROVIDERS:
         raise HTTPException(status_code=404, detail="Provider not supported.")
 
     if provider == "ollama":
-        if not base_url:
-            payload = service.get_settings_payload()
-            base_url = payload["ollama_base_url"]
-        try:
-            with httpx.Client(timeout=8) as client:
-                response = client.get(f"{base_url.rstrip('/')}/api/tags")
-                response.raise_for_status()
-                payload = response.json()
-            names = [item.get("name") for item in payload.get("models", []) if item.get("name")]
-            return {"models": names}
-        except Exception:
-            return {"models": MODEL_CATALOG["ollama"]}
+        models = await catalog.models("ollama", base_url=base_url or service.get_effective_settings().ollama_base_url)
+        return {"models": models if models is not None else MODEL_CATALOG["ollama"]}
 
     if provider == "groq":
-        api_key = service.get_api_key("groq")
-        if api_key:
-            try:
-                headers = {"Authorization": f"Bearer {api_key}"}
-                with httpx.Client(timeout=10) as client:
-                    response = client.get("https://api.groq.com/openai/v1/models", headers=headers)
-                    response.raise_for_status()
-                    payload = response.json()
-                names = sorted({item.get("id", "") for item in payload.get("data", []) if item.get("id")})
-                if names:
-                    return {"models": names}
-            except Exception:
-                pass
-        return {"models": MODEL_CATALOG["groq"]}
+        models = await catalog.models("groq", api_key=service.get_api_key("groq"))
+        return {"models": models or MODEL_CATALOG["groq"]}
 
     return {"models": MODEL_CATALOG.get(provider, [])}
@@ -1,3 +1,3 @@
-from rag_core.security import KeyCipher
+from rag_core.security import KeyCipher, get_cipher
 
-__all__ = ["KeyCipher"]
+__all__ = ["KeyCipher", "get_cipher"]
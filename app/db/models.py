@@ -1,3 +1,3 @@
-from rag_core.db.models import Document
+from rag_core.db.models import Document, IngestionJob
 
-__all__ = ["Document"]
+__all__ = ["Document", "IngestionJob"]
@@ -1,3 +1,3 @@
-from rag_core.db.session import SessionLocal, engine, get_db
+from rag_core.db.session import SessionLocal, engine, get_async_db, get_async_engine, get_async_sessionmaker, get_db
 
-__all__ = ["SessionLocal", "engine", "get_db"]
+__all__ = ["SessionLocal", "engine", "get_async_db", "get_async_engine", "get_async_sessionmaker", "get_db"]
@@ -1,32 +1,86 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from dataclasses import replace
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
-from app.api.routes import chat, files, pages, settings
+from app.api.routes import chat, files, metrics, pages, settings
+from rag_core.admission import AdmissionController
 from rag_core.config import settings as app_settings
-from rag_core.db import Base
 from rag_core.db import models  # noqa: F401
-from rag_core.db.session import engine
+from rag_core.db.schema import ensure_schema
+from rag_core.db.session import dispose_async_engine, engine
+from rag_core.embedding_providers import clear_probe_cache
+from rag_core.extraction import shutdown_process_pool
+from rag_core.ingestion import IngestionQueue
+from rag_core.llm_service import aclose_http_clients, clear_client_cache
+from rag_core.model_catalog import ModelCatalog
+from rag_core.settings_store import StoredSettings, add_change_listener, remove_change_listener
+from rag_core.settings_watcher import SettingsWatcher
+from rag_core.storage import get_storage_backend
+from rag_core.vector_store import VectorStore
 
 
 def ensure_dirs() -> None:
     for path in [
         app_settings.uploads_dir,
         app_settings.chroma_dir,
+        app_settings.vector_index_dir,
         app_settings.secrets_dir,
         app_settings.config_dir,
+        app_settings.cache_dir,
     ]:
         Path(path).mkdir(parents=True, exist_ok=True)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One vector store per process, shared by uploads, ingestion workers and chat.
+    vector_store = VectorStore()
+    storage_backend = get_storage_backend()
+    ingestion_queue = IngestionQueue(vector_store, storage_backend)
+    app.state.vector_store = vector_store
+    app.state.storage_backend = storage_backend
+    app.state.ingestion_queue = ingestion_queue
+    # Per-provider generation limits; its queues live on this process's event loop.
+    app.state.admission = AdmissionController()
+    # Discovered provider model lists, shared by every Settings page load.
+    app.state.model_catalog = ModelCatalog()
+
+    def refresh_clients(previous: StoredSettings, current: StoredSettings) -> None:
+        # Runs once per new settings version, in every worker. Provider, model, URL or
+        # key changes reopen the embedding store and drop cached model clients; limit
+        # changes are read per request and need nothing here.
+        if replace(previous, provider_limits=current.provider_limits, version=current.version) == current:
+            return
+        vector_store.reset()
+        clear_client_cache()
+        clear_probe_cache()
+
+    add_change_listener(refresh_clients)
+    settings_watcher = SettingsWatcher()
+    settings_watcher.start()
+
+    ingestion_queue.start()
+    yield
+    settings_watcher.stop()
+    remove_change_listener(refresh_clients)
+    ingestion_queue.shutdown()
+    await app.state.model_catalog.aclose()
+    await aclose_http_clients()
+    await dispose_async_engine()
+    shutdown_process_pool()
+    vector_store.close()
+
+
 def create_app() -> FastAPI:
     ensure_dirs()
-    Base.metadata.create_all(bind=engine)
+    ensure_schema(engine)
 
-    app = FastAPI(title=app_settings.app_name, version="1.0.0")
+    app = FastAPI(title=app_settings.app_name, version="1.0.0", lifespan=lifespan)
     static_dir = Path(__file__).resolve().parent / "static"
     app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
@@ -34,6 +88,7 @@ def create_app() -> FastAPI:
     app.include_router(files.router)
     app.include_router(settings.router)
     app.include_router(chat.router)
+    app.include_router(metrics.router)
 
     return app
 
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
 
@@ -10,4 +12,26 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str = Field(min_length=1, max_length=10_000)
+    # With a session id the server keeps the history; `history` is for stateless clients.
+    session_id: str | None = Field(default=None, max_length=36)
     history: list[ChatMessage] = Field(default_factory=list)
+
+
+class ChatSessionOut(BaseModel):
+    id: str
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class ChatTurnOut(BaseModel):
+    role: str
+    content: str
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class ChatSessionDetail(ChatSessionOut):
+    summary: str | None = None
+    turns: list[ChatTurnOut]
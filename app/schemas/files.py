@@ -16,6 +16,58 @@ class DocumentOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class DocumentPage(BaseModel):
+    items: list[DocumentOut]
+    # Pass back as ?cursor= for the next page; None on the last page.
+    next_cursor: str | None = None
+
+
+class FileTypeStatsOut(BaseModel):
+    file_type: str
+    count: int
+    bytes: int
+    chunks: int
+
+
+class DocumentStatsOut(BaseModel):
+    count: int
+    bytes: int
+    chunks: int
+    by_type: list[FileTypeStatsOut]
+
+
+class ReindexStatsOut(BaseModel):
+    chunks_reused: int
+    chunks_added: int
+    chunks_removed: int
+
+
+class DocumentReplaceOut(DocumentOut):
+    reindex: ReindexStatsOut
+
+
+class IngestionJobOut(BaseModel):
+    id: str
+    document_id: str
+    original_name: str
+    file_type: str
+    size_bytes: int
+    deduplicated: bool = False
+    status: str
+    chunk_count: int
+    chunks_indexed: int
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class UploadFailure(BaseModel):
+    filename: str
+    reason: str
+
+
 class BatchUploadResult(BaseModel):
-    indexed: list[DocumentOut]
-    failed: list[dict[str, str]]
+    jobs: list[IngestionJobOut]
+    failed: list[UploadFailure]
@@ -3,15 +3,24 @@ from __future__ import annotations
 from pydantic import BaseModel, Field
 
 
+class ProviderLimitsOut(BaseModel):
+    max_concurrency: int
+    max_queue: int
+    max_wait_seconds: float
+
+
 class SettingsOut(BaseModel):
     provider: str
     model: str
     ollama_base_url: str
     temperature: float
+    embedding_provider: str
     available_providers: list[str]
+    available_embedding_providers: list[str]
     default_models: dict[str, str]
     model_catalog: dict[str, list[str]]
     api_key_status: dict[str, bool]
+    provider_limits: dict[str, ProviderLimitsOut]
 
 
 class SettingsUpdate(BaseModel):
@@ -19,7 +28,14 @@ class SettingsUpdate(BaseModel):
     model: str = Field(min_length=1, max_length=128)
     ollama_base_url: str = Field(min_length=10, max_length=512)
     temperature: float = Field(ge=0, le=2)
+    embedding_provider: str | None = Field(default=None, min_length=2, max_length=32)
 
 
 class ApiKeyUpdate(BaseModel):
     api_key: str = Field(min_length=10, max_length=500)
+
+
+class ProviderLimitsUpdate(BaseModel):
+    max_concurrency: int = Field(ge=1, le=1024)
+    max_queue: int = Field(ge=0, le=10_000)
+    max_wait_seconds: float = Field(gt=0, le=600)
@@ -1,8 +1,17 @@
 from rag_core.document_parser import (
     SUPPORTED_EXTENSIONS,
     DocumentParseError,
+    PageText,
     parse_document,
     parse_document_bytes,
+    parse_document_pages,
 )
 
-__all__ = ["SUPPORTED_EXTENSIONS", "DocumentParseError", "parse_document", "parse_document_bytes"]
+__all__ = [
+    "SUPPORTED_EXTENSIONS",
+    "DocumentParseError",
+    "PageText",
+    "parse_document",
+    "parse_document_bytes",
+    "parse_document_pages",
+]
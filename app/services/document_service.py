@@ -1,3 +1,3 @@
-from rag_core.document_service import DocumentService, DocumentServiceError
+from rag_core.document_service import DocumentQueries, DocumentService, DocumentServiceError
 
-__all__ = ["DocumentService", "DocumentServiceError"]
+__all__ = ["DocumentQueries", "DocumentService", "DocumentServiceError"]
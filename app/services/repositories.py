@@ -1,3 +1,15 @@
-from rag_core.repositories import ChatRepository, DocumentRepository
+from rag_core.repositories import (
+    AsyncDocumentRepository,
+    AsyncIngestionJobRepository,
+    ChatRepository,
+    DocumentRepository,
+    IngestionJobRepository,
+)
 
-__all__ = ["ChatRepository", "DocumentRepository"]
+__all__ = [
+    "AsyncDocumentRepository",
+    "AsyncIngestionJobRepository",
+    "ChatRepository",
+    "DocumentRepository",
+    "IngestionJobRepository",
+]
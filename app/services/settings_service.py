@@ -1,15 +1,27 @@
 from rag_core.settings_service import (
+    DEFAULT_CONTEXT_WINDOWS,
     DEFAULT_MODELS,
+    EMBEDDING_PROVIDERS,
     MODEL_CATALOG,
+    MODEL_CONTEXT_WINDOWS,
     SUPPORTED_PROVIDERS,
     EffectiveSettings,
+    ProviderLimits,
     SettingsService,
+    default_provider_limits,
+    get_context_window,
 )
 
 __all__ = [
+    "DEFAULT_CONTEXT_WINDOWS",
     "DEFAULT_MODELS",
+    "EMBEDDING_PROVIDERS",
     "MODEL_CATALOG",
+    "MODEL_CONTEXT_WINDOWS",
     "SUPPORTED_PROVIDERS",
     "EffectiveSettings",
+    "ProviderLimits",
     "SettingsService",
+    "default_provider_limits",
+    "get_context_window",
 ]
@@ -1,3 +1,3 @@
-from rag_core.text_chunker import chunk_text
+from rag_core.text_chunker import TextChunk, chunk_pages, chunk_text, hash_chunk
 
-__all__ = ["chunk_text"]
+__all__ = ["TextChunk", "chunk_pages", "chunk_text", "hash_chunk"]
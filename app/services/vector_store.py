@@ -1,3 +1,3 @@
-from rag_core.vector_store import VectorStore, VectorStoreError
+from rag_core.vector_store import ReindexStats, VectorStore, VectorStoreError
 
-__all__ = ["VectorStore", "VectorStoreError"]
+__all__ = ["ReindexStats", "VectorStore", "VectorStoreError"]
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import os
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+# Benchmarks run against a throwaway SQLite database and data directory, never the
+# configured deployment. rag_core reads its settings once at import, so this runs first.
+if "BENCHMARK_DATA_DIR" not in os.environ:
+    os.environ["BENCHMARK_DATA_DIR"] = tempfile.mkdtemp(prefix="rag-chatbot-bench-")
+BENCHMARK_ROOT = Path(os.environ["BENCHMARK_DATA_DIR"])
+os.environ["SUPABASE_DB_URL"] = f"sqlite:///{BENCHMARK_ROOT / 'app.db'}"
+os.environ["DATA_DIR"] = str(BENCHMARK_ROOT / "data")
+os.environ["DOC_STORAGE_BACKEND"] = "local"
+os.environ["EMBEDDING_PROVIDER"] = "hashing"
+os.environ["SETTINGS_NOTIFY"] = "poll"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_listening(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
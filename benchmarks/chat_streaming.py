@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+# Load test of the chat stream: N concurrent /api/chat/stream requests against a local
+# fake LLM, on the async path the app serves and on the original sync path (a sync
+# route streaming a sync generator, which holds a threadpool thread per open stream).
+# Reports time to first token, how long streams took against the fake's own pace, and
+# how many were open at once.
+#
+#   uv run python -m benchmarks.chat_streaming
+#   uv run python -m benchmarks.chat_streaming --streams 50 200 --tokens 100 --token-ms 20
+#
+# The app runs under uvicorn in a separate process; retrieval is a fixed hit list and
+# admission limits are lifted, so only the streaming path differs between runs.
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessageChunk
+
+from app.api.routes import chat
+from app.schemas.chat import ChatRequest
+from benchmarks import free_port, wait_until_listening
+from rag_core.admission import AdmissionController
+from rag_core.llm_service import LLMService
+from rag_core.rag_service import RagService
+from rag_core.settings_service import ProviderLimits, SettingsService
+
+
+HITS = [{"text": "Revenue grew 12% in 2024.", "filename": "report.pdf", "doc_id": "report", "page": 3, "score": 0.9}]
+PATHS = {"sync": "/bench/sync/stream", "async": "/api/chat/stream"}
+
+
+class FixedVectorStore:
+    def is_empty(self) -> bool:
+        return False
+
+    async def ais_empty(self) -> bool:
+        return False
+
+    def retrieve(self, query: str, limit: int = 6) -> list[dict]:
+        return list(HITS)
+
+    async def aretrieve(self, query: str, limit: int = 6) -> list[dict]:
+        return list(HITS)
+
+
+class FakeModel:
+    # A provider that thinks for first_token seconds, then sends tokens spaced evenly.
+    def __init__(self, tokens: int, token_seconds: float, first_token_seconds: float) -> None:
+        self.tokens = tokens
+        self.token_seconds = token_seconds
+        self.first_token_seconds = first_token_seconds
+
+    def stream(self, messages):
+        time.sleep(self.first_token_seconds)
+        for idx in range(self.tokens):
+            if idx:
+                time.sleep(self.token_seconds)
+            yield AIMessageChunk(content=f"token{idx} ")
+
+    async def astream(self, messages):
+        await asyncio.sleep(self.first_token_seconds)
+        for idx in range(self.tokens):
+            if idx:
+                await asyncio.sleep(self.token_seconds)
+            yield AIMessageChunk(content=f"token{idx} ")
+
+
+def _sync_ndjson(generator):
+    for chunk in generator:
+        yield json.dumps({"type": "token", "data": chunk}, ensure_ascii=True) + "\n"
+    yield json.dumps({"type": "done"}) + "\n"
+
+
+def build_app(model: FakeModel) -> FastAPI:
+    LLMService._get_model = lambda self, settings, api_key: (model, True)
+    unlimited = ProviderLimits(max_concurrency=100_000, max_queue=0, max_wait_seconds=60.0)
+    SettingsService.get_provider_limits = lambda self, provider, data=None: unlimited
+
+    application = FastAPI()
+    application.include_router(chat.router)
+    application.state.vector_store = FixedVectorStore()
+    application.state.admission = AdmissionController()
+
+    # The route as it was before the async path: a sync handler whose stream Starlette
+    # iterates in its threadpool.
+    @application.post(PATHS["sync"])
+    def sync_stream(body: ChatRequest) -> StreamingResponse:
+        rag = RagService(application.state.vector_store)
+        generator = rag.stream_answer(message=body.message, history=[m.model_dump() for m in body.history])
+        return StreamingResponse(_sync_ndjson(generator), media_type="application/x-ndjson")
+
+    return application
+
+
+class Tracker:
+    def __init__(self) -> None:
+        self.open = 0
+        self.peak = 0
+
+    def opened(self) -> None:
+        self.open += 1
+        self.peak = max(self.peak, self.open)
+
+    def closed(self) -> None:
+        self.open -= 1
+
+
+async def _one_stream(client: httpx.AsyncClient, url: str, tracker: Tracker) -> tuple[float, float]:
+    started = time.perf_counter()
+    first_token = None
+    async with client.stream("POST", url, json={"message": "How did revenue change?", "history": []}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if first_token is None and '"token"' in line:
+                first_token = time.perf_counter() - started
+                tracker.opened()
+    tracker.closed()
+    return first_token or float("nan"), time.perf_counter() - started
+
+
+async def run_load(base_url: str, path: str, streams: int) -> dict:
+    tracker = Tracker()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=600) as client:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(_one_stream(client, path, tracker) for _ in range(streams)))
+        wall = time.perf_counter() - started
+    ttft_ms = np.asarray([ttft for ttft, _total in results]) * 1000
+    totals = np.asarray([total for _ttft, total in results])
+    return {
+        "ttft_p50_ms": float(np.percentile(ttft_ms, 50)),
+        "ttft_p95_ms": float(np.percentile(ttft_ms, 95)),
+        "stream_p95_seconds": float(np.percentile(totals, 95)),
+        "peak_open_streams": tracker.peak,
+        "wall_seconds": wall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare sync and async chat streaming under concurrent load.")
+    parser.add_argument("--streams", type=int, nargs="+", default=[10, 50, 100, 200, 400])
+    parser.add_argument("--paths", nargs="+", choices=list(PATHS), default=list(PATHS))
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    model = FakeModel(args.tokens, args.token_ms / 1000, args.first_token_ms / 1000)
+    if args.serve:
+        uvicorn.run(build_app(model), host="127.0.0.1", port=args.serve, log_level="warning", lifespan="off")
+        return
+
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.chat_streaming", "--serve", str(port), "--tokens", str(args.tokens),
+            "--token-ms", str(args.token_ms), "--first-token-ms", str(args.first_token_ms),
+        ]
+    )
+    try:
+        wait_until_listening(port)
+        stream_seconds = args.first_token_ms / 1000 + (args.tokens - 1) * args.token_ms / 1000
+        print(f"Each answer: first token after {args.first_token_ms:.0f} ms, {stream_seconds:.2f} s in total.")
+        print(f"{'path':<6} {'streams':>8} {'ttft p50':>9} {'ttft p95':>9} {'stream p95':>11} {'peak open':>10} {'wall s':>7}")
+        for streams in args.streams:
+            for name in args.paths:
+                result = asyncio.run(run_load(f"http://127.0.0.1:{port}", PATHS[name], streams))
+                print(
+                    f"{name:<6} {streams:>8} {result['ttft_p50_ms']:>7.0f}ms {result['ttft_p95_ms']:>7.0f}ms "
+                    f"{result['stream_p95_seconds']:>10.2f}s {result['peak_open_streams']:>10} {result['wall_seconds']:>7.2f}",
+                    flush=True,
+                )
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
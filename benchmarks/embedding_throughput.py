@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+# Throughput of EmbeddingScheduler against a local fake embedding server that rate
+# limits like a hosted provider: a token bucket of texts per second plus a cap on
+# concurrent requests, answering 429 with Retry-After beyond either. Sweeps batch size
+# and concurrency and reports chunks/s and retries.
+#
+#   uv run python -m benchmarks.embedding_throughput
+#   uv run python -m benchmarks.embedding_throughput --chunks 20000 --rate 5000 --batch-sizes 64 256
+
+import argparse
+import asyncio
+import logging
+import subprocess
+import sys
+import time
+
+import httpx
+import uvicorn
+from langchain_core.embeddings import Embeddings
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from benchmarks import free_port, wait_until_listening
+from rag_core.embedding_scheduler import EmbeddingScheduler
+
+
+DIMENSIONS = 8
+
+
+def build_server(rate: float, burst: float, max_requests: int, base_ms: float, per_text_ms: float) -> Starlette:
+    bucket = {"tokens": burst, "at": time.monotonic()}
+    active = {"requests": 0}
+
+    def _rejected(retry_after: float) -> JSONResponse:
+        headers = {"retry-after": f"{retry_after:.3f}", "retry-after-ms": str(int(retry_after * 1000))}
+        return JSONResponse({"error": "rate limited"}, status_code=429, headers=headers)
+
+    async def embeddings(request: Request) -> JSONResponse:
+        texts = (await request.json())["input"]
+        now = time.monotonic()
+        bucket["tokens"] = min(burst, bucket["tokens"] + (now - bucket["at"]) * rate)
+        bucket["at"] = now
+        if active["requests"] >= max_requests:
+            return _rejected(base_ms / 1000)
+        if bucket["tokens"] < len(texts):
+            return _rejected((len(texts) - bucket["tokens"]) / rate)
+        bucket["tokens"] -= len(texts)
+        active["requests"] += 1
+        try:
+            await asyncio.sleep((base_ms + per_text_ms * len(texts)) / 1000)
+        finally:
+            active["requests"] -= 1
+        return JSONResponse({"data": [{"embedding": [float(len(text))] * DIMENSIONS} for text in texts]})
+
+    return Starlette(routes=[Route("/v1/embeddings", embeddings, methods=["POST"])])
+
+
+class HttpEmbeddings(Embeddings):
+    # The smallest client that behaves like a provider's: one POST per batch, and an
+    # httpx.HTTPStatusError carrying the response headers on a 429.
+    def __init__(self, base_url: str) -> None:
+        self.client = httpx.Client(base_url=base_url, timeout=60)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        response = self.client.post("/v1/embeddings", json={"input": texts})
+        response.raise_for_status()
+        return [item["embedding"] for item in response.json()["data"]]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure embedding throughput against a rate-limited fake server.")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rate", type=float, default=2000.0, help="texts per second the server accepts")
+    parser.add_argument("--burst", type=float, default=1000.0, help="texts the server accepts at once")
+    parser.add_argument("--server-concurrency", type=int, default=4, help="requests the server runs at once")
+    parser.add_argument("--base-ms", type=float, default=40.0)
+    parser.add_argument("--per-text-ms", type=float, default=0.5)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        app = build_server(args.rate, args.burst, args.server_concurrency, args.base_ms, args.per_text_ms)
+        uvicorn.run(app, host="127.0.0.1", port=args.serve, log_level="warning")
+        return
+
+    # Retries are counted in the table; one warning per 429 would bury it.
+    logging.getLogger("rag_core.embedding_scheduler").setLevel(logging.ERROR)
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.embedding_throughput", "--serve", str(port), "--rate", str(args.rate),
+            "--burst", str(args.burst), "--server-concurrency", str(args.server_concurrency),
+            "--base-ms", str(args.base_ms), "--per-text-ms", str(args.per_text_ms),
+        ]
+    )
+    texts = [f"chunk {idx} of a long quarterly report" for idx in range(args.chunks)]
+    try:
+        wait_until_listening(port)
+        embeddings = HttpEmbeddings(f"http://127.0.0.1:{port}")
+        print(
+            f"{args.chunks} chunks; server: {args.rate:.0f} texts/s, burst {args.burst:.0f}, "
+            f"{args.server_concurrency} requests at once."
+        )
+        print(f"{'batch':>6} {'workers':>8} {'chunks/s':>9} {'retries':>8} {'seconds':>8}")
+        for batch_size in args.batch_sizes:
+            for concurrency in args.concurrency:
+                # Let the server's bucket refill so every run starts from the same state.
+                time.sleep(args.burst / args.rate)
+                scheduler = EmbeddingScheduler(embeddings, batch_size=batch_size, max_concurrency=concurrency, max_retries=20)
+                stats = scheduler.run(texts, lambda offset, vectors: None)
+                print(
+                    f"{batch_size:>6} {concurrency:>8} {stats.chunks_per_second:>9.0f} {stats.retries:>8} {stats.seconds:>8.2f}",
+                    flush=True,
+                )
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+# PDF extraction and chunking done serially in one process against the parser pool at
+# several sizes, on a generated text-heavy PDF. The pool is measured cold (including
+# starting its workers, as the first upload after boot pays) and warm.
+#
+#   uv run python -m benchmarks.pdf_extraction
+#   uv run python -m benchmarks.pdf_extraction --pages 800 --workers 2 4 8
+
+import argparse
+import time
+
+from rag_core.extraction import create_process_pool, extract_chunks
+from rag_core.pdf_extractor import extract_pdf_pages
+from rag_core.text_chunker import chunk_pages
+
+
+def make_pdf(page_count: int, lines_per_page: int) -> bytes:
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(page_count):
+        lines = [
+            f"BT /F1 9 Tf 36 {790 - line * 12} Td (Page {page + 1}, line {line}: revenue in region {line % 7} "
+            f"grew {line % 13} percent on the prior quarter) Tj ET"
+            for line in range(lines_per_page)
+        ]
+        stream = "\n".join(lines).encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        kids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def _row(label: str, workers: str, seconds: float, pages: int, chunks: int) -> None:
+    print(f"{label:<12} {workers:>8} {seconds:>9.2f} {pages / seconds:>8.0f} {chunks:>8}", flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare serial PDF extraction with the parser process pool.")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--lines-per-page", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    content = make_pdf(args.pages, args.lines_per_page)
+    print(f"{args.pages} pages, {len(content) / 1e6:.1f} MB.")
+    print(f"{'run':<12} {'workers':>8} {'seconds':>9} {'pages/s':>8} {'chunks':>8}")
+
+    started = time.perf_counter()
+    chunks = extract_chunks(".pdf", content)
+    _row("serial", "-", time.perf_counter() - started, args.pages, len(chunks))
+
+    for workers in args.workers:
+        started = time.perf_counter()
+        pool = create_process_pool(workers)
+        try:
+            for label in ("pool cold", "pool warm"):
+                pages = extract_pdf_pages(content, pool, page_timeout=0, document_timeout=0)
+                chunks = pool.submit(chunk_pages, pages).result()
+                _row(label, str(workers), time.perf_counter() - started, args.pages, len(chunks))
+                started = time.perf_counter()
+        finally:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+# Per-request cost of loading settings, using the calls a chat request makes: build a
+# SettingsService, then read the effective settings, the API key, the provider limits
+# and the embedding provider.
+#
+#   uv run python -m benchmarks.settings_overhead
+#   uv run python -m benchmarks.settings_overhead --requests 50000
+#
+# "uncached" clears the process-wide snapshot, directory and cipher caches before each
+# request, which redoes the work every request did before they existed: create the
+# settings directory, read and parse settings.json, load the key file and decrypt the
+# key. "stat" is the default, one os.stat per request. "watched" is with a settings
+# watcher running, where requests are served from memory.
+
+import argparse
+import time
+
+import rag_core.security as security
+import rag_core.settings_store as settings_store
+from rag_core.settings_service import SettingsService
+
+
+def _request() -> None:
+    service = SettingsService()
+    effective = service.get_effective_settings()
+    service.get_api_key(effective.provider)
+    service.get_provider_limits(effective.provider)
+    service.get_embedding_provider()
+
+
+def _uncached_request() -> None:
+    settings_store._snapshots.clear()
+    settings_store._ensured_dirs.clear()
+    security._ciphers.clear()
+    _request()
+
+
+def _time(request, requests: int) -> float:
+    request()
+    started = time.perf_counter()
+    for _ in range(requests):
+        request()
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure per-request settings overhead.")
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+
+    service = SettingsService()
+    current = service.get_effective_settings()
+    service.save_api_key("openai", "sk-benchmark-0123456789abcdef")
+    service.update_settings(provider="openai", model="gpt-4o-mini", ollama_base_url=current.ollama_base_url, temperature=0.2)
+
+    print(f"{'mode':<10} {'us/request':>11}")
+    print(f"{'uncached':<10} {_time(_uncached_request, args.requests):>11.1f}", flush=True)
+    print(f"{'stat':<10} {_time(_request, args.requests):>11.1f}", flush=True)
+    settings_store.set_watched(True)
+    try:
+        print(f"{'watched':<10} {_time(_request, args.requests):>11.1f}", flush=True)
+    finally:
+        settings_store.set_watched(False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+# Frames and CPU per chat answer with stream coalescing on and off (STREAM_COALESCE_MS=0
+# sends one frame per provider chunk). Measured twice: the framing layer alone, and a
+# full /api/chat/stream request through the ASGI app with a fake provider that emits
+# many tiny chunks. CPU is process time per answer, including the fake provider's.
+#
+#   uv run python -m benchmarks.stream_framing
+#   uv run python -m benchmarks.stream_framing --chunks 5000 --chunk-ms 0 0.5 2
+#
+# Each full-request mode runs in its own process, since the coalescing settings are read
+# at import. The in-process transport does not include socket writes or client parsing,
+# which fewer frames also save.
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.chat_streaming import FakeModel, build_app
+from rag_core.config import settings
+from rag_core.streaming import StreamStats, coalesce
+
+
+MODES = {"per chunk": "0", "coalesced": str(settings.stream_coalesce_ms)}
+
+
+async def _provider(chunks: int, chunk_seconds: float):
+    for idx in range(chunks):
+        await asyncio.sleep(chunk_seconds)
+        yield f"t{idx % 100:02d} "
+
+
+async def _framing_layer(answers: int, chunks: int, chunk_seconds: float, window_ms: float) -> dict:
+    frames = 0
+    cpu = 0.0
+    for _ in range(answers):
+        stats = StreamStats(started=time.perf_counter())
+        started = time.process_time()
+        async for _frame in coalesce(
+            _provider(chunks, chunk_seconds), stats, window_ms / 1000, settings.stream_coalesce_bytes
+        ):
+            pass
+        cpu += time.process_time() - started
+        frames += stats.frames
+    return {"frames": frames / answers, "cpu_ms": cpu / answers * 1000}
+
+
+async def _full_request(answers: int, chunks: int, chunk_seconds: float) -> dict:
+    app = build_app(FakeModel(chunks, chunk_seconds, 0.0))
+    frames = 0
+    cpu = 0.0
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(answers):
+            started = time.process_time()
+            async with client.stream("POST", "/api/chat/stream", json={"message": "Summarise the report.", "history": []}) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line.startswith('{"type": "token"'):
+                        frames += 1
+            cpu += time.process_time() - started
+    return {"frames": frames / answers, "cpu_ms": cpu / answers * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure frames and CPU per answer with and without coalescing.")
+    parser.add_argument("--answers", type=int, default=20)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-ms", type=float, nargs="+", default=[0.0, 1.0])
+    parser.add_argument("--request", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.request is not None:
+        print(json.dumps(asyncio.run(_full_request(args.answers, args.chunks, args.request / 1000))))
+        return
+
+    print(f"{args.answers} answers of {args.chunks} 4-byte chunks; window {settings.stream_coalesce_ms} ms, "
+          f"{settings.stream_coalesce_bytes} bytes.")
+    print(f"{'layer':<9} {'chunk ms':>9} {'mode':<10} {'frames':>8} {'cpu ms':>8}")
+    for chunk_ms in args.chunk_ms:
+        for mode, window_ms in MODES.items():
+            result = asyncio.run(_framing_layer(args.answers, args.chunks, chunk_ms / 1000, float(window_ms)))
+            print(f"{'framing':<9} {chunk_ms:>9.1f} {mode:<10} {result['frames']:>8.0f} {result['cpu_ms']:>8.1f}", flush=True)
+        for mode, window_ms in MODES.items():
+            command = [
+                sys.executable, "-m", "benchmarks.stream_framing", "--request", str(chunk_ms),
+                "--answers", str(args.answers), "--chunks", str(args.chunks),
+            ]
+            env = {**os.environ, "STREAM_COALESCE_MS": window_ms}
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{'request':<9} {chunk_ms:>9.1f} {mode:<10} {result['frames']:>8.0f} {result['cpu_ms']:>8.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
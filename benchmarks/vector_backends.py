@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+# Compares the numpy index with Chroma on synthetic corpora: build time, open time,
+# query latency and resident memory. Each index is built and then measured in its own
+# fresh process, so open time includes the backend import and memory is not shared.
+#
+#   uv run python -m benchmarks.vector_backends
+#   uv run python -m benchmarks.vector_backends --sizes 10000 100000 --backends numpy
+#
+# The full default run (up to 1M chunks) needs several GB of disk and takes hours for
+# Chroma; pass --sizes to trim it.
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import BENCHMARK_ROOT
+
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+BACKENDS = ["numpy", "chroma"]
+CLUSTERS = 256
+BLOCK_ROWS = 10_000
+
+
+def _signature(dimensions: int) -> dict:
+    return {"embedding_provider": "benchmark", "embedding_model": "synthetic", "embedding_dimensions": dimensions}
+
+
+def _centres(dimensions: int) -> np.ndarray:
+    return np.random.default_rng(0).normal(size=(CLUSTERS, dimensions)).astype(np.float32)
+
+
+def _block(start: int, rows: int, dimensions: int, seed: int = 1) -> np.ndarray:
+    # Points scattered around topic centres, like embeddings of chunks from many
+    # documents. Blocks are generated independently, so 1M rows never sit in memory.
+    rng = np.random.default_rng((seed, start))
+    labels = rng.integers(0, CLUSTERS, size=rows)
+    return _centres(dimensions)[labels] + 0.4 * rng.normal(size=(rows, dimensions)).astype(np.float32)
+
+
+def _open_backend(name: str, dimensions: int):
+    if name == "numpy":
+        from rag_core.vector_backends.numpy_index import NumpyBackend
+
+        return NumpyBackend(_signature(dimensions))
+    from rag_core.vector_backends.chroma import ChromaBackend
+
+    return ChromaBackend(_signature(dimensions))
+
+
+def build(name: str, size: int, dimensions: int) -> dict:
+    backend = _open_backend(name, dimensions)
+    batch = min(backend.max_batch_size, BLOCK_ROWS)
+    started = time.perf_counter()
+    for start in range(0, size, batch):
+        rows = min(batch, size - start)
+        vectors = _block(start, rows, dimensions)
+        ids = [f"doc-{idx // 50}:1:{idx % 50}" for idx in range(start, start + rows)]
+        metadatas = [{"doc_id": f"doc-{idx // 50}", "version": 1, "chunk_index": idx % 50} for idx in range(start, start + rows)]
+        backend.upsert(ids, vectors.tolist(), [f"chunk {idx}" for idx in range(start, start + rows)], metadatas)
+    elapsed = time.perf_counter() - started
+    backend.close()
+    return {"build_seconds": elapsed}
+
+
+def measure(name: str, size: int, dimensions: int, queries: int, k: int) -> dict:
+    started = time.perf_counter()
+    backend = _open_backend(name, dimensions)
+    # The first count forces any lazy loading, so it is part of opening.
+    assert backend.count() == size
+    open_seconds = time.perf_counter() - started
+
+    probes = _block(0, queries, dimensions, seed=2)
+    timings = []
+    for probe in probes:
+        query_started = time.perf_counter()
+        backend.search(probe.tolist(), k=k)
+        timings.append(time.perf_counter() - query_started)
+    backend.close()
+    timings_ms = np.asarray(timings) * 1000
+    return {
+        "open_seconds": open_seconds,
+        "query_p50_ms": float(np.percentile(timings_ms, 50)),
+        "query_p95_ms": float(np.percentile(timings_ms, 95)),
+        # Peak resident set of this process: the opened index plus the backend's imports.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _run_child(step: str, name: str, size: int, data_dir: Path, args: argparse.Namespace) -> dict:
+    env = {**os.environ, "BENCHMARK_DATA_DIR": str(data_dir)}
+    command = [
+        sys.executable, "-m", "benchmarks.vector_backends", "--step", step, "--backends", name,
+        "--sizes", str(size), "--dimensions", str(args.dimensions), "--queries", str(args.queries), "--k", str(args.k),
+    ]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare vector backends on synthetic corpora.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="keep the built indexes")
+    parser.add_argument("--step", choices=["build", "measure"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.step == "build":
+        print(json.dumps(build(args.backends[0], args.sizes[0], args.dimensions)))
+        return
+    if args.step == "measure":
+        print(json.dumps(measure(args.backends[0], args.sizes[0], args.dimensions, args.queries, args.k)))
+        return
+
+    workdir = Path(tempfile.mkdtemp(prefix="vector-bench-", dir=BENCHMARK_ROOT))
+    header = f"{'backend':<8} {'chunks':>9} {'build s':>9} {'open s':>8} {'p50 ms':>8} {'p95 ms':>8} {'rss MB':>8}"
+    print(header)
+    try:
+        for size in args.sizes:
+            for name in args.backends:
+                data_dir = workdir / f"{name}-{size}"
+                result = _run_child("build", name, size, data_dir, args)
+                result.update(_run_child("measure", name, size, data_dir, args))
+                print(
+                    f"{name:<8} {size:>9} {result['build_seconds']:>9.1f} {result['open_seconds']:>8.2f} "
+                    f"{result['query_p50_ms']:>8.2f} {result['query_p95_ms']:>8.2f} {result['peak_rss_mb']:>8.0f}",
+                    flush=True,
+                )
+    finally:
+        if args.keep:
+            print(f"Indexes kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import replace
+
+from rag_core.config import settings
+from rag_core.metrics import metrics
+from rag_core.settings_service import ProviderLimits
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    # A place in a provider's gate: admitted straight away, or waiting in its queue.
+    def __init__(self, gate: ProviderGate, admitted: asyncio.Future[None]) -> None:
+        self.gate = gate
+        self.admitted = admitted
+        self.enqueued_at = time.perf_counter()
+        self.started_at: float | None = None
+        self.released = False
+
+    @property
+    def position(self) -> int:
+        # 1-based place in the queue; 0 once admitted.
+        if self.admitted.done():
+            return 0
+        return self.gate.position(self)
+
+    @property
+    def queued_seconds(self) -> float:
+        return (self.started_at or self.enqueued_at) - self.enqueued_at
+
+    async def wait(self, timeout: float) -> bool:
+        # True once admitted; False if still queued when the timeout runs out.
+        if self.admitted.done():
+            return True
+        done, _ = await asyncio.wait({self.admitted}, timeout=timeout)
+        return bool(done)
+
+    def release(self) -> None:
+        if self.released:
+            return
+        self.released = True
+        self.gate.release(self)
+
+
+class ProviderGate:
+    # At most max_concurrency generations run against a provider; up to max_queue more
+    # wait in FIFO order. Everything runs on the event loop, so no lock is needed.
+    def __init__(self, provider: str, limits: ProviderLimits) -> None:
+        self.provider = provider
+        self.limits = limits
+        self.active = 0
+        self.waiting: deque[Ticket] = deque()
+        # Moving average of how long a generation holds its slot, for Retry-After.
+        self.average_hold_seconds = 5.0
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"llm.admission.{self.provider}.active", self.active)
+        metrics.set_gauge(f"llm.admission.{self.provider}.queue_depth", len(self.waiting))
+
+    def retry_after(self) -> int:
+        rounds = (len(self.waiting) + 1) / max(self.limits.max_concurrency, 1)
+        return max(1, math.ceil(self.average_hold_seconds * rounds))
+
+    def enter(self) -> Ticket:
+        loop = asyncio.get_running_loop()
+        ticket = Ticket(self, loop.create_future())
+        if self.active < self.limits.max_concurrency and not self.waiting:
+            self._admit(ticket)
+            return ticket
+        if len(self.waiting) >= self.limits.max_queue:
+            metrics.incr("llm.admission.rejected")
+            raise AdmissionRejected(
+                f"Provider '{self.provider}' is at capacity. Please retry shortly.",
+                retry_after=self.retry_after(),
+            )
+        self.waiting.append(ticket)
+        self._publish()
+        return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        try:
+            return self.waiting.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    def _admit(self, ticket: Ticket) -> None:
+        self.active += 1
+        ticket.started_at = time.perf_counter()
+        metrics.observe("llm.admission.wait", ticket.started_at - ticket.enqueued_at)
+        ticket.admitted.set_result(None)
+        self._publish()
+
+    def release(self, ticket: Ticket) -> None:
+        if ticket.started_at is None:
+            # Gave up (timeout or disconnect) while still queued.
+            if not ticket.admitted.done():
+                ticket.admitted.cancel()
+            try:
+                self.waiting.remove(ticket)
+            except ValueError:
+                pass
+            self._publish()
+            return
+        held = time.perf_counter() - ticket.started_at
+        self.average_hold_seconds = 0.8 * self.average_hold_seconds + 0.2 * held
+        self.active -= 1
+        self.drain()
+
+    def drain(self) -> None:
+        # Also runs after a limits change, which may open more slots at once.
+        while self.waiting and self.active < self.limits.max_concurrency:
+            self._admit(self.waiting.popleft())
+        self._publish()
+
+
+def per_worker_limits(limits: ProviderLimits, workers: int) -> ProviderLimits:
+    # Each worker takes its share of the deployment-wide limits, rounded up so every
+    # worker can run at least one generation.
+    return replace(
+        limits,
+        max_concurrency=max(1, math.ceil(limits.max_concurrency / workers)),
+        max_queue=math.ceil(limits.max_queue / workers),
+    )
+
+
+class AdmissionController:
+    # Gates live in this process only. Limits passed in are for the whole deployment and
+    # are divided across the workers running it.
+    def __init__(self, workers: int | None = None) -> None:
+        self.workers = max(1, workers or settings.web_concurrency)
+        self._gates: dict[str, ProviderGate] = {}
+
+    def enter(self, provider: str, limits: ProviderLimits) -> Ticket:
+        # Raises AdmissionRejected when the provider's queue is full.
+        limits = per_worker_limits(limits, self.workers)
+        gate = self._gates.get(provider)
+        if gate is None:
+            gate = self._gates[provider] = ProviderGate(provider, limits)
+        elif gate.limits != limits:
+            gate.limits = limits
+            gate.drain()
+        return gate.enter()
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+
+from sqlalchemy.orm import Session
+
+from rag_core.admission import AdmissionController, AdmissionRejected
+from rag_core.config import settings
+from rag_core.db.models import ChatSession, ChatTurn
+from rag_core.db.session import SessionLocal
+from rag_core.llm_service import LLMService, LLMServiceError
+from rag_core.metrics import metrics
+from rag_core.prompt_builder import estimate_tokens
+from rag_core.repositories import ChatRepository
+from rag_core.settings_service import EffectiveSettings, SettingsService
+
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Merge the earlier summary (if any) with the new turns. Keep facts, names, numbers, "
+    "decisions and open questions the user may refer back to. Drop greetings and filler. "
+    "Write plain prose under 200 words."
+)
+
+
+@dataclass
+class Conversation:
+    summary: str | None = None
+    turns: list[dict[str, str]] = field(default_factory=list)
+
+
+class ChatSessionService:
+    def __init__(self, db: Session) -> None:
+        self.repo = ChatRepository(db)
+
+    def create(self) -> ChatSession:
+        return self.repo.create_session(ChatSession(id=str(uuid.uuid4())))
+
+    def get(self, session_id: str) -> ChatSession | None:
+        return self.repo.get_session(session_id)
+
+    def list_turns(self, session_id: str) -> list[ChatTurn]:
+        return self.repo.list_turns(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        chat_session = self.repo.get_session(session_id)
+        if chat_session is None:
+            return False
+        self.repo.delete_session(chat_session)
+        return True
+
+    def load(self, session_id: str) -> Conversation | None:
+        # The summary stands in for every turn it covers; only later turns are loaded.
+        chat_session = self.repo.get_session(session_id)
+        if chat_session is None:
+            return None
+        turns = self.repo.list_turns(session_id, after_id=chat_session.summarized_through)
+        return Conversation(
+            summary=chat_session.summary,
+            turns=[{"role": turn.role, "content": turn.content} for turn in turns],
+        )
+
+    def record_exchange(self, session_id: str, message: str, answer: str) -> None:
+        self.repo.add_turns(session_id, [("user", message), ("assistant", answer or "(empty response)")])
+
+
+def load_conversation(session_id: str) -> Conversation | None:
+    with SessionLocal() as db:
+        return ChatSessionService(db).load(session_id)
+
+
+def record_exchange(session_id: str, message: str, answer: str) -> None:
+    with SessionLocal() as db:
+        ChatSessionService(db).record_exchange(session_id, message, answer)
+
+
+def _turns_to_fold(session_id: str) -> tuple[ChatSession, list[ChatTurn]] | None:
+    with SessionLocal() as db:
+        repo = ChatRepository(db)
+        chat_session = repo.get_session(session_id)
+        if chat_session is None:
+            return None
+        turns = repo.list_turns(session_id, after_id=chat_session.summarized_through)
+    if sum(estimate_tokens(turn.content) for turn in turns) <= settings.chat_history_max_tokens:
+        return None
+    keep = max(settings.chat_summary_keep_turns, 0)
+    fold = turns[: len(turns) - keep] if keep else turns
+    if not fold:
+        return None
+    return chat_session, fold
+
+
+def _advance_summary(session_id: str, expected_through: int, summary: str, through: int) -> bool:
+    with SessionLocal() as db:
+        return ChatRepository(db).advance_summary(session_id, expected_through, summary, through)
+
+
+# Sessions with a summary in progress; a second request for the same session is skipped.
+_summarizing: set[str] = set()
+_summarizing_lock = threading.Lock()
+
+
+async def refresh_summary(session_id: str, admission: AdmissionController) -> None:
+    # Folds older turns into the session summary once the unsummarized history outgrows
+    # CHAT_HISTORY_MAX_TOKENS, keeping the most recent CHAT_SUMMARY_KEEP_TURNS verbatim.
+    # Runs after the answer has been sent, so it never delays a response. The summary
+    # call is a generation like any other and waits for a slot in the provider's gate.
+    with _summarizing_lock:
+        if session_id in _summarizing:
+            return
+        _summarizing.add(session_id)
+    try:
+        pending = await asyncio.to_thread(_turns_to_fold, session_id)
+        if pending is None:
+            return
+        chat_session, fold = pending
+
+        settings_service = SettingsService()
+        active_settings = settings_service.get_effective_settings()
+        api_key = settings_service.get_api_key(active_settings.provider)
+        if active_settings.provider != "ollama" and not api_key:
+            return
+
+        limits = settings_service.get_provider_limits(active_settings.provider)
+        try:
+            ticket = admission.enter(active_settings.provider, limits)
+        except AdmissionRejected:
+            # Answers come first; the next exchange tries again.
+            metrics.incr("chat.summary.deferred")
+            return
+        try:
+            if not await ticket.wait(timeout=limits.max_wait_seconds):
+                metrics.incr("chat.summary.deferred")
+                return
+            await _summarize(session_id, chat_session, fold, active_settings, api_key)
+        finally:
+            ticket.release()
+    finally:
+        with _summarizing_lock:
+            _summarizing.discard(session_id)
+
+
+async def _summarize(
+    session_id: str,
+    chat_session: ChatSession,
+    fold: list[ChatTurn],
+    active_settings: EffectiveSettings,
+    api_key: str | None,
+) -> None:
+    transcript = "\n\n".join(f"{turn.role.capitalize()}: {turn.content}" for turn in fold)
+    earlier = f"Earlier summary:\n{chat_session.summary}\n\n" if chat_session.summary else ""
+    messages = [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {"role": "user", "content": f"{earlier}New turns:\n{transcript}"},
+    ]
+    try:
+        summary = (await LLMService().acomplete(active_settings, api_key, messages)).strip()
+    except LLMServiceError as exc:
+        # The prompt builder still drops the oldest turns, so the next request is bounded.
+        logger.warning("Chat summary failed for session %s: %s", session_id, exc)
+        metrics.incr("chat.summary.failures")
+        return
+    if not summary:
+        return
+
+    applied = await asyncio.to_thread(
+        _advance_summary, session_id, chat_session.summarized_through, summary, fold[-1].id
+    )
+    if applied:
+        metrics.incr("chat.summary.updates")
+        metrics.incr("chat.summary.turns_folded", len(fold))
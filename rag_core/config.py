@@ -10,11 +10,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = BASE_DIR / "data"
+DATA_DIR = Path(os.getenv("DATA_DIR", str(BASE_DIR / "data")))
 UPLOAD_DIR = DATA_DIR / "uploads"
 CHROMA_DIR = DATA_DIR / "chroma"
+VECTOR_INDEX_DIR = DATA_DIR / "vector_index"
 SECRETS_DIR = DATA_DIR / "secrets"
 CONFIG_DIR = DATA_DIR / "config"
+CACHE_DIR = DATA_DIR / "cache"
 SETTINGS_FILE = CONFIG_DIR / "settings.json"
 
 
@@ -33,18 +35,77 @@ class AppSettings:
 
     database_url: str = _required_env("SUPABASE_DB_URL")
 
+    # Per engine: the sync engine (workers, chat) and the async one (file routes) each
+    # keep their own pool. Recycle below the Supabase pooler's idle timeout.
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout_seconds: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    db_pool_recycle_seconds: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "300"))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").strip().lower() in {"1", "true", "yes", "on"}
+
     uploads_dir: Path = UPLOAD_DIR
     chroma_dir: Path = CHROMA_DIR
+    vector_index_dir: Path = VECTOR_INDEX_DIR
     secrets_dir: Path = SECRETS_DIR
     config_dir: Path = CONFIG_DIR
+    cache_dir: Path = CACHE_DIR
     settings_file: Path = SETTINGS_FILE
+    embedding_cache_file: Path = CACHE_DIR / "embeddings.sqlite3"
+    embedding_cache_max_mb: int = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "128"))
+    embedding_concurrency: int = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+    embedding_max_retries: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+    vector_backend: str = os.getenv("VECTOR_BACKEND", "chroma").strip().lower()
+    vector_index_dtype: str = os.getenv("VECTOR_INDEX_DTYPE", "float32").strip().lower()
+    vector_ivf_min_rows: int = int(os.getenv("VECTOR_IVF_MIN_ROWS", "50000"))
+    vector_ivf_nprobe: int = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+    pgvector_index: str = os.getenv("PGVECTOR_INDEX", "hnsw").strip().lower()
+    pgvector_hnsw_m: int = int(os.getenv("PGVECTOR_HNSW_M", "16"))
+    pgvector_hnsw_ef_construction: int = int(os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", "64"))
+    pgvector_ef_search: int = int(os.getenv("PGVECTOR_EF_SEARCH", "40"))
+    pgvector_ivfflat_lists: int = int(os.getenv("PGVECTOR_IVFFLAT_LISTS", "100"))
+    pgvector_probes: int = int(os.getenv("PGVECTOR_PROBES", "10"))
+    query_cache_size: int = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    query_cache_ttl_seconds: float = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "600"))
+    # How stale another worker's corpus change may look before cached results drop.
+    query_cache_sync_seconds: float = float(os.getenv("QUERY_CACHE_SYNC_SECONDS", "0.5"))
 
     max_upload_size_mb: int = int(os.getenv("MAX_UPLOAD_SIZE_MB", "20"))
+    ingestion_workers: int = int(os.getenv("INGESTION_WORKERS", "2"))
+    # How long a worker's claim on a job lasts without progress; must outlast parsing.
+    ingestion_lease_seconds: float = float(os.getenv("INGESTION_LEASE_SECONDS", "900"))
+    parser_processes: int = int(os.getenv("PARSER_PROCESSES", str(min(4, os.cpu_count() or 1))))
+    pdf_page_timeout_seconds: float = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "10"))
+    pdf_document_timeout_seconds: float = float(os.getenv("PDF_DOCUMENT_TIMEOUT_SECONDS", "300"))
 
     ollama_base_url: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    ollama_num_ctx: int = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+    prompt_max_tokens: int = int(os.getenv("PROMPT_MAX_TOKENS", "6000"))
+    prompt_output_reserve_tokens: int = int(os.getenv("PROMPT_OUTPUT_RESERVE_TOKENS", "1024"))
+    prompt_history_share: float = float(os.getenv("PROMPT_HISTORY_SHARE", "0.3"))
+    # The LLM_* and OLLAMA_* admission limits are for the whole deployment. Admission is
+    # tracked in each server process, so every process enforces its share: the limit
+    # divided by WEB_CONCURRENCY (the `uvicorn --workers` default), rounded up.
+    web_concurrency: int = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    ollama_max_concurrency: int = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2"))
+    llm_max_queue: int = int(os.getenv("LLM_MAX_QUEUE", "32"))
+    llm_max_queue_wait_seconds: float = float(os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", "30"))
+    stream_coalesce_ms: float = float(os.getenv("STREAM_COALESCE_MS", "30"))
+    stream_coalesce_bytes: int = int(os.getenv("STREAM_COALESCE_BYTES", "1024"))
+    chat_history_max_tokens: int = int(os.getenv("CHAT_HISTORY_MAX_TOKENS", "3000"))
+    chat_summary_keep_turns: int = int(os.getenv("CHAT_SUMMARY_KEEP_TURNS", "6"))
+    model_catalog_ttl_seconds: float = float(os.getenv("MODEL_CATALOG_TTL_SECONDS", "300"))
+    model_catalog_max_stale_seconds: float = float(os.getenv("MODEL_CATALOG_MAX_STALE_SECONDS", "86400"))
+    settings_watch_interval_seconds: float = float(os.getenv("SETTINGS_WATCH_INTERVAL_SECONDS", "1"))
+    settings_notify: str = os.getenv("SETTINGS_NOTIFY", "auto").strip().lower()
+    llm_client_cache_size: int = int(os.getenv("LLM_CLIENT_CACHE_SIZE", "16"))
+    llm_client_idle_seconds: float = float(os.getenv("LLM_CLIENT_IDLE_SECONDS", "900"))
+    embedding_provider: str = os.getenv("EMBEDDING_PROVIDER", "openai").strip().lower()
     ollama_embedding_model: str = os.getenv("OLLAMA_EMBED_MODEL", "bge-m3")
     gemini_embedding_model: str = os.getenv("GEMINI_EMBED_MODEL", "gemini-embedding-001")
     openai_embedding_model: str = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-large")
+    hashing_embedding_dimensions: int = int(os.getenv("HASHING_EMBED_DIMENSIONS", "384"))
 
     supabase_url: str = os.getenv("SUPABASE_URL", "")
     supabase_service_key: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_ANON_KEY", "")
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from datetime import datetime
-from sqlalchemy import DateTime, Integer, String, func
+from datetime import datetime, timezone
+from sqlalchemy import BigInteger, Boolean, DateTime, Index, Integer, String, Text, false, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from rag_core.db.base import Base
@@ -16,6 +16,48 @@ class Document(Base):
     file_type: Mapped[str] = mapped_column(String(16), nullable=False)
     size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
     chunk_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    active_version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    # Set in Python so SQLite stores the same microsecond text as a bound datetime, and
+    # the keyset below can compare and sort the raw column through its index.
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    # Keyset pagination walks (created_at, id) newest first, optionally within one type.
+    __table_args__ = (
+        Index("ix_documents_created_at_id", "created_at", "id"),
+        Index("ix_documents_file_type_created_at_id", "file_type", "created_at", "id"),
+    )
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    document_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
+    original_name: Mapped[str] = mapped_column(String(512), nullable=False)
+    stored_name: Mapped[str] = mapped_column(String(512), nullable=False)
+    file_type: Mapped[str] = mapped_column(String(16), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    deduplicated: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued", index=True)
+    chunk_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    chunks_indexed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # The worker running the job and how long its claim lasts; see IngestionQueue.
+    claimed_by: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -23,3 +65,50 @@ class Document(Base):
         onupdate=func.now(),
         nullable=False,
     )
+
+
+# At most one job indexes a given file at a time: a second upload of the same bytes
+# fails to insert and reports the running job instead (see DocumentService).
+Index(
+    "uq_ingestion_jobs_active_content_sha256",
+    IngestionJob.content_sha256,
+    unique=True,
+    postgresql_where=IngestionJob.status.in_(("queued", "parsing", "embedding")),
+    sqlite_where=IngestionJob.status.in_(("queued", "parsing", "embedding")),
+)
+
+
+class ChatSession(Base):
+    __tablename__ = "chat_sessions"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    # Rolling summary of every turn up to and including summarized_through (a ChatTurn id).
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    summarized_through: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class ChatTurn(Base):
+    __tablename__ = "chat_turns"
+    __table_args__ = (Index("ix_chat_turns_session_id_id", "session_id", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    session_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    role: Mapped[str] = mapped_column(String(16), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class CorpusState(Base):
+    # A single row. Every worker bumps generation when it changes the indexed corpus,
+    # and drops its cached retrieval results when it sees a generation it has not seen.
+    __tablename__ = "corpus_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    generation: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
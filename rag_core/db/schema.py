@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from sqlalchemy import Engine, inspect, text
+
+from rag_core.db.base import Base
+
+
+def ensure_schema(bind: Engine) -> None:
+    Base.metadata.create_all(bind=bind)
+
+    # create_all() skips tables that already exist, so columns and indexes added to a
+    # model after the first deploy are backfilled here. New columns must be nullable or
+    # carry a server default.
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=bind.dialect)}"
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    if isinstance(default, str):
+                        default = f"'{default}'"
+                    else:
+                        default = default.compile(dialect=bind.dialect)
+                    ddl += f" DEFAULT {default}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+    # CURRENT_TIMESTAMP on SQLite is "YYYY-MM-DD HH:MM:SS", which sorts before the
+    # microsecond text SQLAlchemy writes for the same second. Documents created before
+    # created_at was set in Python are padded so the keyset compares raw text.
+    if bind.dialect.name == "sqlite":
+        with bind.begin() as conn:
+            conn.execute(text("UPDATE documents SET created_at = created_at || '.000000' WHERE length(created_at) = 19"))
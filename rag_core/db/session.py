@@ -1,17 +1,110 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+import time
+from functools import lru_cache
+from typing import AsyncIterator
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from rag_core.config import settings
+from rag_core.metrics import metrics
+
+
+def _pool_kwargs() -> dict:
+    # SQLite keeps SQLAlchemy's default pool; Postgres gets a sized pool that checks
+    # connections before use and replaces them before the Supabase pooler drops them.
+    if settings.database_url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def async_database_url(url: str) -> str:
+    # The same database through an async driver: psycopg 3 for Postgres, aiosqlite for
+    # local SQLite.
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        return parsed.set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+def _pool_limit() -> int | None:
+    if settings.database_url.startswith("sqlite"):
+        return None
+    return settings.db_pool_size + settings.db_max_overflow
+
+
+def _instrument(engine: Engine, name: str, limit: int | None) -> None:
+    # Pool events fire once a connection is in hand, so waits are seen through what
+    # causes them: slow connection opens, long holds, and checkouts that take the last
+    # free connection, after which the next one waits up to DB_POOL_TIMEOUT_SECONDS.
+    pool = engine.pool
+
+    @event.listens_for(engine, "do_connect")
+    def _on_connecting(dialect, connection_record, cargs, cparams) -> None:
+        connection_record.info["connecting_since"] = time.perf_counter()
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("connecting_since", None)
+        if started is not None:
+            metrics.observe(f"{name}.connect", time.perf_counter() - started)
 
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        checked_out = pool.checkedout()
+        metrics.set_gauge(f"{name}.checked_out", checked_out)
+        if limit is not None and checked_out >= limit:
+            metrics.incr(f"{name}.exhausted")
 
-engine_kwargs: dict = {"future": True}
-if settings.database_url.startswith("sqlite"):
-    engine_kwargs["connect_args"] = {"check_same_thread": False}
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record) -> None:
+        # Fires before the pool takes the connection back.
+        metrics.set_gauge(f"{name}.checked_out", max(pool.checkedout() - 1, 0))
+        started = connection_record.info.pop("checked_out_at", None) if connection_record is not None else None
+        if started is not None:
+            metrics.observe(f"{name}.hold", time.perf_counter() - started)
 
-engine = create_engine(settings.database_url, **engine_kwargs)
+    # A failed pre-ping or a dropped connection; the pool reconnects transparently.
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception) -> None:
+        metrics.incr(f"{name}.invalidated")
+
+
+engine = create_engine(settings.database_url, future=True, **_pool_kwargs())
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, class_=Session)
+_instrument(engine, "db.pool", _pool_limit())
+
+
+@lru_cache(maxsize=1)
+def get_async_engine() -> AsyncEngine:
+    # Used by async route handlers, so database waits do not hold a threadpool worker.
+    # Created on first use: processes that never serve those routes (scripts, ingestion
+    # tooling) do not need the async driver.
+    async_engine = create_async_engine(async_database_url(settings.database_url), **_pool_kwargs())
+    _instrument(async_engine.sync_engine, "db.async_pool", _pool_limit())
+    return async_engine
+
+
+@lru_cache(maxsize=1)
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
+
+async def dispose_async_engine() -> None:
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
 
 
 def get_db() -> Session:
@@ -21,3 +114,7 @@ def get_db() -> Session:
     finally:
         db.close()
 
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
 
@@ -14,6 +15,12 @@ class DocumentParseError(Exception):
     pass
 
 
+@dataclass(frozen=True)
+class PageText:
+    number: int | None
+    text: str
+
+
 def parse_document_bytes(ext: str, content: bytes) -> str:
     ext = ext.lower()
     if ext not in SUPPORTED_EXTENSIONS:
@@ -34,6 +41,18 @@ def parse_document_bytes(ext: str, content: bytes) -> str:
         raise DocumentParseError(str(exc)) from exc
 
 
+def parse_document_pages(ext: str, content: bytes) -> list[PageText]:
+    ext = ext.lower()
+    if ext != ".pdf":
+        return [PageText(number=None, text=parse_document_bytes(ext, content))]
+
+    try:
+        reader = PdfReader(BytesIO(content))
+        return [PageText(number=index, text=page.extract_text() or "") for index, page in enumerate(reader.pages, start=1)]
+    except Exception as exc:  # pragma: no cover
+        raise DocumentParseError(str(exc)) from exc
+
+
 def parse_document(path: Path) -> str:
     return parse_document_bytes(path.suffix.lower(), path.read_bytes())
 
@@ -1,26 +1,81 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+from datetime import datetime
 from pathlib import Path
 from uuid import uuid4
 
 from fastapi import UploadFile
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from rag_core.config import settings
-from rag_core.document_parser import SUPPORTED_EXTENSIONS, DocumentParseError, parse_document_bytes
-from rag_core.repositories import DocumentRepository
+from rag_core.db.models import Document, IngestionJob
+from rag_core.document_parser import SUPPORTED_EXTENSIONS, DocumentParseError
+from rag_core.extraction import extract_chunks_in_pool
+from rag_core.repositories import (
+    AsyncDocumentRepository,
+    AsyncIngestionJobRepository,
+    DocumentRepository,
+    IngestionJobRepository,
+    bump_corpus_generation,
+)
 from rag_core.storage import DocumentStorage, DocumentStorageError
-from rag_core.text_chunker import chunk_text
-from rag_core.vector_store import VectorStore
+from rag_core.vector_store import ReindexStats, VectorStore
+
+
+JOB_QUEUED = "queued"
+JOB_PARSING = "parsing"
+JOB_EMBEDDING = "embedding"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_ACTIVE_STATUSES = (JOB_QUEUED, JOB_PARSING, JOB_EMBEDDING)
+UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
 
 
 class DocumentServiceError(Exception):
     pass
 
 
+class JobLeaseLost(DocumentServiceError):
+    pass
+
+
+def _encode_cursor(row: Document) -> str:
+    raw = f"{row.created_at.isoformat()}|{row.id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _stats_payload(rows: list[tuple[str, int, int, int]]) -> dict:
+    by_type = [
+        {"file_type": file_type, "count": count, "bytes": size, "chunks": chunks}
+        for file_type, count, size, chunks in rows
+    ]
+    return {
+        "count": sum(item["count"] for item in by_type),
+        "bytes": sum(item["bytes"] for item in by_type),
+        "chunks": sum(item["chunks"] for item in by_type),
+        "by_type": by_type,
+    }
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, doc_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), doc_id
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise DocumentServiceError("Invalid cursor.") from exc
+
+
 class DocumentService:
     def __init__(self, db: Session, vector_store: VectorStore, storage: DocumentStorage) -> None:
+        self.db = db
         self.repo = DocumentRepository(db)
+        self.jobs = IngestionJobRepository(db)
         self.vector_store = vector_store
         self.storage = storage
         settings.uploads_dir.mkdir(parents=True, exist_ok=True)
@@ -31,7 +86,21 @@ class DocumentService:
     def get_document(self, doc_id: str):
         return self.repo.get(doc_id)
 
-    async def upload(self, upload_file: UploadFile):
+    async def _read_upload(self, upload_file: UploadFile) -> tuple[bytes, str]:
+        max_bytes = settings.max_upload_size_mb * 1024 * 1024
+        digest = hashlib.sha256()
+        buffer = bytearray()
+        while True:
+            block = await upload_file.read(UPLOAD_READ_CHUNK_BYTES)
+            if not block:
+                break
+            buffer.extend(block)
+            if len(buffer) > max_bytes:
+                raise DocumentServiceError(f"File exceeds {settings.max_upload_size_mb} MB limit.")
+            digest.update(block)
+        return bytes(buffer), digest.hexdigest()
+
+    async def stage_upload(self, upload_file: UploadFile) -> tuple[IngestionJob, bool]:
         original_name = (upload_file.filename or "").strip()
         if not original_name:
             raise DocumentServiceError("Missing filename.")
@@ -40,53 +109,182 @@ class DocumentService:
         if ext not in SUPPORTED_EXTENSIONS:
             raise DocumentServiceError(f"Unsupported file type '{ext}'. Allowed: PDF, DOCX, TXT.")
 
-        content = await upload_file.read()
-        max_bytes = settings.max_upload_size_mb * 1024 * 1024
+        content, content_sha256 = await self._read_upload(upload_file)
         if len(content) == 0:
             raise DocumentServiceError("Uploaded file is empty.")
-        if len(content) > max_bytes:
-            raise DocumentServiceError(f"File exceeds {settings.max_upload_size_mb} MB limit.")
+
+        duplicate = await run_in_threadpool(self._find_duplicate, original_name, content_sha256)
+        if duplicate is not None:
+            return duplicate, False
 
         doc_id = str(uuid4())
+        try:
+            stored = await run_in_threadpool(self.storage.save_bytes, doc_id=doc_id, ext=ext, content=content)
+        except DocumentStorageError as exc:
+            raise DocumentServiceError(f"Storage error: {exc}") from exc
 
+        job = IngestionJob(
+            id=str(uuid4()),
+            document_id=doc_id,
+            original_name=original_name,
+            stored_name=stored.stored_name,
+            file_type=ext.replace(".", ""),
+            size_bytes=stored.size_bytes,
+            content_sha256=content_sha256,
+            status=JOB_QUEUED,
+        )
+        return await run_in_threadpool(self._record_job, job)
+
+    def _record_job(self, job: IngestionJob) -> tuple[IngestionJob, bool]:
         try:
-            raw_text = parse_document_bytes(ext, content)
-            chunks = chunk_text(raw_text)
+            return self.jobs.upsert(job), True
+        except IntegrityError:
+            # The same bytes were queued concurrently since the duplicate check above.
+            self.db.rollback()
+            self.storage.delete(job.stored_name)
+            duplicate = self._find_duplicate(job.original_name, job.content_sha256)
+            if duplicate is None:
+                raise
+            return duplicate, False
+
+    def _find_duplicate(self, original_name: str, content_sha256: str) -> IngestionJob | None:
+        # Identical bytes are already being indexed: report that job instead of queueing another.
+        pending = self.jobs.find_by_hash(content_sha256, JOB_ACTIVE_STATUSES)
+        if pending is not None:
+            return pending
+
+        existing = self.repo.find_by_hash(content_sha256)
+        if existing is None:
+            return None
+
+        # Identical bytes are already indexed: skip parsing and embedding and point at that document.
+        job = IngestionJob(
+            id=str(uuid4()),
+            document_id=existing.id,
+            original_name=original_name,
+            stored_name=existing.stored_name,
+            file_type=existing.file_type,
+            size_bytes=existing.size_bytes,
+            content_sha256=content_sha256,
+            deduplicated=True,
+            status=JOB_DONE,
+            chunk_count=existing.chunk_count,
+            chunks_indexed=existing.chunk_count,
+        )
+        return self.jobs.upsert(job)
+
+    def get_job(self, job_id: str) -> IngestionJob | None:
+        return self.jobs.get(job_id)
+
+    def ingest(self, job: IngestionJob) -> Document:
+        # The caller has claimed the job (see IngestionQueue). Every job write checks the
+        # claim is still ours, so a worker whose lease was taken over stops instead of
+        # racing the new owner.
+        doc_id = job.document_id
+        ext = f".{job.file_type}"
+        owner = job.claimed_by
+
+        try:
+            self._hold(job, owner, status=JOB_PARSING, error=None)
+
+            # The same bytes may have been indexed while this job waited.
+            existing = self.repo.find_by_hash(job.content_sha256) if job.content_sha256 else None
+            if existing is not None and existing.id != doc_id:
+                return self._finish_as_duplicate(job, owner, existing)
+
+            content = self.storage.read_bytes(job.stored_name)
+            chunks = extract_chunks_in_pool(ext, content)
             if not chunks:
                 raise DocumentServiceError("No readable text found in this file.")
 
-            stored = self.storage.save_bytes(doc_id=doc_id, ext=ext, content=content)
-            self.vector_store.add_document_chunks(doc_id=doc_id, filename=original_name, chunks=chunks)
+            self._hold(job, owner, status=JOB_EMBEDDING, chunk_count=len(chunks), chunks_indexed=0)
 
-            from rag_core.db.models import Document
+            # A resumed job may have written part of its vectors before the restart.
+            self.vector_store.delete_document(doc_id)
+            self.vector_store.add_document_chunks(
+                doc_id=doc_id,
+                filename=job.original_name,
+                chunks=chunks,
+                on_progress=lambda written: self._hold(job, owner, chunks_indexed=written),
+            )
 
+            # The job finishes and the document appears in one transaction.
+            if not self.jobs.hold(
+                job, owner, settings.ingestion_lease_seconds, commit=False, status=JOB_DONE, chunks_indexed=len(chunks)
+            ):
+                raise JobLeaseLost(f"Ingestion job {job.id} was taken over by another worker.")
             document = Document(
                 id=doc_id,
-                original_name=original_name,
-                stored_name=stored.stored_name,
-                file_type=ext.replace(".", ""),
-                size_bytes=stored.size_bytes,
+                original_name=job.original_name,
+                stored_name=job.stored_name,
+                file_type=job.file_type,
+                size_bytes=job.size_bytes,
                 chunk_count=len(chunks),
+                content_sha256=job.content_sha256,
             )
-            return self.repo.upsert(document)
+            # Results cached while the row was missing are dropped once it commits.
+            bump_corpus_generation(self.db)
+            document = self.repo.upsert(document)
+            self.db.refresh(job)
+            return document
+        except JobLeaseLost:
+            # The new owner's run owns the stored file and the vectors now.
+            self.db.rollback()
+            raise
         except DocumentParseError as exc:
-            self.storage.delete(f"{doc_id}{ext}")
-            self.vector_store.delete_document(doc_id)
+            self._fail_job(job, owner, f"Unable to parse file: {exc}")
             raise DocumentServiceError(f"Unable to parse file: {exc}") from exc
         except DocumentStorageError as exc:
-            self.vector_store.delete_document(doc_id)
+            self._fail_job(job, owner, f"Storage error: {exc}")
             raise DocumentServiceError(f"Storage error: {exc}") from exc
-        except DocumentServiceError:
-            self.storage.delete(f"{doc_id}{ext}")
-            self.vector_store.delete_document(doc_id)
+        except DocumentServiceError as exc:
+            self._fail_job(job, owner, str(exc))
             raise
         except Exception as exc:
-            self.storage.delete(f"{doc_id}{ext}")
-            self.vector_store.delete_document(doc_id)
+            self._fail_job(job, owner, f"Failed to index file: {exc}")
             raise DocumentServiceError(f"Failed to index file: {exc}") from exc
 
-    async def replace(self, doc_id: str, upload_file: UploadFile):
-        row = self.repo.get(doc_id)
+    def _finish_as_duplicate(self, job: IngestionJob, owner: str | None, existing: Document) -> Document:
+        own_stored_name = job.stored_name
+        self._hold(
+            job,
+            owner,
+            status=JOB_DONE,
+            deduplicated=True,
+            document_id=existing.id,
+            stored_name=existing.stored_name,
+            chunk_count=existing.chunk_count,
+            chunks_indexed=existing.chunk_count,
+        )
+        self.storage.delete(own_stored_name)
+        return existing
+
+    def _hold(self, job: IngestionJob, owner: str | None, **values) -> None:
+        if not self.jobs.hold(job, owner, settings.ingestion_lease_seconds, **values):
+            raise JobLeaseLost(f"Ingestion job {job.id} was taken over by another worker.")
+
+    def _fail_job(self, job: IngestionJob, owner: str | None, reason: str) -> None:
+        self.db.rollback()
+        committed = self.repo.get(job.document_id)
+        if committed is not None:
+            # The document was indexed (by an earlier run of this job); its file and
+            # vectors are live and must stay.
+            self.jobs.hold(
+                job,
+                owner,
+                settings.ingestion_lease_seconds,
+                status=JOB_DONE,
+                chunk_count=committed.chunk_count,
+                chunks_indexed=committed.chunk_count,
+            )
+            return
+        if not self.jobs.hold(job, owner, settings.ingestion_lease_seconds, status=JOB_FAILED, error=reason):
+            return
+        self.storage.delete(job.stored_name)
+        self.vector_store.delete_document(job.document_id)
+
+    async def replace(self, doc_id: str, upload_file: UploadFile) -> tuple[Document, ReindexStats]:
+        row = await run_in_threadpool(self.repo.get, doc_id)
         if row is None:
             raise DocumentServiceError("Document not found.")
 
@@ -98,79 +296,116 @@ class DocumentService:
         if ext not in SUPPORTED_EXTENSIONS:
             raise DocumentServiceError(f"Unsupported file type '{ext}'.")
 
-        content = await upload_file.read()
+        content, content_sha256 = await self._read_upload(upload_file)
         if len(content) == 0:
             raise DocumentServiceError("Replacement file is empty.")
 
-        max_bytes = settings.max_upload_size_mb * 1024 * 1024
-        if len(content) > max_bytes:
-            raise DocumentServiceError(f"File exceeds {settings.max_upload_size_mb} MB limit.")
-
+        if row.content_sha256 == content_sha256 and row.file_type == ext.replace(".", ""):
+            # Same bytes as the indexed version: only the display name can change.
+            row.original_name = original_name
+            row = await run_in_threadpool(self.repo.upsert, row)
+            return row, ReindexStats(reused=row.chunk_count, added=0, removed=0)
+
+        return await run_in_threadpool(self._replace, row, original_name, ext, content, content_sha256)
+
+    def _replace(
+        self,
+        row: Document,
+        original_name: str,
+        ext: str,
+        content: bytes,
+        content_sha256: str,
+    ) -> tuple[Document, ReindexStats]:
+        doc_id = row.id
+        old_version = row.active_version
         old_stored_name = row.stored_name
-
-        old_bytes: bytes | None = None
-        try:
-            old_bytes = self.storage.read_bytes(old_stored_name)
-        except Exception:
-            old_bytes = None
+        new_version = old_version + 1
 
         new_stored_name: str | None = None
         try:
-            text = parse_document_bytes(ext, content)
-            chunks = chunk_text(text)
+            chunks = extract_chunks_in_pool(ext, content)
             if not chunks:
                 raise DocumentServiceError("No readable text found in replacement file.")
 
-            stored = self.storage.save_bytes(doc_id=doc_id, ext=ext, content=content)
+            # The new file and vectors sit beside the live version until the swap below.
+            stored = self.storage.save_bytes(doc_id=f"{doc_id}.v{new_version}", ext=ext, content=content)
             new_stored_name = stored.stored_name
-            self.vector_store.delete_document(doc_id)
-            self.vector_store.add_document_chunks(doc_id=doc_id, filename=original_name, chunks=chunks)
-
-            if old_stored_name != stored.stored_name:
-                self.storage.delete(old_stored_name)
+            stats = self.vector_store.write_version(
+                doc_id=doc_id,
+                version=new_version,
+                filename=original_name,
+                chunks=chunks,
+                base_version=old_version,
+            )
 
-            row.original_name = original_name
-            row.stored_name = stored.stored_name
-            row.file_type = ext.replace(".", "")
-            row.size_bytes = stored.size_bytes
-            row.chunk_count = len(chunks)
-            return self.repo.upsert(row)
+            swapped = self.repo.swap_version(
+                row,
+                expected_version=old_version,
+                active_version=new_version,
+                original_name=original_name,
+                stored_name=stored.stored_name,
+                file_type=ext.replace(".", ""),
+                size_bytes=stored.size_bytes,
+                chunk_count=len(chunks),
+                content_sha256=content_sha256,
+            )
+            if not swapped:
+                raise DocumentServiceError("Document was replaced concurrently. Try again.")
         except Exception as exc:
-            if new_stored_name and new_stored_name != old_stored_name:
+            self.db.rollback()
+            if new_stored_name:
                 self.storage.delete(new_stored_name)
-            try:
-                if old_bytes is not None:
-                    old_ext = Path(old_stored_name).suffix.lower()
-                    old_text = parse_document_bytes(old_ext, old_bytes)
-                    old_chunks = chunk_text(old_text)
-                    if old_chunks:
-                        self.vector_store.delete_document(doc_id)
-                        self.vector_store.add_document_chunks(
-                            doc_id=doc_id,
-                            filename=row.original_name,
-                            chunks=old_chunks,
-                        )
-                    self.storage.save_bytes(doc_id=doc_id, ext=old_ext, content=old_bytes)
-            except Exception:
-                pass
+            self.vector_store.delete_version(doc_id, new_version)
             raise DocumentServiceError(f"Failed to replace document: {exc}") from exc
 
+        self.storage.delete(old_stored_name)
+        self.vector_store.collect_stale_versions(doc_id, keep_version=new_version)
+        return row, stats
+
     def delete(self, doc_id: str) -> None:
         row = self.repo.get(doc_id)
         if row is None:
             raise DocumentServiceError("Document not found.")
 
-        self.vector_store.delete_document(doc_id)
-        self.storage.delete(row.stored_name)
+        self.vector_store.delete_document(doc_id, db=self.db)
         self.repo.delete(row)
+        self.storage.delete(row.stored_name)
 
     def total_documents(self) -> int:
-        return len(self.repo.list_documents())
-
-    def storage_stats(self) -> dict[str, int]:
-        docs = self.repo.list_documents()
-        total_size = sum(d.size_bytes for d in docs)
-        return {
-            "count": len(docs),
-            "bytes": total_size,
-        }
+        return sum(count for _file_type, count, _size, _chunks in self.repo.stats_by_type())
+
+    def storage_stats(self) -> dict:
+        return _stats_payload(self.repo.stats_by_type())
+
+
+class DocumentQueries:
+    # Read side of the file routes on the async engine, so listing, stats and job
+    # polling never wait on the database from a threadpool worker.
+    def __init__(self, db: AsyncSession) -> None:
+        self.repo = AsyncDocumentRepository(db)
+        self.jobs = AsyncIngestionJobRepository(db)
+
+    async def list_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        name: str | None = None,
+        file_type: str | None = None,
+    ) -> tuple[list[Document], str | None]:
+        # One page plus the cursor for the next, or None on the last page.
+        after = _decode_cursor(cursor) if cursor else None
+        file_type = file_type.strip().lower().lstrip(".") if file_type else None
+        rows = await self.repo.list_page(limit + 1, after=after, name=(name or "").strip() or None, file_type=file_type)
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, _encode_cursor(rows[-1])
+
+    async def get_document(self, doc_id: str) -> Document | None:
+        return await self.repo.get(doc_id)
+
+    async def get_job(self, job_id: str) -> IngestionJob | None:
+        return await self.jobs.get(job_id)
+
+    async def storage_stats(self) -> dict:
+        return _stats_payload(await self.repo.stats_by_type())
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+from rag_core.config import settings
+from rag_core.metrics import metrics
+from rag_core.text_chunker import hash_chunk
+
+
+# SQLite limits the number of bound parameters per statement.
+_SQL_BATCH = 500
+# Free pages are returned to the file system once an eviction frees this much.
+_VACUUM_AFTER_BYTES = 8 * 1024 * 1024
+
+
+class EmbeddingCache:
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        # Evicted rows only shrink the file with incremental vacuum, which must be enabled
+        # before the first table exists; a cache file created without it is converted once.
+        if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._conn.execute("VACUUM")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "namespace TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL, "
+                "PRIMARY KEY (namespace, text_hash))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+            # The total size lives in the file and is kept by triggers, so every process
+            # sharing the cache evicts against the same number.
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO cache_size (id, bytes) "
+                "SELECT 0, COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS embeddings_size_insert AFTER INSERT ON embeddings BEGIN "
+                "UPDATE cache_size SET bytes = bytes + LENGTH(NEW.vector) WHERE id = 0; END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS embeddings_size_update AFTER UPDATE OF vector ON embeddings BEGIN "
+                "UPDATE cache_size SET bytes = bytes + LENGTH(NEW.vector) - LENGTH(OLD.vector) WHERE id = 0; END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS embeddings_size_delete AFTER DELETE ON embeddings BEGIN "
+                "UPDATE cache_size SET bytes = bytes - LENGTH(OLD.vector) WHERE id = 0; END"
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def size(self) -> int:
+        with self._lock:
+            return self._size()
+
+    def _size(self) -> int:
+        return int(self._conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0])
+
+    def get_many(self, namespace: str, text_hashes: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            for start in range(0, len(text_hashes), _SQL_BATCH):
+                batch = text_hashes[start : start + _SQL_BATCH]
+                placeholders = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE namespace = ? AND text_hash IN ({placeholders})",
+                    [namespace, *batch],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[text_hash] = vector.tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE namespace = ? AND text_hash = ?",
+                    [(now, namespace, text_hash) for text_hash in found],
+                )
+
+        hits = sum(1 for text_hash in text_hashes if text_hash in found)
+        metrics.incr("embedding_cache.hits", hits)
+        metrics.incr("embedding_cache.misses", len(text_hashes) - hits)
+        return found
+
+    def put_many(self, namespace: str, vectors: dict[str, list[float]]) -> None:
+        if not vectors:
+            return
+        now = time.time()
+        rows = [(namespace, text_hash, array("f", vector).tobytes(), now) for text_hash, vector in vectors.items()]
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so concurrent writers in other
+            # processes evict one after another against the current total.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO embeddings (namespace, text_hash, vector, last_used) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (namespace, text_hash) DO UPDATE SET vector = excluded.vector, last_used = excluded.last_used",
+                    rows,
+                )
+                evicted = self._evict()
+                size = self._size()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if evicted >= _VACUUM_AFTER_BYTES:
+                # execute() steps the pragma once, which frees a single page; executescript runs it to the end.
+                self._conn.executescript("PRAGMA incremental_vacuum;")
+                metrics.incr("embedding_cache.vacuums")
+        metrics.set_gauge("embedding_cache.bytes", size)
+
+    def _evict(self) -> int:
+        # Least recently used vectors go first until the cache fits the size cap again.
+        # Returns the number of bytes freed.
+        evicted = 0
+        size = self._size()
+        while size > self.max_bytes:
+            victims = self._conn.execute(
+                "SELECT namespace, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT ?",
+                (_SQL_BATCH,),
+            ).fetchall()
+            if not victims:
+                break
+            doomed = []
+            for namespace, text_hash, length in victims:
+                doomed.append((namespace, text_hash))
+                size -= length
+                evicted += length
+                if size <= self.max_bytes:
+                    break
+            self._conn.executemany("DELETE FROM embeddings WHERE namespace = ? AND text_hash = ?", doomed)
+            metrics.incr("embedding_cache.evictions", len(doomed))
+        return evicted
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache, namespace: str) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.namespace = namespace
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes = [hash_chunk(text) for text in texts]
+        found = self.cache.get_many(self.namespace, list(dict.fromkeys(hashes)))
+
+        # Text repeated within the batch is embedded once.
+        missing: dict[str, str] = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in found:
+                missing.setdefault(text_hash, text)
+
+        if missing:
+            fresh = self.inner.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), fresh))
+            self.cache.put_many(self.namespace, computed)
+            found.update(computed)
+
+        return [found[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> list[float]:
+        # Some providers embed queries differently from documents, so queries bypass this cache.
+        return self.inner.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.inner.aembed_query(text)
+
+
+_cache: EmbeddingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    global _cache
+    if settings.embedding_cache_max_mb <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(settings.embedding_cache_file, settings.embedding_cache_max_mb * 1024 * 1024)
+        return _cache
+
+
+def with_embedding_cache(embeddings: Embeddings, namespace: str) -> Embeddings:
+    cache = get_embedding_cache()
+    if cache is None:
+        return embeddings
+    return CachedEmbeddings(embeddings, cache, namespace)
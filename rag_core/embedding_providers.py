@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from langchain_core.embeddings import Embeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from langchain_ollama import OllamaEmbeddings
+from langchain_openai import OpenAIEmbeddings
+
+from rag_core.config import settings
+from rag_core.embedding_cache import with_embedding_cache
+from rag_core.security import fingerprint_secret
+from rag_core.settings_service import SettingsService
+
+
+# A failed probe is remembered briefly so a dead provider is not hit on every request.
+PROBE_FAILURE_TTL_SECONDS = 30.0
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class EmbeddingProviderError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class EmbeddingProvider:
+    name: str
+    model: str
+    dimensions: int
+    embeddings: Embeddings
+
+    @property
+    def namespace(self) -> str:
+        return f"{self.name}:{self.model}:{self.dimensions}"
+
+
+class HashingEmbeddings(Embeddings):
+    # Deterministic feature hashing of word tokens. No network or model download, so
+    # tests and benchmarks get stable vectors; similarity is lexical only.
+    def __init__(self, dimensions: int = 384) -> None:
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for token in _TOKEN_RE.findall(text.casefold()):
+            value = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        norm = math.sqrt(sum(component * component for component in vector))
+        if not norm:
+            # Cosine distance is undefined for the zero vector.
+            vector[0] = 1.0
+            return vector
+        return [component / norm for component in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def _build_embeddings(name: str, settings_service: SettingsService) -> tuple[Embeddings, str, str]:
+    # Returns the embeddings, the model name and what identifies the endpoint/credentials.
+    if name == "openai":
+        api_key = settings_service.get_api_key("openai")
+        if not api_key:
+            raise EmbeddingProviderError("Embedding provider 'openai' needs an OpenAI API key saved in Settings.")
+        embeddings = OpenAIEmbeddings(
+            model=settings.openai_embedding_model,
+            api_key=api_key,
+            # EmbeddingScheduler owns retries and honours Retry-After across batches.
+            max_retries=0,
+        )
+        return embeddings, settings.openai_embedding_model, fingerprint_secret(api_key)
+
+    if name == "gemini":
+        api_key = settings_service.get_api_key("gemini")
+        if not api_key:
+            raise EmbeddingProviderError("Embedding provider 'gemini' needs a Gemini API key saved in Settings.")
+        embeddings = GoogleGenerativeAIEmbeddings(model=settings.gemini_embedding_model, google_api_key=api_key)
+        return embeddings, settings.gemini_embedding_model, fingerprint_secret(api_key)
+
+    if name == "ollama":
+        base_url = settings_service.get_effective_settings().ollama_base_url
+        embeddings = OllamaEmbeddings(model=settings.ollama_embedding_model, base_url=base_url)
+        return embeddings, settings.ollama_embedding_model, base_url
+
+    if name == "hashing":
+        dimensions = settings.hashing_embedding_dimensions
+        return HashingEmbeddings(dimensions), f"hashing-{dimensions}", ""
+
+    raise EmbeddingProviderError(f"Unsupported embedding provider '{name}'.")
+
+
+_probes: dict[tuple[str, str, str], tuple[int | None, float]] = {}
+_probes_lock = threading.Lock()
+
+
+def _probe_dimensions(key: tuple[str, str, str], embeddings: Embeddings) -> int:
+    with _probes_lock:
+        cached = _probes.get(key)
+    if cached is not None:
+        dimensions, checked_at = cached
+        if dimensions is not None:
+            return dimensions
+        if time.monotonic() - checked_at < PROBE_FAILURE_TTL_SECONDS:
+            raise EmbeddingProviderError(f"Embedding provider '{key[0]}' is unavailable.")
+
+    try:
+        dimensions = len(embeddings.embed_query("healthcheck"))
+    except Exception as exc:
+        with _probes_lock:
+            _probes[key] = (None, time.monotonic())
+        raise EmbeddingProviderError(f"Embedding provider '{key[0]}' is unavailable: {exc}") from exc
+
+    with _probes_lock:
+        _probes[key] = (dimensions, time.monotonic())
+    return dimensions
+
+
+def clear_probe_cache() -> None:
+    with _probes_lock:
+        _probes.clear()
+
+
+def select_embedding_provider(settings_service: SettingsService | None = None) -> EmbeddingProvider:
+    settings_service = settings_service or SettingsService()
+    name = settings_service.get_embedding_provider()
+    embeddings, model, identity = _build_embeddings(name, settings_service)
+    dimensions = _probe_dimensions((name, model, identity), embeddings)
+    provider = EmbeddingProvider(name=name, model=model, dimensions=dimensions, embeddings=embeddings)
+    if name == "hashing":
+        # Cheaper to recompute than to look up.
+        return provider
+    return EmbeddingProvider(
+        name=name,
+        model=model,
+        dimensions=dimensions,
+        embeddings=with_embedding_cache(embeddings, provider.namespace),
+    )
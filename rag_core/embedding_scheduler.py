@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import logging
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable
+
+import httpx
+from langchain_core.embeddings import Embeddings
+
+from rag_core.config import settings
+from rag_core.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class EmbeddingRunStats:
+    chunks: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+
+def _status_code(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return int(status) if isinstance(status, int) else None
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    # Provider SDKs wrap connection failures in their own exception types.
+    return type(exc).__name__ in {"APIConnectionError", "APITimeoutError", "RateLimitError"}
+
+
+class EmbeddingScheduler:
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ) -> None:
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size or settings.embedding_batch_size)
+        self.max_concurrency = max(1, max_concurrency or settings.embedding_concurrency)
+        self.max_retries = settings.embedding_max_retries if max_retries is None else max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _embed_batch(self, texts: list[str]) -> tuple[list[list[float]], int]:
+        # Runs on a pool thread; returns the vectors and how many retries they took, which
+        # the calling thread adds to the run's stats.
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+                metrics.observe("embedding.batch", time.perf_counter() - started)
+                return vectors, attempt
+            except Exception as exc:
+                if attempt >= self.max_retries or not _is_retryable(exc):
+                    raise
+                attempt += 1
+                retry_after = _retry_after(exc)
+                if retry_after is not None:
+                    delay = min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+                else:
+                    delay = random.uniform(0.5, 1.0) * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                metrics.incr("embedding.retries")
+                logger.warning("Embedding batch failed (%s); retry %d in %.1fs.", exc, attempt, delay)
+                time.sleep(delay)
+
+    def run(self, texts: list[str], on_batch: Callable[[int, list[list[float]]], None]) -> EmbeddingRunStats:
+        # Batches are embedded concurrently, and on_batch(offset, vectors) runs in the
+        # calling thread as each one finishes, so writes stay serialized.
+        stats = EmbeddingRunStats()
+        if not texts:
+            return stats
+
+        started = time.perf_counter()
+        offsets = list(range(0, len(texts), self.batch_size))
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(offsets)), thread_name_prefix="embed") as pool:
+            pending = {
+                pool.submit(self._embed_batch, texts[offset : offset + self.batch_size]): offset
+                for offset in offsets
+            }
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        offset = pending.pop(future)
+                        vectors, retries = future.result()
+                        on_batch(offset, vectors)
+                        stats.chunks += len(vectors)
+                        stats.batches += 1
+                        stats.retries += retries
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+
+        stats.seconds = time.perf_counter() - started
+        metrics.incr("embedding.chunks", stats.chunks)
+        metrics.incr("embedding.batches", stats.batches)
+        metrics.set_gauge("embedding.chunks_per_second", stats.chunks_per_second)
+        return stats
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from rag_core.config import settings
+from rag_core.document_parser import parse_document_pages
+from rag_core.pdf_extractor import extract_pdf_pages
+from rag_core.text_chunker import TextChunk, chunk_pages
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+# Each pool's workers report their PIDs here as they start, so a recycled pool's busy
+# workers can be stopped without reaching into the executor.
+_worker_pids: weakref.WeakKeyDictionary[ProcessPoolExecutor, multiprocessing.SimpleQueue] = weakref.WeakKeyDictionary()
+
+
+def extract_chunks(ext: str, content: bytes) -> list[TextChunk]:
+    return chunk_pages(parse_document_pages(ext, content))
+
+
+def _report_pid(pids: multiprocessing.SimpleQueue) -> None:
+    pids.put(os.getpid())
+
+
+def create_process_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    # "spawn" keeps workers independent of the server's threads and open sockets.
+    context = multiprocessing.get_context("spawn")
+    pids = context.SimpleQueue()
+    pool = ProcessPoolExecutor(
+        max_workers=max(1, max_workers or settings.parser_processes),
+        mp_context=context,
+        initializer=_report_pid,
+        initargs=(pids,),
+    )
+    _worker_pids[pool] = pids
+    return pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = create_process_pool()
+        return _pool
+
+
+def _extract_in(pool: ProcessPoolExecutor, ext: str, content: bytes) -> list[TextChunk]:
+    if ext.lower() == ".pdf":
+        pages = extract_pdf_pages(content, pool, on_abandoned=lambda: recycle_process_pool(pool))
+        # The pool may have just been recycled by the timeout above.
+        return get_process_pool().submit(chunk_pages, pages).result()
+    return pool.submit(extract_chunks, ext, content).result()
+
+
+def extract_chunks_in_pool(ext: str, content: bytes) -> list[TextChunk]:
+    pool = get_process_pool()
+    try:
+        return _extract_in(pool, ext, content)
+    except BrokenProcessPool:
+        # A crashed worker, or a pool recycled for another document, poisons the pool;
+        # retry once on a fresh one.
+        if _discard_pool(pool):
+            pool.shutdown(wait=False, cancel_futures=True)
+    return _extract_in(get_process_pool(), ext, content)
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> bool:
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return False
+        _pool = None
+    return True
+
+
+def recycle_process_pool(pool: ProcessPoolExecutor) -> None:
+    # Page ranges abandoned by a document timeout keep running and hold their workers,
+    # so the pool is replaced and its workers are killed. The next document starts a
+    # fresh pool; work other documents still had queued on this one fails with
+    # BrokenProcessPool and is retried there.
+    _discard_pool(pool)
+    pids = _worker_pids.pop(pool, None)
+    pool.shutdown(wait=False, cancel_futures=False)
+    if pids is None:
+        return
+    while not pids.empty():
+        try:
+            os.kill(pids.get(), signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
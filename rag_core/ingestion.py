@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from rag_core.config import settings
+from rag_core.db.session import SessionLocal
+from rag_core.document_service import (
+    JOB_ACTIVE_STATUSES,
+    DocumentService,
+    DocumentServiceError,
+    JobLeaseLost,
+)
+from rag_core.repositories import IngestionJobRepository
+from rag_core.storage import DocumentStorage
+from rag_core.vector_store import VectorStore
+
+
+logger = logging.getLogger(__name__)
+
+# How often unclaimed and abandoned jobs are picked up, e.g. after a worker crashed.
+SWEEP_INTERVAL_SECONDS = 60.0
+
+
+class IngestionQueue:
+    # Runs ingestion jobs on a bounded thread pool. Every server process has one, and
+    # a job runs only in the worker that claims it in the database, so restarts and
+    # other processes resuming the same jobs never ingest one twice.
+    def __init__(self, vector_store: VectorStore, storage: DocumentStorage, max_workers: int | None = None) -> None:
+        self.vector_store = vector_store
+        self.storage = storage
+        self.max_workers = max(1, max_workers or settings.ingestion_workers)
+        self.owner = f"{socket.gethostname()[:80]}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        # Jobs waiting in or running on this process's pool, so a sweep does not queue them twice.
+        self._pending: set[str] = set()
+        self._stop = threading.Event()
+        self._sweeper: threading.Thread | None = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest")
+            return self._executor
+
+    def submit(self, job_id: str) -> None:
+        with self._lock:
+            if job_id in self._pending:
+                return
+            self._pending.add(job_id)
+        self._get_executor().submit(self._run, job_id)
+
+    def resume_pending(self) -> int:
+        # Jobs interrupted by a restart are re-run from the bytes already in storage. A
+        # job another live worker holds is left alone until its lease runs out.
+        with SessionLocal() as db:
+            job_ids = IngestionJobRepository(db).list_claimable(JOB_ACTIVE_STATUSES)
+        for job_id in job_ids:
+            self.submit(job_id)
+        return len(job_ids)
+
+    def start(self) -> None:
+        self.resume_pending()
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=self._sweep, name="ingest-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _sweep(self) -> None:
+        while not self._stop.wait(SWEEP_INTERVAL_SECONDS):
+            try:
+                self.resume_pending()
+            except Exception:
+                logger.exception("Ingestion job sweep failed")
+
+    def _run(self, job_id: str) -> None:
+        try:
+            with SessionLocal() as db:
+                job = IngestionJobRepository(db).claim(
+                    job_id, self.owner, settings.ingestion_lease_seconds, JOB_ACTIVE_STATUSES
+                )
+                if job is None:
+                    # Finished, or another worker is running it.
+                    return
+                service = DocumentService(db, self.vector_store, self.storage)
+                try:
+                    service.ingest(job)
+                except JobLeaseLost as exc:
+                    logger.warning("Ingestion job %s stopped: %s", job_id, exc)
+                except DocumentServiceError as exc:
+                    logger.warning("Ingestion job %s failed: %s", job_id, exc)
+                except Exception:
+                    logger.exception("Ingestion job %s crashed", job_id)
+        finally:
+            with self._lock:
+                self._pending.discard(job_id)
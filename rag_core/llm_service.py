@@ -1,8 +1,15 @@
 from __future__ import annotations
 
-from typing import Generator
+import importlib.util
+import threading
+import time
+from functools import cached_property
+from typing import Any, AsyncGenerator, Generator
 
+import anthropic
 import httpx
+from google import genai
+from google.genai.types import HttpOptions
 from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -10,9 +17,29 @@ from langchain_groq import ChatGroq
 from langchain_ollama import ChatOllama
 from langchain_openai import ChatOpenAI
 
+from rag_core.cache import TTLCache
+from rag_core.config import settings as app_settings
+from rag_core.metrics import metrics
+from rag_core.security import fingerprint_secret
 from rag_core.settings_service import EffectiveSettings
 
 
+# httpx only negotiates HTTP/2 (over TLS, via ALPN) when the optional h2 package is present.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Reusing the model object keeps its connections (and TLS sessions) warm between
+# requests. Entries idle past the TTL are rebuilt; settings and API key changes clear
+# the cache outright.
+_clients = TTLCache(app_settings.llm_client_cache_size, app_settings.llm_client_idle_seconds)
+# The connection pools behind those models belong to the process, not to each model:
+# every model's httpx clients wrap the same transports, so a model dropped from the
+# cache never strands open connections, even while an answer it started is still
+# streaming. Closed at shutdown.
+_transports: tuple[httpx.HTTPTransport, httpx.AsyncHTTPTransport] | None = None
+_anthropic_clients: tuple[Any, Any] | None = None
+_transports_lock = threading.Lock()
+
+
 class LLMServiceError(Exception):
     pass
 
@@ -48,25 +75,154 @@ def _chunk_text(chunk: object) -> str:
     return ""
 
 
+def clear_client_cache() -> None:
+    _clients.clear()
+    metrics.set_gauge("llm.client_cache.size", 0)
+
+
+def _client_key(settings: EffectiveSettings, api_key: str | None) -> tuple[str, str, str, float, str]:
+    base_url = settings.ollama_base_url if settings.provider == "ollama" else ""
+    fingerprint = fingerprint_secret(api_key) if api_key else ""
+    return (settings.provider, settings.model, base_url, settings.temperature, fingerprint)
+
+
+def _shared_transports() -> tuple[httpx.HTTPTransport, httpx.AsyncHTTPTransport]:
+    global _transports
+    with _transports_lock:
+        if _transports is None:
+            limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+            _transports = (
+                httpx.HTTPTransport(http2=HTTP2_AVAILABLE, limits=limits),
+                httpx.AsyncHTTPTransport(http2=HTTP2_AVAILABLE, limits=limits),
+            )
+        return _transports
+
+
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+
+def _http_client() -> httpx.Client:
+    return httpx.Client(transport=_shared_transports()[0], timeout=HTTP_TIMEOUT)
+
+
+def _http_async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=_shared_transports()[1], timeout=HTTP_TIMEOUT)
+
+
+def _http_clients() -> dict[str, Any]:
+    return {"http_client": _http_client(), "http_async_client": _http_async_client()}
+
+
+def _anthropic_http_clients() -> tuple[anthropic.DefaultHttpxClient, anthropic.DefaultAsyncHttpxClient]:
+    # Newer Anthropic SDKs bring their own HTTP package and reject httpx clients, so its
+    # models share one pair of the SDK's own clients per process instead.
+    global _anthropic_clients
+    with _transports_lock:
+        if _anthropic_clients is None:
+            _anthropic_clients = (anthropic.DefaultHttpxClient(), anthropic.DefaultAsyncHttpxClient())
+        return _anthropic_clients
+
+
+class _PooledChatAnthropic(ChatAnthropic):
+    # ChatAnthropic takes no HTTP client of its own, so the SDK clients are built here,
+    # from the model's public fields, on the process-wide pools.
+    def _sdk_params(self) -> dict[str, Any]:
+        params: dict[str, Any] = {
+            "api_key": self.anthropic_api_key.get_secret_value(),
+            "base_url": self.anthropic_api_url,
+            "max_retries": self.max_retries,
+            "default_headers": self.default_headers,
+        }
+        if self.default_request_timeout is None or self.default_request_timeout > 0:
+            params["timeout"] = self.default_request_timeout
+        return params
+
+    @cached_property
+    def _client(self) -> anthropic.Client:
+        return anthropic.Client(**self._sdk_params(), http_client=_anthropic_http_clients()[0])
+
+    @cached_property
+    def _async_client(self) -> anthropic.AsyncClient:
+        return anthropic.AsyncClient(**self._sdk_params(), http_client=_anthropic_http_clients()[1])
+
+
+def _gemini_client(api_key: str) -> genai.Client:
+    # The SDK leaves clients it was handed open, so collecting a model never closes the
+    # shared transports.
+    return genai.Client(
+        api_key=api_key,
+        http_options=HttpOptions(httpx_client=_http_client(), httpx_async_client=_http_async_client()),
+    )
+
+
+def _ollama_client_kwargs() -> dict[str, Any]:
+    # The Ollama client builds its own httpx clients; handing it the transports is enough.
+    transport, async_transport = _shared_transports()
+    return {"sync_client_kwargs": {"transport": transport}, "async_client_kwargs": {"transport": async_transport}}
+
+
+async def aclose_http_clients() -> None:
+    global _transports, _anthropic_clients
+    clear_client_cache()
+    with _transports_lock:
+        transports, _transports = _transports, None
+        anthropic_clients, _anthropic_clients = _anthropic_clients, None
+    if transports is not None:
+        transports[0].close()
+        await transports[1].aclose()
+    if anthropic_clients is not None:
+        anthropic_clients[0].close()
+        await anthropic_clients[1].aclose()
+
+
+def _record_ttft(started: float, warm: bool) -> None:
+    # New and reused clients are kept apart, so their distributions can be compared.
+    metrics.histogram("llm.ttft.warm" if warm else "llm.ttft.cold", time.perf_counter() - started)
+
+
 class LLMService:
+    def _get_model(self, settings: EffectiveSettings, api_key: str | None) -> tuple[Any, bool]:
+        # Returns the model and whether it came from the cache (its connections may be warm).
+        key = _client_key(settings, api_key)
+        model = _clients.get(key)
+        if model is not None:
+            metrics.incr("llm.client_cache.hits")
+            # Re-set to restart the idle timer.
+            _clients.set(key, model)
+            return model, True
+        metrics.incr("llm.client_cache.misses")
+        model = self._build_model(settings=settings, api_key=api_key)
+        _clients.set(key, model)
+        metrics.set_gauge("llm.client_cache.size", len(_clients))
+        return model, False
+
     def _build_model(self, settings: EffectiveSettings, api_key: str | None):
         provider = settings.provider
         common = {"model": settings.model, "temperature": settings.temperature}
 
         if provider == "ollama":
-            return ChatOllama(**common, base_url=settings.ollama_base_url)
+            # Load the model with the context size the prompt builder budgets for.
+            return ChatOllama(
+                **common,
+                base_url=settings.ollama_base_url,
+                num_ctx=app_settings.ollama_num_ctx,
+                **_ollama_client_kwargs(),
+            )
 
         if not api_key:
             raise LLMServiceError(f"API key missing for provider '{provider}'.")
 
         if provider == "openai":
-            return ChatOpenAI(**common, api_key=api_key)
+            return ChatOpenAI(**common, api_key=api_key, **_http_clients())
         if provider == "anthropic":
-            return ChatAnthropic(**common, anthropic_api_key=api_key)
+            return _PooledChatAnthropic(**common, anthropic_api_key=api_key)
         if provider == "gemini":
-            return ChatGoogleGenerativeAI(**common, google_api_key=api_key)
+            model = ChatGoogleGenerativeAI(**common, google_api_key=api_key)
+            # It always builds its own google-genai client; swap in one on the shared pools.
+            model.client = _gemini_client(api_key)
+            return model
         if provider == "groq":
-            return ChatGroq(**common, groq_api_key=api_key)
+            return ChatGroq(**common, groq_api_key=api_key, **_http_clients())
 
         raise LLMServiceError(f"Unsupported provider '{provider}'.")
 
@@ -77,12 +233,43 @@ class LLMService:
         messages: list[dict[str, str]],
     ) -> Generator[str, None, None]:
         lc_messages = _to_langchain_messages(messages)
-        model = self._build_model(settings=settings, api_key=api_key)
+        model, warm = self._get_model(settings=settings, api_key=api_key)
+        started = time.perf_counter()
+        first = True
 
         try:
             for chunk in model.stream(lc_messages):
                 text = _chunk_text(chunk)
                 if text:
+                    if first:
+                        _record_ttft(started, warm)
+                        first = False
+                    yield text
+        except httpx.ConnectError as exc:
+            raise LLMServiceError(
+                "Could not connect to Ollama server. Make sure Ollama is running and reachable."
+            ) from exc
+        except Exception as exc:
+            raise LLMServiceError(str(exc)) from exc
+
+    async def astream_completion(
+        self,
+        settings: EffectiveSettings,
+        api_key: str | None,
+        messages: list[dict[str, str]],
+    ) -> AsyncGenerator[str, None]:
+        lc_messages = _to_langchain_messages(messages)
+        model, warm = self._get_model(settings=settings, api_key=api_key)
+        started = time.perf_counter()
+        first = True
+
+        try:
+            async for chunk in model.astream(lc_messages):
+                text = _chunk_text(chunk)
+                if text:
+                    if first:
+                        _record_ttft(started, warm)
+                        first = False
                     yield text
         except httpx.ConnectError as exc:
             raise LLMServiceError(
@@ -91,3 +278,20 @@ class LLMService:
         except Exception as exc:
             raise LLMServiceError(str(exc)) from exc
 
+    async def acomplete(
+        self,
+        settings: EffectiveSettings,
+        api_key: str | None,
+        messages: list[dict[str, str]],
+    ) -> str:
+        lc_messages = _to_langchain_messages(messages)
+        model, _ = self._get_model(settings=settings, api_key=api_key)
+
+        try:
+            return _chunk_text(await model.ainvoke(lc_messages))
+        except httpx.ConnectError as exc:
+            raise LLMServiceError(
+                "Could not connect to Ollama server. Make sure Ollama is running and reachable."
+            ) from exc
+        except Exception as exc:
+            raise LLMServiceError(str(exc)) from exc
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+
+# Upper bounds, in seconds, of the latency histogram buckets; the last bucket is open.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = defaultdict(float)
+        self._gauges: dict[str, float] = {}
+        self._timings: dict[str, list[float]] = {}
+        self._histograms: dict[str, list[int]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            count, total, peak = self._timings.get(name, (0, 0.0, 0.0))
+            self._timings[name] = [count + 1, total + seconds, max(peak, seconds)]
+
+    def histogram(self, name: str, seconds: float) -> None:
+        with self._lock:
+            counts = self._histograms.setdefault(name, [0] * (len(LATENCY_BUCKETS) + 1))
+            counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0.0)
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": {
+                    name: {"count": count, "avg_ms": (total / count) * 1000 if count else 0.0, "max_ms": peak * 1000}
+                    for name, (count, total, peak) in self._timings.items()
+                },
+                "histograms": {name: _cumulative(counts) for name, counts in self._histograms.items()},
+            }
+
+
+def _cumulative(counts: list[int]) -> dict[str, int]:
+    # Prometheus-style: each bucket counts every observation at or below its bound.
+    buckets: dict[str, int] = {}
+    total = 0
+    for bound, count in zip([*LATENCY_BUCKETS, None], counts):
+        total += count
+        buckets["le_inf" if bound is None else f"le_{bound * 1000:g}ms"] = total
+    return buckets
+
+
+metrics = Metrics()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from rag_core.cache import TTLCache
+from rag_core.config import settings
+from rag_core.metrics import metrics
+from rag_core.security import fingerprint_secret
+
+
+logger = logging.getLogger(__name__)
+
+GROQ_MODELS_URL = "https://api.groq.com/openai/v1/models"
+# Providers whose model list is fetched live; the rest use the static catalog.
+DISCOVERABLE_PROVIDERS = {"ollama", "groq"}
+# A failed lookup is remembered briefly so a dead endpoint is not hit on every page load.
+FAILURE_TTL_SECONDS = 30.0
+UPSTREAM_TIMEOUTS = {"ollama": 8.0, "groq": 10.0}
+
+
+@dataclass(frozen=True)
+class _Entry:
+    # models is None when the last lookup failed and nothing better was known.
+    models: list[str] | None
+    fetched_at: float
+    ttl_seconds: float
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() - self.fetched_at >= self.ttl_seconds
+
+
+class ModelCatalog:
+    # Model lists discovered from provider APIs, cached per (provider, endpoint,
+    # credentials). A fresh entry is served from memory; a stale one is still served
+    # while a single background refresh runs, and concurrent misses share one upstream
+    # call. Lives on the app's event loop (see app.main).
+    def __init__(self) -> None:
+        self.ttl_seconds = settings.model_catalog_ttl_seconds
+        self._entries = TTLCache(max_entries=64, ttl_seconds=settings.model_catalog_max_stale_seconds)
+        self._inflight: dict[tuple[str, str, str], asyncio.Task[list[str] | None]] = {}
+        self._client = httpx.AsyncClient(limits=httpx.Limits(max_connections=16, max_keepalive_connections=4))
+
+    async def models(self, provider: str, base_url: str | None = None, api_key: str | None = None) -> list[str] | None:
+        # The provider's models, or None when they cannot be discovered; callers fall
+        # back to the static catalog.
+        if provider not in DISCOVERABLE_PROVIDERS:
+            return None
+        if provider == "groq" and not api_key:
+            return None
+        key = self._key(provider, base_url, api_key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.stale:
+                metrics.incr("model_catalog.stale_served")
+                self._refresh(key, api_key)
+            else:
+                metrics.incr("model_catalog.hits")
+            return entry.models
+        metrics.incr("model_catalog.misses")
+        # Shielded: a page load that goes away must not cancel a lookup others share.
+        return await asyncio.shield(self._refresh(key, api_key))
+
+    async def aclose(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        await self._client.aclose()
+
+    def _key(self, provider: str, base_url: str | None, api_key: str | None) -> tuple[str, str, str]:
+        if provider == "ollama":
+            return (provider, (base_url or settings.ollama_base_url).rstrip("/"), "")
+        return (provider, "", fingerprint_secret(api_key or ""))
+
+    def _refresh(self, key: tuple[str, str, str], api_key: str | None) -> asyncio.Task[list[str] | None]:
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.incr("model_catalog.coalesced")
+            return task
+        task = asyncio.create_task(self._fetch(key, api_key))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _task: self._inflight.pop(key, None))
+        return task
+
+    async def _fetch(self, key: tuple[str, str, str], api_key: str | None) -> list[str] | None:
+        provider, endpoint, _identity = key
+        started = time.perf_counter()
+        metrics.incr("model_catalog.upstream_calls")
+        try:
+            if provider == "ollama":
+                response = await self._client.get(f"{endpoint}/api/tags", timeout=UPSTREAM_TIMEOUTS[provider])
+                response.raise_for_status()
+                items = response.json().get("models", [])
+                models = [item.get("name") for item in items if item.get("name")]
+            else:
+                response = await self._client.get(
+                    GROQ_MODELS_URL,
+                    headers={"Authorization": f"Bearer {api_key}"},
+                    timeout=UPSTREAM_TIMEOUTS[provider],
+                )
+                response.raise_for_status()
+                models = sorted({item.get("id", "") for item in response.json().get("data", []) if item.get("id")})
+        except Exception as exc:
+            logger.info("Model list lookup for %s failed: %s", provider, exc)
+            metrics.incr("model_catalog.failures")
+            previous = self._entries.get(key)
+            # Keep serving the last good list; retry once the failure window passes.
+            known = previous.models if previous is not None else None
+            self._entries.set(key, _Entry(models=known, fetched_at=time.monotonic(), ttl_seconds=FAILURE_TTL_SECONDS))
+            return known
+        finally:
+            metrics.observe("model_catalog.fetch", time.perf_counter() - started)
+        self._entries.set(key, _Entry(models=models, fetched_at=time.monotonic(), ttl_seconds=self.ttl_seconds))
+        return models
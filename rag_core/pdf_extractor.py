@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import tempfile
+import threading
+from concurrent.futures import Executor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Callable
+
+from pypdf import PdfReader
+
+from rag_core.config import settings
+from rag_core.document_parser import DocumentParseError, PageText
+
+
+logger = logging.getLogger(__name__)
+
+
+class PageTimeoutError(Exception):
+    pass
+
+
+@contextmanager
+def _page_time_limit(seconds: float):
+    # SIGALRM only exists on Unix and only fires in the main thread, which is where
+    # process-pool workers run their tasks. Elsewhere the document budget still applies.
+    if seconds <= 0 or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def _on_alarm(signum, frame):
+        raise PageTimeoutError(f"Page extraction exceeded {seconds}s.")
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_page_range(path: str, start: int, stop: int, page_timeout: float) -> list[tuple[int, str | None]]:
+    reader: PdfReader | None = None
+    results: list[tuple[int, str | None]] = []
+    for index in range(start, stop):
+        try:
+            with _page_time_limit(page_timeout):
+                if reader is None:
+                    reader = PdfReader(path)
+                text = reader.pages[index].extract_text() or ""
+        except Exception:
+            # A slow or broken page is skipped instead of failing the whole document. An
+            # interrupted page can leave the reader half-parsed, so the next page reopens
+            # it; if that fails too, only that page is lost.
+            text = None
+            reader = None
+        results.append((index + 1, text))
+    return results
+
+
+def extract_pdf_pages(
+    content: bytes,
+    pool: Executor,
+    page_timeout: float | None = None,
+    document_timeout: float | None = None,
+    pages_per_task: int = 16,
+    on_abandoned: Callable[[], None] | None = None,
+) -> list[PageText]:
+    # on_abandoned is called when the document budget runs out while page ranges are
+    # still running, so the caller can reclaim the workers they hold.
+    page_timeout = settings.pdf_page_timeout_seconds if page_timeout is None else page_timeout
+    document_timeout = settings.pdf_document_timeout_seconds if document_timeout is None else document_timeout
+
+    try:
+        page_count = len(PdfReader(BytesIO(content)).pages)
+    except Exception as exc:
+        raise DocumentParseError(str(exc)) from exc
+    if page_count == 0:
+        return []
+
+    # Workers read the PDF from disk rather than receiving a pickled copy per task.
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    texts: dict[int, str] = {}
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(content)
+
+        futures = [
+            pool.submit(extract_page_range, path, start, min(start + pages_per_task, page_count), page_timeout)
+            for start in range(0, page_count, pages_per_task)
+        ]
+        done, not_done = wait(futures, timeout=document_timeout or None)
+        running = [future for future in not_done if not future.cancel()]
+        if running and on_abandoned is not None:
+            on_abandoned()
+
+        for future in done:
+            try:
+                results = future.result()
+            except BrokenProcessPool:
+                # The pool went away under this document; the caller retries it whole.
+                raise
+            except Exception:
+                continue
+            for number, text in results:
+                if text is not None:
+                    texts[number] = text
+    finally:
+        os.unlink(path)
+
+    skipped = page_count - len(texts)
+    if skipped:
+        logger.warning("Skipped %d of %d PDF pages that failed or exceeded the time budget.", skipped, page_count)
+    return [PageText(number=number, text=texts[number]) for number in sorted(texts)]
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass
+
+from rag_core.config import settings
+
+
+# Role markers and separators each chat message adds on top of its content.
+MESSAGE_OVERHEAD_TOKENS = 4
+# Context shorter than this is not worth sending as a truncated chunk.
+MIN_CHUNK_TOKENS = 32
+SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+
+
+def estimate_tokens(text: str) -> int:
+    # Providers use different tokenizers and exact ones need a download, so estimate on
+    # the high side: about four characters or three quarters of a word per token.
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 4 / 3))
+
+
+def _message_tokens(content: str) -> int:
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _format_hit(index: int, hit: dict) -> str:
+    source = f"File: {hit['filename']}"
+    if hit.get("page"):
+        source += f", page {hit['page']}"
+    return f"[{index}] {source}\n{hit['text']}"
+
+
+def _truncate(text: str, tokens: int) -> str:
+    text = text[: max(tokens, 0) * 4]
+    # Short words estimate above four characters per token; shrink until it fits.
+    while text and estimate_tokens(text) > tokens:
+        text = text[: int(len(text) * tokens / estimate_tokens(text))]
+    return text.rstrip()
+
+
+@dataclass(frozen=True)
+class PromptUsage:
+    context_window: int
+    budget_tokens: int
+    system_tokens: int
+    context_tokens: int
+    summary_tokens: int
+    history_tokens: int
+    question_tokens: int
+    prompt_tokens: int
+    chunks_used: int
+    chunks_dropped: int
+    turns_used: int
+    turns_dropped: int
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+def prompt_budget(context_window: int) -> int:
+    # Leave room for the answer, and cap the prompt so prefill time stays bounded even
+    # on models with very large windows.
+    budget = context_window - settings.prompt_output_reserve_tokens
+    if settings.prompt_max_tokens > 0:
+        budget = min(budget, settings.prompt_max_tokens)
+    return max(budget, 0)
+
+
+def build_prompt(
+    system_prompt: str,
+    message: str,
+    history: list[dict[str, str]],
+    hits: list[dict],
+    context_window: int,
+    summary: str | None = None,
+) -> tuple[list[dict[str, str]], PromptUsage]:
+    budget = prompt_budget(context_window)
+    system_tokens = _message_tokens(system_prompt)
+    question_tokens = _message_tokens(message)
+    header = "Use this retrieved context:\n\n"
+    available = max(budget - system_tokens - question_tokens - _message_tokens(header), 0)
+
+    turns = [
+        {"role": item.get("role"), "content": item.get("content", "")}
+        for item in history
+        if item.get("role") in {"user", "assistant"} and item.get("content")
+    ]
+    history_share = min(max(settings.prompt_history_share, 0.0), 1.0)
+    # Context gets first claim on the budget unless the conversation has no history.
+    history_budget = int(available * history_share) if turns or summary else 0
+    context_budget = available - history_budget
+
+    # Highest-scoring chunks first; the rest are dropped once the budget runs out.
+    ranked = sorted(hits, key=lambda hit: hit.get("score", 0.0), reverse=True)
+    blocks: list[str] = []
+    context_tokens = 0
+    for hit in ranked:
+        block = _format_hit(len(blocks) + 1, hit)
+        tokens = estimate_tokens(block) + 2
+        if context_tokens + tokens > context_budget:
+            remaining = context_budget - context_tokens
+            if not blocks and remaining >= MIN_CHUNK_TOKENS:
+                # The best chunk alone is too long: send what fits rather than nothing.
+                block = _truncate(block, remaining - 2)
+                blocks.append(block)
+                context_tokens += estimate_tokens(block) + 2
+            break
+        blocks.append(block)
+        context_tokens += tokens
+
+    # Unused context budget goes to history; the summary of older turns comes first and
+    # the oldest verbatim turns are dropped first.
+    history_budget = available - context_tokens
+    summary_message: list[dict[str, str]] = []
+    summary_tokens = 0
+    if summary:
+        summary_content = f"{SUMMARY_HEADER}{summary}"
+        if _message_tokens(summary_content) > history_budget:
+            summary_content = _truncate(summary_content, history_budget - MESSAGE_OVERHEAD_TOKENS)
+        if summary_content:
+            summary_message = [{"role": "system", "content": summary_content}]
+            summary_tokens = _message_tokens(summary_content)
+            history_budget -= summary_tokens
+    kept_turns: list[dict[str, str]] = []
+    history_tokens = 0
+    for turn in reversed(turns):
+        tokens = _message_tokens(turn["content"])
+        if history_tokens + tokens > history_budget:
+            break
+        kept_turns.append(turn)
+        history_tokens += tokens
+    kept_turns.reverse()
+
+    context_text = "\n\n".join(blocks)
+    messages: list[dict[str, str]] = [
+        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": f"{header}{context_text}"},
+        *summary_message,
+        *kept_turns,
+        {"role": "user", "content": message},
+    ]
+    context_message_tokens = _message_tokens(messages[1]["content"])
+    usage = PromptUsage(
+        context_window=context_window,
+        budget_tokens=budget,
+        system_tokens=system_tokens,
+        context_tokens=context_message_tokens,
+        summary_tokens=summary_tokens,
+        history_tokens=history_tokens,
+        question_tokens=question_tokens,
+        prompt_tokens=system_tokens + context_message_tokens + summary_tokens + history_tokens + question_tokens,
+        chunks_used=len(blocks),
+        chunks_dropped=len(hits) - len(blocks),
+        turns_used=len(kept_turns),
+        turns_dropped=len(turns) - len(kept_turns),
+    )
+    return messages, usage
@@ -1,53 +1,47 @@
 from __future__ import annotations
 
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from rag_core.llm_service import LLMService, LLMServiceError
-from rag_core.settings_service import SettingsService
+from rag_core.metrics import metrics
+from rag_core.prompt_builder import PromptUsage, build_prompt
+from rag_core.settings_service import EffectiveSettings, SettingsService, get_context_window
 from rag_core.vector_store import VectorStore, VectorStoreError
 
 
+NO_SOURCES_MESSAGE = (
+    "I do not have any sources connected yet. "
+    "Please add your documents in Data Management so I can answer using your content."
+)
+SOURCES_UNAVAILABLE_MESSAGE = (
+    "I could not access your knowledge sources right now. "
+    "Please try again in a moment."
+)
+NO_HITS_MESSAGE = (
+    "I could not find relevant information in your connected sources for that question. "
+    "Please try a more specific query or tell me which document or section to use."
+)
+
+
 class RagService:
     def __init__(self, vector_store: VectorStore) -> None:
         self.settings_service = SettingsService()
         self.vector_store = vector_store
         self.llm_service = LLMService()
-
-    def stream_answer(self, message: str, history: list[dict[str, str]]) -> Generator[str, None, None]:
-        if self.vector_store.is_empty():
-            fallback = (
-                "I do not have any sources connected yet. "
-                "Please add your documents in Data Management so I can answer using your content."
-            )
-            for token in fallback.split(" "):
-                yield token + " "
-            return
-
-        try:
-            hits = self.vector_store.retrieve(query=message, limit=6)
-        except VectorStoreError:
-            fallback = (
-                "I could not access your knowledge sources right now. "
-                "Please try again in a moment."
-            )
-            for token in fallback.split(" "):
-                yield token + " "
-            return
-        if not hits:
-            fallback = (
-                "I could not find relevant information in your connected sources for that question. "
-                "Please try a more specific query or tell me which document or section to use."
-            )
-            for token in fallback.split(" "):
-                yield token + " "
-            return
-
-        context_blocks = []
-        for index, hit in enumerate(hits, start=1):
-            context_blocks.append(f"[{index}] File: {hit['filename']}\n{hit['text']}")
-
-        context_text = "\n\n".join(context_blocks)
-
+        # Token counts of the last prompt sent, reported with the finished answer.
+        self.prompt_usage: PromptUsage | None = None
+        # True once the model streamed a complete answer. Canned replies (no sources, no
+        # hits, missing key) and failed model calls leave it False.
+        self.answered = False
+
+    def _build_messages(
+        self,
+        message: str,
+        history: list[dict[str, str]],
+        hits: list[dict],
+        active_settings: EffectiveSettings,
+        summary: str | None = None,
+    ) -> list[dict[str, str]]:
         # system_prompt = (
         #     "You are a precise enterprise assistant for end users. "
         #     "Answer only from the provided context. Do not add or infer facts that are not in the context. "
@@ -89,31 +83,54 @@ class RagService:
 )
 
 
-        messages: list[dict[str, str]] = [
-            {"role": "system", "content": system_prompt},
-            {
-                "role": "system",
-                "content": f"Use this retrieved context:\n\n{context_text}",
-            },
-        ]
-
-        for item in history[-10:]:
-            role = item.get("role")
-            content = item.get("content", "")
-            if role in {"user", "assistant"} and content:
-                messages.append({"role": role, "content": content})
-
-        messages.append({"role": "user", "content": message})
-
+        messages, usage = build_prompt(
+            system_prompt=system_prompt,
+            message=message,
+            history=history,
+            hits=hits,
+            context_window=get_context_window(active_settings.provider, active_settings.model),
+            summary=summary,
+        )
+        self.prompt_usage = usage
+        metrics.incr("prompt.tokens", usage.prompt_tokens)
+        metrics.incr("prompt.chunks_dropped", usage.chunks_dropped)
+        metrics.incr("prompt.turns_dropped", usage.turns_dropped)
+        return messages
+
+    def _model_settings(self) -> tuple[EffectiveSettings, str | None, str | None]:
         active_settings = self.settings_service.get_effective_settings()
         api_key = self.settings_service.get_api_key(active_settings.provider)
-
         if active_settings.provider != "ollama" and not api_key:
             hint = f"API key for provider '{active_settings.provider}' is missing. Add it in Settings."
-            for token in hint.split(" "):
-                yield token + " "
+            return active_settings, api_key, hint
+        return active_settings, api_key, None
+
+    def stream_answer(
+        self,
+        message: str,
+        history: list[dict[str, str]],
+        summary: str | None = None,
+    ) -> Generator[str, None, None]:
+        try:
+            hits = self.vector_store.retrieve(query=message, limit=6)
+            # Only an empty result pays for telling an empty index apart from no match.
+            empty = not hits and self.vector_store.is_empty()
+        except VectorStoreError:
+            yield SOURCES_UNAVAILABLE_MESSAGE
+            return
+        if empty:
+            yield NO_SOURCES_MESSAGE
+            return
+        if not hits:
+            yield NO_HITS_MESSAGE
             return
 
+        active_settings, api_key, hint = self._model_settings()
+        if hint:
+            yield hint
+            return
+
+        messages = self._build_messages(message, history, hits, active_settings, summary)
         try:
             for chunk in self.llm_service.stream_completion(
                 settings=active_settings,
@@ -122,6 +139,45 @@ class RagService:
             ):
                 yield chunk
         except LLMServiceError as exc:
-            err = f"Model request failed: {exc}"
-            for token in err.split(" "):
-                yield token + " "
+            yield f"Model request failed: {exc}"
+            return
+        self.answered = True
+
+    async def astream_answer(
+        self,
+        message: str,
+        history: list[dict[str, str]],
+        summary: str | None = None,
+    ) -> AsyncGenerator[str, None]:
+        # Same flow as stream_answer, but retrieval and generation await the providers'
+        # async clients, so an open stream holds no worker thread.
+        try:
+            hits = await self.vector_store.aretrieve(query=message, limit=6)
+            empty = not hits and await self.vector_store.ais_empty()
+        except VectorStoreError:
+            yield SOURCES_UNAVAILABLE_MESSAGE
+            return
+        if empty:
+            yield NO_SOURCES_MESSAGE
+            return
+        if not hits:
+            yield NO_HITS_MESSAGE
+            return
+
+        active_settings, api_key, hint = self._model_settings()
+        if hint:
+            yield hint
+            return
+
+        messages = self._build_messages(message, history, hits, active_settings, summary)
+        try:
+            async for chunk in self.llm_service.astream_completion(
+                settings=active_settings,
+                api_key=api_key,
+                messages=messages,
+            ):
+                yield chunk
+        except LLMServiceError as exc:
+            yield f"Model request failed: {exc}"
+            return
+        self.answered = True
@@ -1,9 +1,49 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Select, delete, func, or_, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from rag_core.db.models import Document
+from rag_core.db.models import ChatSession, ChatTurn, CorpusState, Document, IngestionJob
+from rag_core.db.session import SessionLocal
+
+
+def _page_statement(
+    limit: int,
+    after: tuple[datetime, str] | None,
+    name: str | None,
+    file_type: str | None,
+) -> Select:
+    # Newest first, keyset-paginated on (created_at, id): each page starts strictly
+    # after the last row of the previous one, so its cost does not grow with depth.
+    stmt = select(Document)
+    if name:
+        pattern = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(Document.original_name.ilike(f"%{pattern}%", escape="\\"))
+    if file_type:
+        stmt = stmt.where(Document.file_type == file_type)
+    if after is not None:
+        stmt = stmt.where(tuple_(Document.created_at, Document.id) < tuple_(*after))
+    return stmt.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit)
+
+
+def _stats_by_type_statement() -> Select:
+    return (
+        select(
+            Document.file_type,
+            func.count(),
+            func.coalesce(func.sum(Document.size_bytes), 0),
+            func.coalesce(func.sum(Document.chunk_count), 0),
+        )
+        .group_by(Document.file_type)
+        .order_by(Document.file_type)
+    )
+
+
+def _lease_free(now: datetime):
+    return or_(IngestionJob.lease_expires_at.is_(None), IngestionJob.lease_expires_at < now)
 
 
 class DocumentRepository:
@@ -14,16 +54,224 @@ class DocumentRepository:
         stmt = select(Document).order_by(Document.created_at.desc())
         return list(self.db.scalars(stmt).all())
 
+    def stats_by_type(self) -> list[tuple[str, int, int, int]]:
+        # (file_type, documents, bytes, chunks), aggregated in the database.
+        return [tuple(row) for row in self.db.execute(_stats_by_type_statement()).all()]
+
     def get(self, doc_id: str) -> Document | None:
         return self.db.get(Document, doc_id)
 
+    def find_by_hash(self, content_sha256: str) -> Document | None:
+        stmt = select(Document).where(Document.content_sha256 == content_sha256).order_by(Document.created_at).limit(1)
+        return self.db.scalars(stmt).first()
+
+    def active_versions(self, doc_ids: list[str]) -> dict[str, int]:
+        if not doc_ids:
+            return {}
+        stmt = select(Document.id, Document.active_version).where(Document.id.in_(doc_ids))
+        return {doc_id: version for doc_id, version in self.db.execute(stmt).all()}
+
     def upsert(self, document: Document) -> Document:
         self.db.add(document)
         self.db.commit()
         self.db.refresh(document)
         return document
 
+    def swap_version(self, document: Document, expected_version: int, **values) -> bool:
+        # Compare-and-set on active_version, so two concurrent replaces cannot both win.
+        stmt = (
+            update(Document)
+            .where(Document.id == document.id, Document.active_version == expected_version)
+            .values(**values)
+        )
+        result = self.db.execute(stmt)
+        self.db.commit()
+        if result.rowcount != 1:
+            return False
+        self.db.refresh(document)
+        return True
+
     def delete(self, document: Document) -> None:
         self.db.delete(document)
         self.db.commit()
 
+
+class IngestionJobRepository:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def get(self, job_id: str) -> IngestionJob | None:
+        return self.db.get(IngestionJob, job_id)
+
+    def find_by_hash(self, content_sha256: str, statuses: tuple[str, ...]) -> IngestionJob | None:
+        stmt = (
+            select(IngestionJob)
+            .where(IngestionJob.content_sha256 == content_sha256, IngestionJob.status.in_(statuses))
+            .order_by(IngestionJob.created_at)
+            .limit(1)
+        )
+        return self.db.scalars(stmt).first()
+
+    def list_by_status(self, statuses: tuple[str, ...]) -> list[IngestionJob]:
+        stmt = select(IngestionJob).where(IngestionJob.status.in_(statuses)).order_by(IngestionJob.created_at)
+        return list(self.db.scalars(stmt).all())
+
+    def list_claimable(self, statuses: tuple[str, ...]) -> list[str]:
+        # Ids of jobs nobody holds: never claimed, or left behind by a worker that stopped.
+        stmt = (
+            select(IngestionJob.id)
+            .where(IngestionJob.status.in_(statuses), _lease_free(datetime.now(timezone.utc)))
+            .order_by(IngestionJob.created_at)
+        )
+        return list(self.db.scalars(stmt).all())
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float, statuses: tuple[str, ...]) -> IngestionJob | None:
+        # Compare-and-set on the lease, so one worker in one process runs a job at a time.
+        now = datetime.now(timezone.utc)
+        stmt = (
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id, IngestionJob.status.in_(statuses), _lease_free(now))
+            .values(claimed_by=owner, lease_expires_at=now + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        result = self.db.execute(stmt)
+        self.db.commit()
+        if result.rowcount != 1:
+            return None
+        return self.db.get(IngestionJob, job_id, populate_existing=True)
+
+    def hold(self, job: IngestionJob, owner: str | None, lease_seconds: float, commit: bool = True, **values) -> bool:
+        # Writes job progress and extends the lease, but only while owner still holds it.
+        # With commit=False the caller commits, to pair the update with its own writes.
+        stmt = (
+            update(IngestionJob)
+            .where(IngestionJob.id == job.id, IngestionJob.claimed_by == owner)
+            .values(lease_expires_at=datetime.now(timezone.utc) + timedelta(seconds=lease_seconds), **values)
+            .execution_options(synchronize_session=False)
+        )
+        result = self.db.execute(stmt)
+        if result.rowcount != 1:
+            self.db.rollback()
+            return False
+        if commit:
+            self.db.commit()
+            self.db.refresh(job)
+        return True
+
+    def upsert(self, job: IngestionJob) -> IngestionJob:
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+
+class ChatRepository:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def get_session(self, session_id: str) -> ChatSession | None:
+        return self.db.get(ChatSession, session_id)
+
+    def create_session(self, chat_session: ChatSession) -> ChatSession:
+        self.db.add(chat_session)
+        self.db.commit()
+        self.db.refresh(chat_session)
+        return chat_session
+
+    def list_turns(self, session_id: str, after_id: int = 0) -> list[ChatTurn]:
+        stmt = (
+            select(ChatTurn)
+            .where(ChatTurn.session_id == session_id, ChatTurn.id > after_id)
+            .order_by(ChatTurn.id)
+        )
+        return list(self.db.scalars(stmt).all())
+
+    def add_turns(self, session_id: str, turns: list[tuple[str, str]]) -> None:
+        self.db.add_all(ChatTurn(session_id=session_id, role=role, content=content) for role, content in turns)
+        self.db.execute(update(ChatSession).where(ChatSession.id == session_id).values(updated_at=func.now()))
+        self.db.commit()
+
+    def advance_summary(self, session_id: str, expected_through: int, summary: str, through: int) -> bool:
+        # Compare-and-set on summarized_through, so two concurrent summaries cannot both land.
+        stmt = (
+            update(ChatSession)
+            .where(ChatSession.id == session_id, ChatSession.summarized_through == expected_through)
+            .values(summary=summary, summarized_through=through)
+        )
+        result = self.db.execute(stmt)
+        self.db.commit()
+        return result.rowcount == 1
+
+    def delete_session(self, chat_session: ChatSession) -> None:
+        self.db.execute(delete(ChatTurn).where(ChatTurn.session_id == chat_session.id))
+        self.db.delete(chat_session)
+        self.db.commit()
+
+
+class CorpusStateRepository:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def generation(self) -> int:
+        return int(self.db.scalar(select(CorpusState.generation).where(CorpusState.id == 1)) or 0)
+
+    def bump(self, commit: bool = True) -> None:
+        # The row is created by the first change; both SQLite and Postgres take this upsert.
+        self.db.execute(
+            text(
+                "INSERT INTO corpus_state (id, generation) VALUES (1, 1) "
+                "ON CONFLICT (id) DO UPDATE SET generation = corpus_state.generation + 1"
+            )
+        )
+        if commit:
+            self.db.commit()
+
+
+def active_document_versions(doc_ids: list[str]) -> dict[str, int]:
+    with SessionLocal() as db:
+        return DocumentRepository(db).active_versions(doc_ids)
+
+
+def corpus_generation() -> int:
+    with SessionLocal() as db:
+        return CorpusStateRepository(db).generation()
+
+
+def bump_corpus_generation(db: Session | None = None) -> None:
+    # With a session the bump joins the caller's transaction and shows with its commit.
+    if db is not None:
+        CorpusStateRepository(db).bump(commit=False)
+        return
+    with SessionLocal() as session:
+        CorpusStateRepository(session).bump()
+
+
+class AsyncDocumentRepository:
+    # Read queries for the async file routes; writes stay on DocumentRepository, next
+    # to the vector store and storage calls they are paired with.
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def get(self, doc_id: str) -> Document | None:
+        return await self.db.get(Document, doc_id)
+
+    async def list_page(
+        self,
+        limit: int,
+        after: tuple[datetime, str] | None = None,
+        name: str | None = None,
+        file_type: str | None = None,
+    ) -> list[Document]:
+        stmt = _page_statement(limit, after, name, file_type)
+        return list((await self.db.scalars(stmt)).all())
+
+    async def stats_by_type(self) -> list[tuple[str, int, int, int]]:
+        return [tuple(row) for row in (await self.db.execute(_stats_by_type_statement())).all()]
+
+
+class AsyncIngestionJobRepository:
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def get(self, job_id: str) -> IngestionJob | None:
+        return await self.db.get(IngestionJob, job_id)
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import tempfile
+import threading
 from pathlib import Path
 
 from cryptography.fernet import Fernet
@@ -10,12 +14,44 @@ class KeyCipher:
         self.key_file = key_file
         self.key_file.parent.mkdir(parents=True, exist_ok=True)
         if not self.key_file.exists():
-            self.key_file.write_bytes(Fernet.generate_key())
+            self._create_key()
         self._fernet = Fernet(self.key_file.read_bytes())
 
+    def _create_key(self) -> None:
+        # Workers starting together must agree on one key: write it aside, then link it
+        # into place, which fails if another process got there first.
+        fd, tmp = tempfile.mkstemp(dir=self.key_file.parent, prefix=".fernet.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(Fernet.generate_key())
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.link(tmp, self.key_file)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+
     def encrypt(self, plain: str) -> str:
         return self._fernet.encrypt(plain.encode("utf-8")).decode("utf-8")
 
     def decrypt(self, cipher_text: str) -> str:
         return self._fernet.decrypt(cipher_text.encode("utf-8")).decode("utf-8")
 
+
+_ciphers: dict[Path, KeyCipher] = {}
+_ciphers_lock = threading.Lock()
+
+
+def get_cipher(key_file: Path) -> KeyCipher:
+    # The key file never changes once created, so one cipher per file serves the process.
+    with _ciphers_lock:
+        cipher = _ciphers.get(key_file)
+        if cipher is None:
+            cipher = _ciphers[key_file] = KeyCipher(key_file)
+        return cipher
+
+
+def fingerprint_secret(secret: str) -> str:
+    # Identifies a key in cache keys and logs without revealing it.
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:16]
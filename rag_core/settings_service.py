@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
-from rag_core.settings_store import SettingsStore
+from rag_core.config import settings
+from rag_core.settings_store import SettingsStore, StoredSettings
 
 
 SUPPORTED_PROVIDERS = ["ollama", "openai", "anthropic", "gemini", "groq"]
+EMBEDDING_PROVIDERS = ["openai", "ollama", "gemini", "hashing"]
 DEFAULT_MODELS = {
     "ollama": "llama3.1:8b",
     "openai": "gpt-4o-mini",
@@ -37,6 +39,45 @@ MODEL_CATALOG = {
     ],
 }
 
+# Context window in tokens. Unknown models fall back to their provider's default.
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o-mini": 128_000,
+    "gpt-4.1-mini": 1_047_576,
+    "gpt-4.1": 1_047_576,
+    "claude-3-5-haiku-latest": 200_000,
+    "claude-3-7-sonnet-latest": 200_000,
+    "gemini-1.5-flash": 1_048_576,
+    "gemini-1.5-pro": 2_097_152,
+    "llama-3.3-70b-versatile": 131_072,
+    "llama-3.1-8b-instant": 131_072,
+    "llama-3.1-70b-versatile": 131_072,
+    "mixtral-8x7b-32768": 32_768,
+    "gemma2-9b-it": 8_192,
+    "gemma-7b-it": 8_192,
+    "qwen-2.5-32b": 131_072,
+    "qwen-2.5-coder-32b": 131_072,
+    "deepseek-r1-distill-llama-70b": 131_072,
+    "deepseek-r1-distill-qwen-32b": 131_072,
+    "llama-guard-3-8b": 8_192,
+    "allam-2-7b": 4_096,
+    "compound-beta": 131_072,
+    "moonshotai/kimi-k2-instruct": 131_072,
+    "meta-llama/llama-4-scout-17b-16e-instruct": 131_072,
+}
+DEFAULT_CONTEXT_WINDOWS = {
+    "openai": 128_000,
+    "anthropic": 200_000,
+    "gemini": 1_048_576,
+    "groq": 8_192,
+}
+
+
+def get_context_window(provider: str, model: str) -> int:
+    if provider == "ollama":
+        # Ollama truncates every prompt to the num_ctx it was loaded with, whatever the model supports.
+        return settings.ollama_num_ctx
+    return MODEL_CONTEXT_WINDOWS.get(model) or DEFAULT_CONTEXT_WINDOWS.get(provider, 8_192)
+
 
 @dataclass
 class EffectiveSettings:
@@ -46,6 +87,23 @@ class EffectiveSettings:
     temperature: float
 
 
+@dataclass(frozen=True)
+class ProviderLimits:
+    max_concurrency: int
+    max_queue: int
+    max_wait_seconds: float
+
+
+def default_provider_limits(provider: str) -> ProviderLimits:
+    # A local Ollama box serves a couple of generations well; hosted APIs take more.
+    concurrency = settings.ollama_max_concurrency if provider == "ollama" else settings.llm_max_concurrency
+    return ProviderLimits(
+        max_concurrency=concurrency,
+        max_queue=settings.llm_max_queue,
+        max_wait_seconds=settings.llm_max_queue_wait_seconds,
+    )
+
+
 class SettingsService:
     def __init__(self) -> None:
         self.store = SettingsStore()
@@ -59,23 +117,39 @@ class SettingsService:
             "model": data.model,
             "ollama_base_url": data.ollama_base_url,
             "temperature": data.temperature,
+            "embedding_provider": data.embedding_provider,
             "available_providers": SUPPORTED_PROVIDERS,
+            "available_embedding_providers": EMBEDDING_PROVIDERS,
             "default_models": DEFAULT_MODELS,
             "model_catalog": MODEL_CATALOG,
             "api_key_status": status,
+            "provider_limits": {provider: asdict(self.get_provider_limits(provider, data)) for provider in SUPPORTED_PROVIDERS},
         }
 
-    def update_settings(self, provider: str, model: str, ollama_base_url: str, temperature: float) -> dict:
+    def update_settings(
+        self,
+        provider: str,
+        model: str,
+        ollama_base_url: str,
+        temperature: float,
+        embedding_provider: str | None = None,
+    ) -> dict:
         if provider not in SUPPORTED_PROVIDERS:
             raise ValueError("Unsupported provider.")
         if provider != "ollama" and not self.has_api_key(provider):
             raise ValueError(f"API key required for provider '{provider}'.")
+        if embedding_provider is not None and embedding_provider != self.store.load().embedding_provider:
+            if embedding_provider not in EMBEDDING_PROVIDERS:
+                raise ValueError("Unsupported embedding provider.")
+            if embedding_provider in {"openai", "gemini"} and not self.has_api_key(embedding_provider):
+                raise ValueError(f"API key required for embedding provider '{embedding_provider}'.")
 
         data = self.store.update(
             provider=provider,
             model=model or DEFAULT_MODELS[provider],
             ollama_base_url=ollama_base_url,
             temperature=temperature,
+            embedding_provider=embedding_provider,
         )
         return self.get_settings_payload()
 
@@ -97,6 +171,43 @@ class SettingsService:
             return None
         return self.store.get_api_key(provider)
 
+    def get_provider_limits(self, provider: str, data: StoredSettings | None = None) -> ProviderLimits:
+        data = data or self.store.load()
+        defaults = default_provider_limits(provider)
+        stored = data.provider_limits.get(provider)
+        if not stored:
+            return defaults
+        return ProviderLimits(
+            max_concurrency=int(stored.get("max_concurrency", defaults.max_concurrency)),
+            max_queue=int(stored.get("max_queue", defaults.max_queue)),
+            max_wait_seconds=float(stored.get("max_wait_seconds", defaults.max_wait_seconds)),
+        )
+
+    def update_provider_limits(
+        self,
+        provider: str,
+        max_concurrency: int,
+        max_queue: int,
+        max_wait_seconds: float,
+    ) -> ProviderLimits:
+        if provider not in SUPPORTED_PROVIDERS:
+            raise ValueError("Unsupported provider.")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if max_queue < 0:
+            raise ValueError("max_queue cannot be negative.")
+        if max_wait_seconds <= 0:
+            raise ValueError("max_wait_seconds must be positive.")
+        limits = ProviderLimits(max_concurrency=max_concurrency, max_queue=max_queue, max_wait_seconds=max_wait_seconds)
+        self.store.save_provider_limits(provider, asdict(limits))
+        return limits
+
+    def get_embedding_provider(self) -> str:
+        provider = self.store.load().embedding_provider
+        if provider not in EMBEDDING_PROVIDERS:
+            raise ValueError(f"Unsupported embedding provider '{provider}'.")
+        return provider
+
     def get_effective_settings(self) -> EffectiveSettings:
         data = self.store.load()
         return EffectiveSettings(
@@ -1,27 +1,164 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass, field, replace
 from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Mapping
 
 from rag_core.config import settings
-from rag_core.security import KeyCipher
+from rag_core.locks import file_lock
+from rag_core.metrics import metrics
+from rag_core.security import KeyCipher, get_cipher
 
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
 class StoredSettings:
+    # Shared by every caller in the process, so it is never mutated: writers build a
+    # new one with dataclasses.replace.
     provider: str
     model: str
     ollama_base_url: str
     temperature: float
-    api_keys: dict[str, str]
+    embedding_provider: str
+    api_keys: Mapping[str, str]
+    # Admission limits overridden per provider; missing values use the env defaults.
+    provider_limits: Mapping[str, Mapping[str, float]] = field(default_factory=lambda: MappingProxyType({}))
+    # Incremented by every save, across all processes sharing the file.
+    version: int = 0
+
+
+@dataclass
+class _Snapshot:
+    # Identifies the file version the snapshot was read from: a rewrite changes the
+    # mtime or size, a replace changes the inode. None when there is no file yet.
+    stamp: tuple[int, int, int] | None
+    data: StoredSettings
+    # Decrypted API keys, filled on first use.
+    plain_keys: dict[str, str] = field(default_factory=dict)
+
+
+# Keyed by the path as a string: hashing Path objects costs more than the lookup saves.
+_snapshots: dict[str, _Snapshot] = {}
+_snapshots_lock = threading.Lock()
+# Serializes reading the file and installing its snapshot with this process's own
+# saves, so an older read can never replace a newer save.
+_io_lock = threading.RLock()
+_ensured_dirs: set[str] = set()
+
+ChangeListener = Callable[[StoredSettings, StoredSettings], None]
+_change_listeners: list[ChangeListener] = []
+# Listeners run here, one change at a time, never on the thread that noticed the change:
+# that thread may hold a lock a listener needs, e.g. a search holding the vector store's
+# read lock while it loads settings, with a listener that resets the store.
+_listener_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="settings-listeners")
+_save_hooks: list[Callable[[StoredSettings], None]] = []
+# While a SettingsWatcher keeps the snapshots current, requests skip the file check.
+_watchers = 0
+
+
+def add_change_listener(listener: ChangeListener) -> None:
+    # Called with (previous, current) once per new settings version seen by this
+    # process, whether it saved the change or picked it up from another worker. Runs
+    # on the listener thread shortly after the change is seen.
+    _change_listeners.append(listener)
+
+
+def remove_change_listener(listener: ChangeListener) -> None:
+    with suppress(ValueError):
+        _change_listeners.remove(listener)
+
+
+def add_save_hook(hook: Callable[[StoredSettings], None]) -> None:
+    # Called after this process saves, e.g. to notify other workers.
+    _save_hooks.append(hook)
+
+
+def remove_save_hook(hook: Callable[[StoredSettings], None]) -> None:
+    with suppress(ValueError):
+        _save_hooks.remove(hook)
+
+
+def set_watched(watched: bool) -> None:
+    global _watchers
+    with _snapshots_lock:
+        _watchers = max(_watchers + (1 if watched else -1), 0)
+
+
+def _stamp(path: str) -> tuple[int, int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _frozen(api_keys: Mapping[str, str], provider_limits: Mapping[str, Mapping[str, float]]) -> dict:
+    return {
+        "api_keys": MappingProxyType(dict(api_keys)),
+        "provider_limits": MappingProxyType(
+            {provider: MappingProxyType(dict(limits)) for provider, limits in provider_limits.items()}
+        ),
+    }
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    # Readers see either the old file or the new one, never a partial write.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+def _run_listeners(previous: StoredSettings, current: StoredSettings) -> None:
+    for listener in list(_change_listeners):
+        try:
+            listener(previous, current)
+        except Exception:
+            logger.exception("Settings change listener failed")
+
+
+def _notify_change(previous: _Snapshot | None, current: _Snapshot) -> None:
+    if previous is None or previous.data.version == current.data.version:
+        return
+    metrics.incr("settings.changes")
+    _listener_executor.submit(_run_listeners, previous.data, current.data)
 
 
 class SettingsStore:
     def __init__(self, settings_path: Path | None = None) -> None:
         self.path = settings_path or settings.settings_file
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.cipher = KeyCipher(settings.secrets_dir / "fernet.key")
+        self._key = str(self.path)
+        if self._key not in _ensured_dirs:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            _ensured_dirs.add(self._key)
+        # Stores are built per request; pinning the snapshot gives each request one
+        # consistent view and at most one freshness check.
+        self._pinned: _Snapshot | None = None
+
+    @property
+    def cipher(self) -> KeyCipher:
+        return get_cipher(settings.secrets_dir / "fernet.key")
+
+    @property
+    def lock_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.lock")
 
     def _default_settings(self) -> StoredSettings:
         return StoredSettings(
@@ -29,38 +166,106 @@ class SettingsStore:
             model="llama3.1:8b",
             ollama_base_url=settings.ollama_base_url,
             temperature=0.2,
-            api_keys={},
+            embedding_provider=settings.embedding_provider,
+            **_frozen({}, {}),
         )
 
-    def load(self) -> StoredSettings:
-        if not self.path.exists():
-            defaults = self._default_settings()
-            self.save(defaults)
-            return defaults
+    def _snapshot(self) -> _Snapshot:
+        if self._pinned is None:
+            self._pinned = self._fresh_snapshot()
+        return self._pinned
+
+    def _fresh_snapshot(self) -> _Snapshot:
+        # One parsed copy per process. With a watcher running it is served straight from
+        # memory; otherwise each request stats the file and re-reads it on change.
+        with _snapshots_lock:
+            snapshot = _snapshots.get(self._key)
+            watched = _watchers > 0
+        if snapshot is not None and watched:
+            return snapshot
+        return self.refresh()
+
+    def refresh(self) -> _Snapshot:
+        # Re-reads the file if it changed since the cached snapshot and tells the change
+        # listeners about a new version.
+        previous, snapshot = self._reload()
+        _notify_change(previous, snapshot)
+        return snapshot
+
+    def _reload(self) -> tuple[_Snapshot | None, _Snapshot]:
+        with _io_lock:
+            with _snapshots_lock:
+                cached = _snapshots.get(self._key)
+            stamp = _stamp(self._key)
+            if cached is not None and cached.stamp == stamp:
+                return cached, cached
+            snapshot = _Snapshot(stamp=stamp, data=self._read(stamp, cached))
+            with _snapshots_lock:
+                _snapshots[self._key] = snapshot
+        if stamp is not None:
+            metrics.incr("settings.reloads")
+        return cached, snapshot
 
+    def _read(self, stamp: tuple[int, int, int] | None, cached: _Snapshot | None) -> StoredSettings:
+        if stamp is None:
+            return self._default_settings()
         try:
             raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return self._default_settings()
         except json.JSONDecodeError:
-            defaults = self._default_settings()
-            self.save(defaults)
-            return defaults
+            # Saves are atomic, so this is a hand edit gone wrong. Keep serving what was
+            # last read rather than silently dropping every saved key.
+            logger.error("Settings file %s is not valid JSON; keeping the last good settings", self.path)
+            metrics.incr("settings.read_errors")
+            return cached.data if cached is not None else self._default_settings()
         return StoredSettings(
             provider=raw.get("provider", "ollama"),
             model=raw.get("model", "llama3.1:8b"),
             ollama_base_url=raw.get("ollama_base_url", settings.ollama_base_url),
             temperature=float(raw.get("temperature", 0.2)),
-            api_keys=dict(raw.get("api_keys", {})),
+            embedding_provider=raw.get("embedding_provider", settings.embedding_provider),
+            version=int(raw.get("version", 0)),
+            **_frozen(raw.get("api_keys", {}), raw.get("provider_limits", {})),
         )
 
+    def _modify(self, change: Callable[[StoredSettings], StoredSettings]) -> StoredSettings:
+        # Read-modify-write under an advisory lock shared with the other workers, so two
+        # concurrent saves cannot lose one another's update. The change is applied to
+        # what is on disk now, not to this request's pinned snapshot.
+        with file_lock(self.lock_path):
+            with _io_lock:
+                previous, current = self._reload()
+                data = replace(change(current.data), version=current.data.version + 1)
+                payload = {
+                    "version": data.version,
+                    "provider": data.provider,
+                    "model": data.model,
+                    "ollama_base_url": data.ollama_base_url,
+                    "temperature": data.temperature,
+                    "embedding_provider": data.embedding_provider,
+                    "api_keys": dict(data.api_keys),
+                    "provider_limits": {provider: dict(limits) for provider, limits in data.provider_limits.items()},
+                }
+                _write_atomic(self.path, json.dumps(payload, indent=2))
+                snapshot = _Snapshot(stamp=_stamp(self._key), data=data)
+                with _snapshots_lock:
+                    _snapshots[self._key] = snapshot
+        self._pinned = snapshot
+        metrics.incr("settings.saves")
+        _notify_change(previous, snapshot)
+        for hook in list(_save_hooks):
+            try:
+                hook(data)
+            except Exception:
+                logger.exception("Settings save hook failed")
+        return data
+
+    def load(self) -> StoredSettings:
+        return self._snapshot().data
+
     def save(self, data: StoredSettings) -> None:
-        payload = {
-            "provider": data.provider,
-            "model": data.model,
-            "ollama_base_url": data.ollama_base_url,
-            "temperature": data.temperature,
-            "api_keys": data.api_keys,
-        }
-        self.path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        self._modify(lambda _current: data)
 
     def update(
         self,
@@ -68,39 +273,58 @@ class SettingsStore:
         model: str,
         ollama_base_url: str,
         temperature: float,
+        embedding_provider: str | None = None,
     ) -> StoredSettings:
-        current = self.load()
-        updated = StoredSettings(
-            provider=provider,
-            model=model,
-            ollama_base_url=ollama_base_url,
-            temperature=temperature,
-            api_keys=current.api_keys,
+        return self._modify(
+            lambda current: replace(
+                current,
+                provider=provider,
+                model=model,
+                ollama_base_url=ollama_base_url,
+                temperature=temperature,
+                embedding_provider=embedding_provider or current.embedding_provider,
+            )
         )
-        self.save(updated)
-        return updated
 
     def api_key_status(self) -> dict[str, bool]:
         current = self.load()
         return {provider: True for provider in current.api_keys}
 
     def save_api_key(self, provider: str, plain_key: str) -> None:
-        current = self.load()
         encrypted = self.cipher.encrypt(plain_key)
-        current.api_keys[provider] = encrypted
-        self.save(current)
+        self._modify(
+            lambda current: replace(
+                current, **_frozen({**current.api_keys, provider: encrypted}, current.provider_limits)
+            )
+        )
 
     def remove_api_key(self, provider: str) -> bool:
-        current = self.load()
-        if provider not in current.api_keys:
+        if provider not in self.load().api_keys:
             return False
-        current.api_keys.pop(provider, None)
-        self.save(current)
+
+        def change(current: StoredSettings) -> StoredSettings:
+            api_keys = {name: value for name, value in current.api_keys.items() if name != provider}
+            return replace(current, **_frozen(api_keys, current.provider_limits))
+
+        self._modify(change)
         return True
 
+    def save_provider_limits(self, provider: str, limits: dict[str, float]) -> None:
+        self._modify(
+            lambda current: replace(
+                current, **_frozen(current.api_keys, {**current.provider_limits, provider: limits})
+            )
+        )
+
     def get_api_key(self, provider: str) -> str | None:
-        current = self.load()
-        encrypted = current.api_keys.get(provider)
+        # Decrypted once per snapshot and then served from memory.
+        snapshot = self._snapshot()
+        plain = snapshot.plain_keys.get(provider)
+        if plain is not None:
+            return plain
+        encrypted = snapshot.data.api_keys.get(provider)
         if not encrypted:
             return None
-        return self.cipher.decrypt(encrypted)
+        plain = self.cipher.decrypt(encrypted)
+        snapshot.plain_keys[provider] = plain
+        return plain
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+import psycopg
+from sqlalchemy import text
+
+from rag_core.config import settings
+from rag_core.db.session import engine
+from rag_core.metrics import metrics
+from rag_core.settings_store import (
+    SettingsStore,
+    StoredSettings,
+    add_save_hook,
+    remove_save_hook,
+    set_watched,
+)
+
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "rag_settings_changed"
+MAX_RETRY_SECONDS = 60.0
+
+
+def _use_pg_notify() -> bool:
+    mode = settings.settings_notify
+    if mode == "pg":
+        return True
+    return mode == "auto" and engine.dialect.name == "postgresql"
+
+
+class SettingsWatcher:
+    # Keeps this worker's settings snapshot current so requests never check the file.
+    # It re-checks the settings file every SETTINGS_WATCH_INTERVAL_SECONDS, and on
+    # Postgres also listens for the NOTIFY each save sends, so other workers see a
+    # change at once. Change listeners then run once per new version, on their own thread.
+    def __init__(self, interval_seconds: float | None = None) -> None:
+        self.interval = interval_seconds if interval_seconds is not None else settings.settings_watch_interval_seconds
+        self.use_pg = _use_pg_notify()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        # Load once up front so requests find a snapshot from the start.
+        SettingsStore().refresh()
+        if self.use_pg:
+            add_save_hook(self._publish)
+        set_watched(True)
+        self._thread = threading.Thread(target=self._run, name="settings-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        set_watched(False)
+        remove_save_hook(self._publish)
+        self._thread.join(timeout=self.interval + 5)
+        self._thread = None
+
+    def _refresh(self) -> None:
+        try:
+            SettingsStore().refresh()
+        except Exception:
+            logger.exception("Settings refresh failed")
+
+    def _run(self) -> None:
+        retry_delay = self.interval
+        listen_after = 0.0
+        while not self._stop.is_set():
+            if self.use_pg and time.monotonic() >= listen_after:
+                try:
+                    self._listen()
+                except Exception as exc:
+                    # Keep checking the file meanwhile; reconnect with backoff.
+                    logger.warning("Settings LISTEN connection lost, checking the file instead: %s", exc)
+                    metrics.incr("settings.watch_errors")
+                    listen_after = time.monotonic() + retry_delay
+                    retry_delay = min(retry_delay * 2, MAX_RETRY_SECONDS)
+                else:
+                    retry_delay = self.interval
+            if self._stop.wait(self.interval):
+                return
+            self._refresh()
+
+    def _listen(self) -> None:
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        with psycopg.connect(conninfo, autocommit=True) as conn:
+            conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            # Anything saved while this connection was down.
+            self._refresh()
+            while not self._stop.is_set():
+                # Wakes on a notification or after one interval, whichever is first; the
+                # file is checked either way, so a lost notification only costs latency.
+                for _notify in conn.notifies(timeout=self.interval, stop_after=1):
+                    metrics.incr("settings.notifications")
+                self._refresh()
+
+    def _publish(self, data: StoredSettings) -> None:
+        try:
+            with engine.connect() as conn:
+                conn.execute(
+                    text("SELECT pg_notify(:channel, :version)"),
+                    {"channel": NOTIFY_CHANNEL, "version": str(data.version)},
+                )
+                conn.commit()
+        except Exception as exc:
+            # Other workers still pick the change up on their next file check.
+            logger.warning("Could not send the settings change notification: %s", exc)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import AsyncGenerator, AsyncIterator
+
+from rag_core.metrics import metrics
+
+
+@dataclass
+class StreamStats:
+    started: float
+    first_token_at: float | None = None
+    chunks: int = 0
+    frames: int = 0
+    chars: int = 0
+    cancelled: bool = False
+
+    def to_dict(self) -> dict[str, float | int | None]:
+        finished = time.perf_counter()
+        first_token_ms = None
+        if self.first_token_at is not None:
+            first_token_ms = round((self.first_token_at - self.started) * 1000, 1)
+        return {
+            "first_token_ms": first_token_ms,
+            "total_ms": round((finished - self.started) * 1000, 1),
+            "chunks": self.chunks,
+            "frames": self.frames,
+            "chars": self.chars,
+        }
+
+
+def record_stream_end(stats: StreamStats, cancelled: bool) -> None:
+    generated = math.ceil(stats.chars / 4)
+    if not cancelled:
+        metrics.incr("chat.stream.completed")
+        metrics.incr("chat.stream.completion_tokens", generated)
+        return
+    # What the provider would still have produced is unknown; estimate it from the
+    # average length of answers that ran to completion.
+    completed = metrics.counter("chat.stream.completed")
+    average = metrics.counter("chat.stream.completion_tokens") / completed if completed else 0.0
+    metrics.incr("chat.stream.cancelled")
+    metrics.incr("chat.stream.tokens_saved", max(average - generated, 0.0))
+
+
+async def coalesce(
+    chunks: AsyncIterator[str],
+    stats: StreamStats,
+    window_seconds: float,
+    max_bytes: int,
+) -> AsyncGenerator[str, None]:
+    # Joins provider chunks into one frame per time window, or sooner once a frame
+    # reaches max_bytes. The first chunk is sent at once so time to first token is not
+    # delayed, and a partial frame is flushed when its window closes even if the
+    # provider has gone quiet. A zero window or size sends every chunk as it arrives.
+    if window_seconds <= 0 or max_bytes <= 0:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            if stats.first_token_at is None:
+                stats.first_token_at = time.perf_counter()
+            stats.chunks += 1
+            stats.chars += len(chunk)
+            stats.frames += 1
+            yield chunk
+        return
+
+    buffer: list[str] = []
+    size = 0
+    finished = False
+    error: BaseException | None = None
+    pending = asyncio.Event()  # something is buffered
+    send_now = asyncio.Event()  # first token, frame full, or the provider is done
+
+    async def pump() -> None:
+        # Reads the provider on its own task, so waiting for a window never wraps each
+        # chunk in a task of its own.
+        nonlocal size, finished, error
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                stats.chunks += 1
+                stats.chars += len(chunk)
+                buffer.append(chunk)
+                size += len(chunk.encode("utf-8"))
+                if stats.first_token_at is None:
+                    stats.first_token_at = time.perf_counter()
+                    send_now.set()
+                elif size >= max_bytes:
+                    send_now.set()
+                pending.set()
+        except Exception as exc:
+            error = exc
+        finally:
+            finished = True
+            pending.set()
+            send_now.set()
+
+    reader = asyncio.create_task(pump())
+    try:
+        while True:
+            await pending.wait()
+            if not send_now.is_set():
+                try:
+                    await asyncio.wait_for(send_now.wait(), window_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            # Take the frame and reset the signals before yielding, while the reader
+            # cannot run.
+            frame = "".join(buffer)
+            buffer.clear()
+            size = 0
+            pending.clear()
+            send_now.clear()
+            done = finished
+            if frame:
+                stats.frames += 1
+                yield frame
+            if done:
+                break
+        if error is not None:
+            raise error
+    finally:
+        # Stops the provider stream too when the consumer goes away early.
+        reader.cancel()
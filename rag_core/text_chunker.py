@@ -1,17 +1,63 @@
 from __future__ import annotations
 
+import hashlib
+from bisect import bisect_right
+from dataclasses import dataclass
+
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from rag_core.document_parser import PageText
 
-def chunk_text(text: str, chunk_size: int = 900, overlap: int = 150) -> list[str]:
-    normalized = " ".join(text.split())
-    if not normalized:
-        return []
 
-    splitter = RecursiveCharacterTextSplitter(
+@dataclass(frozen=True)
+class TextChunk:
+    text: str
+    page: int | None = None
+
+
+def hash_chunk(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _splitter(chunk_size: int, overlap: int, add_start_index: bool = False) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=overlap,
         separators=["\n\n", "\n", ". ", " ", ""],
+        add_start_index=add_start_index,
     )
-    return splitter.split_text(normalized)
 
+
+def chunk_text(text: str, chunk_size: int = 900, overlap: int = 150) -> list[str]:
+    normalized = " ".join(text.split())
+    if not normalized:
+        return []
+
+    return _splitter(chunk_size, overlap).split_text(normalized)
+
+
+def chunk_pages(pages: list[PageText], chunk_size: int = 900, overlap: int = 150) -> list[TextChunk]:
+    parts: list[str] = []
+    starts: list[int] = []
+    numbers: list[int | None] = []
+    offset = 0
+    for page in pages:
+        normalized = " ".join(page.text.split())
+        if not normalized:
+            continue
+        parts.append(normalized)
+        starts.append(offset)
+        numbers.append(page.number)
+        offset += len(normalized) + 1
+
+    if not parts:
+        return []
+
+    # Chunks match chunk_text() over the joined pages; each one is tagged with the page it starts on.
+    documents = _splitter(chunk_size, overlap, add_start_index=True).create_documents([" ".join(parts)])
+    chunks: list[TextChunk] = []
+    for document in documents:
+        start = int(document.metadata.get("start_index", 0))
+        page = numbers[max(0, bisect_right(starts, start) - 1)]
+        chunks.append(TextChunk(text=document.page_content, page=page))
+    return chunks
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any
+
+from rag_core.config import settings
+from rag_core.vector_backends.base import VectorBackend, VectorHit, VectorRecord
+
+
+VECTOR_BACKENDS = ["chroma", "numpy", "pgvector"]
+
+
+def create_backend(signature: dict[str, Any], name: str | None = None) -> VectorBackend:
+    # Backends are imported on demand so only the selected engine's dependencies load.
+    name = name or settings.vector_backend
+    if name == "chroma":
+        from rag_core.vector_backends.chroma import ChromaBackend
+
+        return ChromaBackend(signature)
+    if name == "numpy":
+        from rag_core.vector_backends.numpy_index import NumpyBackend
+
+        return NumpyBackend(signature)
+    if name == "pgvector":
+        from rag_core.vector_backends.pgvector import PgVectorBackend
+
+        return PgVectorBackend(signature)
+    raise ValueError(f"Unsupported vector backend '{name}'. Choose one of: {', '.join(VECTOR_BACKENDS)}.")
+
+
+__all__ = ["VECTOR_BACKENDS", "VectorBackend", "VectorHit", "VectorRecord", "create_backend"]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+
+@dataclass(frozen=True)
+class VectorRecord:
+    id: str
+    text: str
+    metadata: dict[str, Any]
+    embedding: list[float] | None = None
+
+
+@dataclass(frozen=True)
+class VectorHit:
+    text: str
+    metadata: dict[str, Any]
+    # Cosine distance: 0 for identical direction, up to 2 for opposite.
+    distance: float
+
+
+class VectorBackend(ABC):
+    # Largest number of records a single upsert call may carry.
+    max_batch_size: int = 1000
+
+    # The embedding provider, model and dimensions recorded for the index, or {}.
+    @abstractmethod
+    def read_signature(self) -> dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def write_signature(self, signature: dict[str, Any]) -> None:
+        ...
+
+    # Width of any stored vector, or None while the index is empty.
+    @abstractmethod
+    def sample_dimensions(self) -> int | None:
+        ...
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def get_by_doc(self, doc_id: str, with_embeddings: bool = False) -> list[VectorRecord]:
+        ...
+
+    @abstractmethod
+    def delete(self, ids: list[str]) -> None:
+        ...
+
+    # Backends that share the application database stage the delete on the caller's
+    # session, so it commits or rolls back with the document row. Others return False.
+    def delete_document_in(self, db: Session, doc_id: str) -> bool:
+        return False
+
+    @abstractmethod
+    def search(self, embedding: list[float], k: int) -> list[VectorHit]:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    # Backends that can stop at the first row override this; counting may scan everything.
+    def is_empty(self) -> bool:
+        return self.count() == 0
+
+    def close(self) -> None:
+        return None
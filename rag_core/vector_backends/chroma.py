@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import Any
+
+from langchain_chroma import Chroma
+
+from rag_core.config import settings
+from rag_core.vector_backends.base import VectorBackend, VectorHit, VectorRecord
+
+
+class ChromaBackend(VectorBackend):
+    # Chroma caps how many records a single upsert may carry.
+    max_batch_size = 1000
+
+    def __init__(self, signature: dict[str, Any]) -> None:
+        settings.chroma_dir.mkdir(parents=True, exist_ok=True)
+        # A new collection records the signature at creation; existing ones keep theirs.
+        self._store = Chroma(
+            collection_name="documents",
+            persist_directory=str(settings.chroma_dir),
+            collection_metadata={"hnsw:space": "cosine", **signature},
+        )
+        self._collection = self._store._collection
+
+    def read_signature(self) -> dict[str, Any]:
+        recorded = dict(self._collection.metadata or {})
+        return {key: value for key, value in recorded.items() if key.startswith("embedding_")}
+
+    def write_signature(self, signature: dict[str, Any]) -> None:
+        # Chroma refuses to modify hnsw settings, which persist separately anyway.
+        recorded = dict(self._collection.metadata or {})
+        kept = {key: value for key, value in recorded.items() if not key.startswith("hnsw:")}
+        self._collection.modify(metadata={**kept, **signature})
+
+    def sample_dimensions(self) -> int | None:
+        vectors = self._collection.get(limit=1, include=["embeddings"]).get("embeddings")
+        if vectors is None or not len(vectors):
+            return None
+        return len(vectors[0])
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+    ) -> None:
+        self._collection.upsert(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+
+    def get_by_doc(self, doc_id: str, with_embeddings: bool = False) -> list[VectorRecord]:
+        include = ["metadatas", "documents"]
+        if with_embeddings:
+            include.append("embeddings")
+        raw = self._collection.get(where={"doc_id": doc_id}, include=include)
+        ids = list(raw.get("ids") or [])
+        metadatas = raw.get("metadatas") or [{} for _ in ids]
+        texts = raw.get("documents") or ["" for _ in ids]
+        embeddings = raw.get("embeddings") if with_embeddings else None
+        records: list[VectorRecord] = []
+        for idx, entry_id in enumerate(ids):
+            embedding = None
+            if embeddings is not None:
+                embedding = embeddings[idx]
+                embedding = embedding.tolist() if hasattr(embedding, "tolist") else list(embedding)
+            records.append(
+                VectorRecord(
+                    id=entry_id,
+                    text=texts[idx] or "",
+                    metadata=dict(metadatas[idx] or {}),
+                    embedding=embedding,
+                )
+            )
+        return records
+
+    def delete(self, ids: list[str]) -> None:
+        if ids:
+            self._collection.delete(ids=ids)
+
+    def search(self, embedding: list[float], k: int) -> list[VectorHit]:
+        results = self._store.similarity_search_by_vector_with_relevance_scores(embedding=embedding, k=k)
+        return [
+            VectorHit(text=doc.page_content, metadata=dict(doc.metadata or {}), distance=float(distance))
+            for doc, distance in results
+        ]
+
+    def count(self) -> int:
+        return self._collection.count()
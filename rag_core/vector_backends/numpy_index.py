@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from rag_core.config import settings
+from rag_core.locks import file_lock
+from rag_core.metrics import metrics
+from rag_core.vector_backends.base import VectorBackend, VectorHit, VectorRecord
+
+
+SUPPORTED_DTYPES = {"float32": np.float32, "float16": np.float16}
+# Rows scored per matrix product, which bounds temporary memory during a scan.
+SCAN_BLOCK_ROWS = 65536
+MIN_CAPACITY = 1024
+IVF_TRAIN_ITERATIONS = 10
+IVF_SAMPLES_PER_LIST = 32
+IVF_MAX_TRAIN_SAMPLES = 100_000
+_SQL_BATCH = 500
+
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class NumpyBackend(VectorBackend):
+    # Vectors live in a memory-mapped row-major matrix (one file, grown by doubling) and
+    # everything else in a SQLite sidecar. Vectors are stored unit length, so a dot
+    # product is the cosine similarity. Deleted rows are tombstoned and reused. Every
+    # worker on the host may open the same directory: writes take a lock on it.
+    max_batch_size = 10000
+
+    def __init__(
+        self,
+        signature: dict[str, Any],
+        directory: Path | None = None,
+        dtype: str | None = None,
+        ivf_min_rows: int | None = None,
+        nprobe: int | None = None,
+    ) -> None:
+        self.directory = directory or settings.vector_index_dir
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ivf_min_rows = settings.vector_ivf_min_rows if ivf_min_rows is None else ivf_min_rows
+        self.nprobe = max(1, nprobe or settings.vector_ivf_nprobe)
+        self._lock = threading.RLock()
+        self._write_lock_path = self.directory / "write.lock"
+        self._writing_depth = 0
+
+        self._db = sqlite3.connect(
+            str(self.directory / "entries.sqlite3"),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "id TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, doc_id TEXT NOT NULL, "
+            "text TEXT NOT NULL, metadata TEXT NOT NULL, list INTEGER NOT NULL DEFAULT -1)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_entries_doc_id ON entries (doc_id)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+        # The layout is fixed when the index is created; later settings only apply to new indexes.
+        dtype_name = self._get_meta("dtype") or dtype or settings.vector_index_dtype
+        if dtype_name not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported vector index dtype '{dtype_name}'.")
+        dimensions = self._get_meta("dimensions") or signature.get("embedding_dimensions")
+        if not dimensions:
+            raise ValueError("Vector index dimensions are unknown.")
+        self._set_meta("dtype", dtype_name)
+        self._set_meta("dimensions", str(dimensions))
+        if not self._get_meta("signature"):
+            self._set_meta("signature", json.dumps(signature))
+
+        self.dtype = SUPPORTED_DTYPES[dtype_name]
+        self.dimensions = int(dimensions)
+        self._row_bytes = self.dimensions * np.dtype(self.dtype).itemsize
+        self._matrix_path = self.directory / f"vectors.{dtype_name}"
+        self._centroids_path = self.directory / "ivf_centroids.npy"
+        self._load()
+
+    def _get_meta(self, key: str) -> str | None:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _load(self) -> None:
+        self._matrix_path.touch(exist_ok=True)
+        capacity = self._matrix_path.stat().st_size // self._row_bytes
+        self._matrix: np.memmap | None = None
+        self._open_matrix(capacity)
+
+        self._id_rows: dict[str, int] = {}
+        self._live = np.zeros(capacity, dtype=bool)
+        self._assign = np.full(capacity, -1, dtype=np.int32)
+        for entry_id, row, list_id in self._db.execute("SELECT id, row, list FROM entries"):
+            if row >= capacity:
+                continue
+            self._id_rows[entry_id] = row
+            self._live[row] = True
+            self._assign[row] = list_id
+        self._size = int(np.flatnonzero(self._live)[-1]) + 1 if self._id_rows else 0
+        # Rows left without an entry (deleted, or written before a crash) are reused.
+        self._free = [int(row) for row in np.flatnonzero(~self._live[: self._size])][::-1]
+
+        self._centroids: np.ndarray | None = None
+        self._trained_rows = int(self._get_meta("ivf_trained_rows") or 0)
+        if self._centroids_path.exists() and self._trained_rows:
+            self._centroids = np.load(self._centroids_path)
+        self._lists_dirty = True
+        self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def _open_matrix(self, capacity: int) -> None:
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        self._capacity = capacity
+        if capacity:
+            self._matrix = np.memmap(self._matrix_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dimensions))
+
+    def _grow(self, needed: int) -> None:
+        if needed <= self._capacity:
+            return
+        capacity = max(MIN_CAPACITY, self._capacity)
+        while capacity < needed:
+            capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self._matrix_path, "r+b") as handle:
+            handle.truncate(capacity * self._row_bytes)
+        self._live = np.concatenate([self._live, np.zeros(capacity - self._capacity, dtype=bool)])
+        self._assign = np.concatenate([self._assign, np.full(capacity - self._capacity, -1, dtype=np.int32)])
+        self._open_matrix(capacity)
+
+    def _refresh(self) -> None:
+        # Another process committed to the sidecar (e.g. a second worker ingesting);
+        # reload so this process serves what is on disk.
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._load()
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        # Free rows are tracked per process, so refresh, row allocation, the matrix write
+        # and the commit happen under one lock shared with every other process on the
+        # index; otherwise two workers can claim the same row and overwrite each other.
+        # Re-entered by the training that an upsert triggers.
+        with self._lock:
+            if self._writing_depth:
+                self._writing_depth += 1
+                try:
+                    yield
+                finally:
+                    self._writing_depth -= 1
+                return
+            with file_lock(self._write_lock_path):
+                self._writing_depth = 1
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    self._writing_depth = 0
+
+    def read_signature(self) -> dict[str, Any]:
+        with self._lock:
+            raw = self._get_meta("signature")
+        return json.loads(raw) if raw else {}
+
+    def write_signature(self, signature: dict[str, Any]) -> None:
+        with self._writing():
+            self._set_meta("signature", json.dumps(signature))
+
+    def sample_dimensions(self) -> int | None:
+        return self.dimensions if self.count() else None
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+    ) -> None:
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions}-dimensional embeddings, got {vectors.shape[-1]}.")
+        vectors = _unit_rows(vectors)
+
+        with self._writing():
+            rows: list[int] = []
+            claimed: dict[str, int] = {}
+            for entry_id in ids:
+                row = claimed.get(entry_id, self._id_rows.get(entry_id))
+                if row is None:
+                    if self._free:
+                        row = self._free.pop()
+                    else:
+                        row = self._size
+                        self._size += 1
+                claimed[entry_id] = row
+                rows.append(row)
+            self._grow(self._size)
+
+            row_index = np.asarray(rows, dtype=np.int64)
+            self._matrix[row_index] = vectors.astype(self.dtype)
+            self._matrix.flush()
+            lists = self._nearest_lists(vectors) if self._centroids is not None else np.full(len(rows), -1)
+
+            # Vectors are on disk before their entries commit, so a crash in between
+            # leaves only unreferenced rows behind.
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO entries (id, row, doc_id, text, metadata, list) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (entry_id, row, str(metadata.get("doc_id", "")), text, json.dumps(metadata), int(list_id))
+                        for entry_id, row, text, metadata, list_id in zip(ids, rows, texts, metadatas, lists)
+                    ],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                self._load()
+                raise
+
+            self._id_rows.update(claimed)
+            self._live[row_index] = True
+            self._assign[row_index] = lists
+            self._lists_dirty = True
+            self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            self._maybe_train()
+
+    def get_by_doc(self, doc_id: str, with_embeddings: bool = False) -> list[VectorRecord]:
+        with self._lock:
+            self._refresh()
+            rows = self._db.execute(
+                "SELECT id, row, text, metadata FROM entries WHERE doc_id = ? ORDER BY row",
+                (doc_id,),
+            ).fetchall()
+            records: list[VectorRecord] = []
+            for entry_id, row, text, metadata in rows:
+                embedding = None
+                if with_embeddings and self._matrix is not None and row < self._capacity:
+                    embedding = self._matrix[row].astype(np.float32).tolist()
+                records.append(VectorRecord(id=entry_id, text=text, metadata=json.loads(metadata), embedding=embedding))
+        return records
+
+    def delete(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        with self._writing():
+            self._db.execute("BEGIN")
+            try:
+                for start in range(0, len(ids), _SQL_BATCH):
+                    batch = ids[start : start + _SQL_BATCH]
+                    placeholders = ",".join("?" for _ in batch)
+                    self._db.execute(f"DELETE FROM entries WHERE id IN ({placeholders})", batch)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+            for entry_id in ids:
+                row = self._id_rows.pop(entry_id, None)
+                if row is None:
+                    continue
+                self._live[row] = False
+                self._assign[row] = -1
+                self._free.append(row)
+            self._lists_dirty = True
+            self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._id_rows)
+
+    def search(self, embedding: list[float], k: int) -> list[VectorHit]:
+        started = time.perf_counter()
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            self._refresh()
+            if not self._id_rows or k <= 0:
+                return []
+            if self._centroids is not None:
+                rows, scores = self._search_ivf(query)
+            else:
+                rows, scores = self._search_exact(query)
+
+            k = min(k, len(rows))
+            if not k:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            best_rows = [int(rows[idx]) for idx in top]
+            best_scores = [float(scores[idx]) for idx in top]
+            entries = self._entries_by_row(best_rows)
+
+        metrics.observe("vector_index.search", time.perf_counter() - started)
+        hits: list[VectorHit] = []
+        for row, score in zip(best_rows, best_scores):
+            entry = entries.get(row)
+            if entry is None:
+                continue
+            text, metadata = entry
+            hits.append(VectorHit(text=text, metadata=metadata, distance=1.0 - score))
+        return hits
+
+    def _score_rows(self, query: np.ndarray, start: int, stop: int) -> np.ndarray:
+        block = self._matrix[start:stop]
+        if self.dtype is not np.float32:
+            block = block.astype(np.float32)
+        return block @ query
+
+    def _search_exact(self, query: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        scores = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, SCAN_BLOCK_ROWS):
+            stop = min(start + SCAN_BLOCK_ROWS, self._size)
+            scores[start:stop] = self._score_rows(query, start, stop)
+        live = np.flatnonzero(self._live[: self._size])
+        return live, scores[live]
+
+    def _search_ivf(self, query: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        self._build_lists()
+        nprobe = min(self.nprobe, len(self._centroids))
+        probes = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.sort(np.concatenate([self._list_order[self._list_bounds[p] : self._list_bounds[p + 1]] for p in probes]))
+        if not len(rows):
+            return rows, np.empty(0, dtype=np.float32)
+        block = self._matrix[rows]
+        if self.dtype is not np.float32:
+            block = block.astype(np.float32)
+        return rows, block @ query
+
+    def _build_lists(self) -> None:
+        # Inverted lists are derived from the per-row assignment and rebuilt lazily after writes.
+        if not self._lists_dirty:
+            return
+        assign = self._assign[: self._size]
+        order = np.argsort(assign, kind="stable")
+        self._list_order = order
+        self._list_bounds = np.searchsorted(assign[order], np.arange(len(self._centroids) + 1))
+        self._lists_dirty = False
+
+    def _entries_by_row(self, rows: list[int]) -> dict[int, tuple[str, dict[str, Any]]]:
+        placeholders = ",".join("?" for _ in rows)
+        result = self._db.execute(
+            f"SELECT row, text, metadata FROM entries WHERE row IN ({placeholders})",
+            rows,
+        ).fetchall()
+        return {row: (text, json.loads(metadata)) for row, text, metadata in result}
+
+    def _nearest_lists(self, vectors: np.ndarray) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), SCAN_BLOCK_ROWS):
+            stop = start + SCAN_BLOCK_ROWS
+            assignments[start:stop] = np.argmax(vectors[start:stop] @ self._centroids.T, axis=1)
+        return assignments
+
+    def _maybe_train(self) -> None:
+        # Small corpora are scanned exactly. Past the threshold a coarse quantizer is
+        # trained, and retrained whenever the corpus has doubled since.
+        live_count = len(self._id_rows)
+        if self.ivf_min_rows <= 0 or live_count < self.ivf_min_rows:
+            return
+        if self._centroids is not None and live_count < 2 * self._trained_rows:
+            return
+        self._train_ivf()
+
+    def _train_ivf(self) -> None:
+        with self._writing():
+            started = time.perf_counter()
+            live = np.flatnonzero(self._live[: self._size])
+            nlist = int(min(4096, max(16, 4 * math.sqrt(len(live)))))
+            rng = np.random.default_rng(0)
+            sample_size = min(len(live), nlist * IVF_SAMPLES_PER_LIST, IVF_MAX_TRAIN_SAMPLES)
+            sample = np.sort(rng.choice(live, size=sample_size, replace=False))
+            train = self._matrix[sample].astype(np.float32)
+            # A low VECTOR_IVF_MIN_ROWS can leave fewer rows than lists.
+            nlist = min(nlist, len(train))
+
+            # Spherical k-means: centroids stay unit length so list scoring is a dot product.
+            centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+            for _ in range(IVF_TRAIN_ITERATIONS):
+                self._centroids = centroids
+                labels = self._nearest_lists(train)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, train)
+                filled = np.bincount(labels, minlength=nlist) > 0
+                centroids = centroids.copy()
+                centroids[filled] = _unit_rows(sums[filled])
+            self._centroids = centroids
+
+            assign = np.full(self._capacity, -1, dtype=np.int32)
+            for start in range(0, len(live), SCAN_BLOCK_ROWS):
+                rows = live[start : start + SCAN_BLOCK_ROWS]
+                block = self._matrix[rows].astype(np.float32)
+                assign[rows] = self._nearest_lists(block)
+
+            np.save(self._centroids_path, centroids)
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "UPDATE entries SET list = ? WHERE row = ?",
+                    [(int(assign[row]), int(row)) for row in live],
+                )
+                self._set_meta("ivf_trained_rows", str(len(live)))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._assign = assign
+            self._trained_rows = len(live)
+            self._lists_dirty = True
+            self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            metrics.observe("vector_index.ivf_train", time.perf_counter() - started)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            self._db.close()
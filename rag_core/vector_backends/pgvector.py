@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from rag_core.config import settings
+from rag_core.db.session import engine
+from rag_core.vector_backends.base import VectorBackend, VectorHit, VectorRecord
+
+
+PGVECTOR_INDEXES = ["hnsw", "ivfflat", "none"]
+# pgvector indexes `vector` columns up to 2000 dimensions; wider embeddings are indexed
+# (and searched) through a half-precision cast, which allows up to 4000.
+MAX_VECTOR_INDEX_DIMENSIONS = 2000
+
+CHUNKS_TABLE = "document_chunks"
+META_TABLE = "vector_index_meta"
+
+
+def _vector_literal(embedding: list[float]) -> str:
+    return "[" + ",".join(repr(float(value)) for value in embedding) + "]"
+
+
+class PgVectorBackend(VectorBackend):
+    # Chunks live next to the documents table on the app's own Postgres engine, so every
+    # replica shares one index and a document delete can drop its chunks in the same
+    # transaction. Chunks are written before their Document row exists (ingestion and
+    # shadow versions), so doc_id is indexed rather than a foreign key.
+    max_batch_size = 500
+
+    def __init__(self, signature: dict[str, Any]) -> None:
+        if engine.dialect.name != "postgresql":
+            raise ValueError("The pgvector backend needs a PostgreSQL SUPABASE_DB_URL.")
+        if settings.pgvector_index not in PGVECTOR_INDEXES:
+            raise ValueError(
+                f"Unsupported PGVECTOR_INDEX '{settings.pgvector_index}'. Choose one of: {', '.join(PGVECTOR_INDEXES)}."
+            )
+
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT NOT NULL)"))
+            recorded = conn.execute(text(f"SELECT value FROM {META_TABLE} WHERE key = 'dimensions'")).scalar()
+            dimensions = int(recorded or signature.get("embedding_dimensions") or 0)
+            if not dimensions:
+                raise ValueError("Vector index dimensions are unknown.")
+            conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {CHUNKS_TABLE} ("
+                    "id TEXT PRIMARY KEY, "
+                    "doc_id VARCHAR(36) NOT NULL, "
+                    "text TEXT NOT NULL, "
+                    "metadata JSONB NOT NULL, "
+                    f"embedding vector({dimensions}) NOT NULL)"
+                )
+            )
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{CHUNKS_TABLE}_doc_id ON {CHUNKS_TABLE} (doc_id)"))
+            conn.execute(
+                text(f"INSERT INTO {META_TABLE} (key, value) VALUES ('dimensions', :value) ON CONFLICT (key) DO NOTHING"),
+                {"value": str(dimensions)},
+            )
+            conn.execute(
+                text(f"INSERT INTO {META_TABLE} (key, value) VALUES ('signature', :value) ON CONFLICT (key) DO NOTHING"),
+                {"value": json.dumps(signature)},
+            )
+
+        self.dimensions = dimensions
+        if dimensions > MAX_VECTOR_INDEX_DIMENSIONS:
+            self._column = f"(embedding::halfvec({dimensions}))"
+            self._query_cast = f"halfvec({dimensions})"
+            self._opclass_prefix = "halfvec"
+        else:
+            self._column = "embedding"
+            self._query_cast = f"vector({dimensions})"
+            self._opclass_prefix = "vector"
+        self._create_ann_index()
+
+    def _create_ann_index(self) -> None:
+        index = settings.pgvector_index
+        if index == "none":
+            return
+        if index == "hnsw":
+            options = f"m = {int(settings.pgvector_hnsw_m)}, ef_construction = {int(settings.pgvector_hnsw_ef_construction)}"
+        else:
+            options = f"lists = {int(settings.pgvector_ivfflat_lists)}"
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{CHUNKS_TABLE}_embedding_{index} ON {CHUNKS_TABLE} "
+                    f"USING {index} ({self._column} {self._opclass_prefix}_cosine_ops) WITH ({options})"
+                )
+            )
+
+    def read_signature(self) -> dict[str, Any]:
+        with engine.connect() as conn:
+            raw = conn.execute(text(f"SELECT value FROM {META_TABLE} WHERE key = 'signature'")).scalar()
+        return json.loads(raw) if raw else {}
+
+    def write_signature(self, signature: dict[str, Any]) -> None:
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"INSERT INTO {META_TABLE} (key, value) VALUES ('signature', :value) "
+                    "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value"
+                ),
+                {"value": json.dumps(signature)},
+            )
+
+    def sample_dimensions(self) -> int | None:
+        with engine.connect() as conn:
+            return conn.execute(text(f"SELECT vector_dims(embedding) FROM {CHUNKS_TABLE} LIMIT 1")).scalar()
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+    ) -> None:
+        if not ids:
+            return
+        rows = [
+            {
+                "id": entry_id,
+                "doc_id": str(metadata.get("doc_id", "")),
+                "text": chunk_text,
+                "metadata": json.dumps(metadata),
+                "embedding": _vector_literal(embedding),
+            }
+            for entry_id, embedding, chunk_text, metadata in zip(ids, embeddings, texts, metadatas)
+        ]
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"INSERT INTO {CHUNKS_TABLE} (id, doc_id, text, metadata, embedding) "
+                    f"VALUES (:id, :doc_id, :text, CAST(:metadata AS JSONB), CAST(:embedding AS vector({self.dimensions}))) "
+                    "ON CONFLICT (id) DO UPDATE SET doc_id = EXCLUDED.doc_id, text = EXCLUDED.text, "
+                    "metadata = EXCLUDED.metadata, embedding = EXCLUDED.embedding"
+                ),
+                rows,
+            )
+
+    def get_by_doc(self, doc_id: str, with_embeddings: bool = False) -> list[VectorRecord]:
+        embedding_column = "embedding::text" if with_embeddings else "NULL"
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text(f"SELECT id, text, metadata, {embedding_column} FROM {CHUNKS_TABLE} WHERE doc_id = :doc_id"),
+                {"doc_id": doc_id},
+            ).all()
+        return [
+            VectorRecord(
+                id=entry_id,
+                text=chunk_text,
+                metadata=dict(metadata or {}),
+                # pgvector's text form ("[0.1,0.2]") is a JSON array.
+                embedding=json.loads(embedding) if embedding else None,
+            )
+            for entry_id, chunk_text, metadata, embedding in rows
+        ]
+
+    def delete(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        statement = text(f"DELETE FROM {CHUNKS_TABLE} WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+        with engine.begin() as conn:
+            for start in range(0, len(ids), self.max_batch_size):
+                conn.execute(statement, {"ids": ids[start : start + self.max_batch_size]})
+
+    def delete_document_in(self, db: Session, doc_id: str) -> bool:
+        db.execute(text(f"DELETE FROM {CHUNKS_TABLE} WHERE doc_id = :doc_id"), {"doc_id": doc_id})
+        return True
+
+    def search(self, embedding: list[float], k: int) -> list[VectorHit]:
+        with engine.begin() as conn:
+            # SET LOCAL scopes the recall/speed knob to this transaction only.
+            if settings.pgvector_index == "hnsw":
+                conn.execute(text(f"SET LOCAL hnsw.ef_search = {max(int(settings.pgvector_ef_search), k)}"))
+            elif settings.pgvector_index == "ivfflat":
+                conn.execute(text(f"SET LOCAL ivfflat.probes = {int(settings.pgvector_probes)}"))
+            rows = conn.execute(
+                text(
+                    f"SELECT text, metadata, {self._column} <=> CAST(:query AS {self._query_cast}) AS distance "
+                    f"FROM {CHUNKS_TABLE} ORDER BY {self._column} <=> CAST(:query AS {self._query_cast}) LIMIT :k"
+                ),
+                {"query": _vector_literal(embedding), "k": k},
+            ).all()
+        return [
+            VectorHit(text=chunk_text, metadata=dict(metadata or {}), distance=float(distance))
+            for chunk_text, metadata, distance in rows
+        ]
+
+    def count(self) -> int:
+        with engine.connect() as conn:
+            return int(conn.execute(text(f"SELECT COUNT(*) FROM {CHUNKS_TABLE}")).scalar() or 0)
+
+    def is_empty(self) -> bool:
+        # Checked before queries; COUNT(*) would scan the whole table each time.
+        with engine.connect() as conn:
+            return not conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {CHUNKS_TABLE})")).scalar()
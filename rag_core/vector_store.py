@@ -1,119 +1,498 @@
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
 
-from langchain_chroma import Chroma
-from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
+from sqlalchemy.orm import Session
 
+from rag_core.cache import TTLCache
 from rag_core.config import settings
-from rag_core.settings_service import SettingsService
+from rag_core.embedding_providers import EmbeddingProvider, EmbeddingProviderError, select_embedding_provider
+from rag_core.embedding_scheduler import EmbeddingScheduler
+from rag_core.locks import ReadWriteLock
+from rag_core.metrics import metrics
+from rag_core.repositories import active_document_versions, bump_corpus_generation, corpus_generation
+from rag_core.text_chunker import TextChunk, hash_chunk
+from rag_core.vector_backends import VectorBackend, VectorHit, VectorRecord, create_backend
+
+
+logger = logging.getLogger(__name__)
+
+# A search whose candidates are mostly inactive versions widens up to this many times limit.
+MAX_SEARCH_WINDOW_FACTOR = 32
 
 
 class VectorStoreError(Exception):
     pass
 
 
-def _probe_embeddings(embeddings) -> bool:
-    try:
-        embeddings.embed_query("healthcheck")
-        return True
-    except Exception:
-        return False
+@dataclass(frozen=True)
+class ReindexStats:
+    reused: int
+    added: int
+    removed: int
 
 
-def _select_embeddings():
-    settings_service = SettingsService()
-    openai_key = settings_service.get_api_key("openai")
-    if openai_key:
-        openai_embeddings = OpenAIEmbeddings(
-            model=settings.openai_embedding_model,
-            api_key=openai_key,
-        )
-        if _probe_embeddings(openai_embeddings):
-            return openai_embeddings
+def _embedding_signature(provider: EmbeddingProvider) -> dict[str, Any]:
+    return {
+        "embedding_provider": provider.name,
+        "embedding_model": provider.model,
+        "embedding_dimensions": provider.dimensions,
+    }
+
 
-    raise VectorStoreError(
-        "No embedding provider available. Configure an OpenAI API key for embeddings."
-    )
+def _normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+def _entry_version(metadata: dict[str, Any]) -> int:
+    # Vectors indexed before versioning carry no version and belong to version 1.
+    return int(metadata.get("version", 1))
 
 
 class VectorStore:
-    def __init__(self) -> None:
-        settings.chroma_dir.mkdir(parents=True, exist_ok=True)
-        self._store: Chroma | None = None
-
-    def _get_store(self) -> Chroma:
-        if self._store is not None:
-            return self._store
-
-        embeddings = _select_embeddings()
-        self._store = Chroma(
-            collection_name="documents",
-            embedding_function=embeddings,
-            persist_directory=str(settings.chroma_dir),
-            collection_metadata={"hnsw:space": "cosine"},
-        )
-        return self._store
+    def __init__(
+        self,
+        version_lookup: Callable[[list[str]], dict[str, int]] | None = None,
+        backend: str | None = None,
+        sync_seconds: float | None = None,
+    ) -> None:
+        self._backend_name = backend or settings.vector_backend
+        # The backend and the embeddings that fill it are opened (and reset) together.
+        self._opened: tuple[VectorBackend, Embeddings] | None = None
+        self._init_lock = threading.Lock()
+        # Searches share the backend; writes, deletes and resets take it exclusively.
+        self._lock = ReadWriteLock()
+        self._version_lookup = version_lookup or active_document_versions
+        self._gc_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-gc")
+        self._query_embeddings = TTLCache(settings.query_cache_size, settings.query_cache_ttl_seconds)
+        self._results = TTLCache(settings.query_cache_size, settings.query_cache_ttl_seconds)
+        self._active_versions = TTLCache(settings.query_cache_size, settings.query_cache_ttl_seconds)
+        # Bumped on every write or delete; cached retrieval results are keyed by it.
+        self._corpus_version = 0
+        # The shared corpus generation last seen, so changes made by other workers also
+        # drop this worker's cached results. It is re-read at most every sync_seconds, so
+        # a question answered from the cache touches neither the database nor the index.
+        self._seen_generation: int | None = None
+        self._sync_seconds = settings.query_cache_sync_seconds if sync_seconds is None else sync_seconds
+        self._synced_at = float("-inf")
+
+    def _open(self) -> tuple[VectorBackend, Embeddings]:
+        opened = self._opened
+        if opened is not None:
+            return opened
+
+        # Ingestion workers can hit a cold store at the same time; open the backend once.
+        with self._init_lock:
+            if self._opened is None:
+                try:
+                    provider = select_embedding_provider()
+                except (EmbeddingProviderError, ValueError) as exc:
+                    raise VectorStoreError(f"No embedding provider available. {exc}") from exc
+                try:
+                    backend = create_backend(_embedding_signature(provider), self._backend_name)
+                except ValueError as exc:
+                    raise VectorStoreError(str(exc)) from exc
+                try:
+                    self._check_embedding_signature(backend, provider)
+                except VectorStoreError:
+                    backend.close()
+                    raise
+                self._opened = (backend, provider.embeddings)
+            return self._opened
 
-    def add_document_chunks(self, doc_id: str, filename: str, chunks: list[str]) -> None:
-        if not chunks:
+    def _get_backend(self) -> VectorBackend:
+        return self._open()[0]
+
+    def _get_embeddings(self) -> Embeddings:
+        return self._open()[1]
+
+    def _check_embedding_signature(self, backend: VectorBackend, provider: EmbeddingProvider) -> None:
+        # Vectors from different models (or sizes) are not comparable, so an index
+        # only ever serves the embedding model that built it.
+        recorded = backend.read_signature()
+        expected = _embedding_signature(provider)
+        if "embedding_model" in recorded:
+            actual = {key: recorded.get(key) for key in expected}
+            if actual != expected:
+                raise VectorStoreError(
+                    "The vector index was built with "
+                    f"{actual['embedding_provider']}/{actual['embedding_model']} ({actual['embedding_dimensions']} dimensions) "
+                    f"but the configured embedding provider is {provider.name}/{provider.model} ({provider.dimensions} dimensions). "
+                    "Switch the embedding provider back or clear the index and re-upload documents."
+                )
             return
 
-        docs = [
-            Document(
-                page_content=chunk,
-                metadata={"doc_id": doc_id, "filename": filename, "chunk_index": idx},
+        # Indexes created before the signature was recorded are adopted when their
+        # vectors have the right size.
+        dimensions = backend.sample_dimensions()
+        if dimensions is not None and dimensions != provider.dimensions:
+            raise VectorStoreError(
+                f"The vector index holds {dimensions}-dimensional vectors but {provider.name}/{provider.model} "
+                f"produces {provider.dimensions}. Switch the embedding provider back or clear the index and re-upload documents."
             )
-            for idx, chunk in enumerate(chunks)
-        ]
-        ids = [f"{doc_id}:{idx}" for idx in range(len(chunks))]
+        backend.write_signature(expected)
+
+    def _chunk_metadata(self, doc_id: str, filename: str, version: int, idx: int, chunk: TextChunk) -> dict[str, Any]:
+        metadata: dict[str, Any] = {
+            "doc_id": doc_id,
+            "filename": filename,
+            "version": version,
+            "chunk_index": idx,
+            "chunk_hash": hash_chunk(chunk.text),
+        }
+        if chunk.page is not None:
+            metadata["page"] = chunk.page
+        return metadata
+
+    def _write(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+    ) -> None:
+        with self._lock.write():
+            backend = self._get_backend()
+            for start in range(0, len(ids), backend.max_batch_size):
+                stop = start + backend.max_batch_size
+                backend.upsert(ids[start:stop], embeddings[start:stop], texts[start:stop], metadatas[start:stop])
 
+    def _clear_cached_results(self) -> None:
+        self._corpus_version += 1
+        self._results.clear()
+        self._active_versions.clear()
+
+    def _bump_corpus_version(self, db: Session | None = None) -> None:
+        self._clear_cached_results()
+        if db is not None:
+            bump_corpus_generation(db)
+            return
         try:
-            self._get_store().add_documents(documents=docs, ids=ids)
+            bump_corpus_generation()
         except Exception as exc:
-            raise VectorStoreError(
-                f"Embedding/indexing failed: {exc}"
-            ) from exc
+            # Other workers then keep their cached results until they expire.
+            logger.warning("Could not publish the corpus change to other workers: %s", exc)
+            metrics.incr("query_cache.publish_errors")
 
-    def delete_document(self, doc_id: str) -> None:
-        try:
-            raw = self._get_store().get(where={"doc_id": doc_id}, include=[])
-            ids = raw.get("ids", []) if isinstance(raw, dict) else []
-            if ids:
-                self._get_store().delete(ids=ids)
-        except Exception:
+    def _sync_due(self) -> bool:
+        return time.monotonic() - self._synced_at >= self._sync_seconds
+
+    def _sync_corpus_generation(self) -> None:
+        if not self._sync_due():
             return
+        self._synced_at = time.monotonic()
+        try:
+            generation = corpus_generation()
+        except Exception as exc:
+            logger.warning("Could not read the corpus generation; skipping cached results: %s", exc)
+            generation = None
+        if generation is None or generation != self._seen_generation:
+            if self._seen_generation is not None:
+                metrics.incr("query_cache.remote_invalidations")
+            self._clear_cached_results()
+            self._seen_generation = generation
 
-    def retrieve(self, query: str, limit: int = 6) -> list[dict[str, Any]]:
-        if self.is_empty():
-            return []
+    def _get_document_entries(self, doc_id: str, with_embeddings: bool = False) -> list[VectorRecord]:
+        return self._get_backend().get_by_doc(doc_id, with_embeddings=with_embeddings)
+
+    def add_document_chunks(
+        self,
+        doc_id: str,
+        filename: str,
+        chunks: list[TextChunk],
+        version: int = 1,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> None:
+        self.write_version(doc_id=doc_id, version=version, filename=filename, chunks=chunks, on_progress=on_progress)
+
+    def write_version(
+        self,
+        doc_id: str,
+        version: int,
+        filename: str,
+        chunks: list[TextChunk],
+        base_version: int | None = None,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> ReindexStats:
+        # Vectors are written under new ids beside the live version; callers flip the
+        # document's active version afterwards and retrieval ignores everything else.
+        reusable: dict[str, list[list[float]]] = {}
+        base_count = 0
+        if base_version is not None:
+            try:
+                with self._lock.read():
+                    entries = self._get_document_entries(doc_id, with_embeddings=True)
+            except Exception as exc:
+                raise VectorStoreError(f"Failed to read existing vectors: {exc}") from exc
+
+            for entry in entries:
+                if _entry_version(entry.metadata) != base_version or entry.embedding is None:
+                    continue
+                # Vectors written before chunk_hash existed are hashed from their stored text.
+                key = entry.metadata.get("chunk_hash") or hash_chunk(entry.text)
+                reusable.setdefault(key, []).append(entry.embedding)
+                base_count += 1
+
+        texts = [chunk.text for chunk in chunks]
+        metadatas = [self._chunk_metadata(doc_id, filename, version, idx, chunk) for idx, chunk in enumerate(chunks)]
+        embeddings: list[list[float] | None] = []
+        for metadata in metadatas:
+            pool = reusable.get(metadata["chunk_hash"])
+            embeddings.append(pool.pop() if pool else None)
+
+        missing = [idx for idx, embedding in enumerate(embeddings) if embedding is None]
+        reused = len(chunks) - len(missing)
+        ids = [f"{doc_id}:{version}:{idx}" for idx in range(len(chunks))]
+        written = 0
+
+        def write_rows(indices: list[int], vectors: list[list[float]]) -> None:
+            nonlocal written
+            self._write(
+                [ids[idx] for idx in indices],
+                vectors,
+                [texts[idx] for idx in indices],
+                [metadatas[idx] for idx in indices],
+            )
+            written += len(indices)
+            if on_progress is not None:
+                on_progress(written)
+
+        def write_batch(offset: int, vectors: list[list[float]]) -> None:
+            write_rows(missing[offset : offset + len(vectors)], vectors)
 
         try:
-            results = self._get_store().similarity_search_with_score(query=query, k=limit)
+            reused_indices = [idx for idx, embedding in enumerate(embeddings) if embedding is not None]
+            if reused_indices:
+                write_rows(reused_indices, [embeddings[idx] for idx in reused_indices])
+            # Each embedded batch is written as soon as it returns.
+            EmbeddingScheduler(self._get_embeddings()).run([texts[idx] for idx in missing], write_batch)
+            self._bump_corpus_version()
         except Exception as exc:
-            raise VectorStoreError(
-                "Vector search failed. Confirm OpenAI embeddings and the vector store are healthy."
-            ) from exc
+            self.delete_version(doc_id, version)
+            raise VectorStoreError(f"Embedding/indexing failed: {exc}") from exc
+
+        return ReindexStats(reused=reused, added=len(missing), removed=base_count - reused)
+
+    def _delete_entries(self, doc_id: str, keep) -> None:
+        try:
+            with self._lock.write():
+                entries = self._get_document_entries(doc_id)
+                doomed = [entry.id for entry in entries if not keep(entry.metadata)]
+                if doomed:
+                    self._get_backend().delete(doomed)
+        except Exception:
+            return
+        if doomed:
+            self._bump_corpus_version()
+
+    def delete_version(self, doc_id: str, version: int) -> None:
+        self._delete_entries(doc_id, keep=lambda metadata: _entry_version(metadata) != version)
+
+    def collect_stale_versions(self, doc_id: str, keep_version: int) -> None:
+        # Called right after the active version flips, so cached results must go now.
+        self._bump_corpus_version()
+        self._gc_executor.submit(
+            self._delete_entries,
+            doc_id,
+            lambda metadata: _entry_version(metadata) == keep_version,
+        )
+
+    def delete_document(self, doc_id: str, db: Session | None = None) -> None:
+        # With a session, backends on the application database delete inside the caller's
+        # transaction; the caller's commit makes the delete visible.
+        if db is not None:
+            try:
+                staged = self._get_backend().delete_document_in(db, doc_id)
+            except VectorStoreError:
+                staged = False
+            if staged:
+                self._bump_corpus_version(db)
+                return
+        self._delete_entries(doc_id, keep=lambda metadata: False)
+
+    def _embed_query(self, query: str, key: str) -> list[float]:
+        embedding = self._query_embeddings.get(key)
+        if embedding is not None:
+            metrics.incr("query_cache.embedding_hits")
+            return embedding
+        metrics.incr("query_cache.embedding_misses")
+        embedding = self._get_embeddings().embed_query(query)
+        self._query_embeddings.set(key, embedding)
+        return embedding
+
+    async def _aembed_query(self, query: str, key: str) -> list[float]:
+        embedding = self._query_embeddings.get(key)
+        if embedding is not None:
+            metrics.incr("query_cache.embedding_hits")
+            return embedding
+        metrics.incr("query_cache.embedding_misses")
+        # Opening the backend can touch disk or the network, so it stays off the event loop.
+        embeddings = await asyncio.to_thread(self._get_embeddings)
+        embedding = await embeddings.aembed_query(query)
+        self._query_embeddings.set(key, embedding)
+        return embedding
+
+    def _cached_hits(self, key: str, limit: int) -> list[dict[str, Any]] | None:
+        cached = self._results.get((self._corpus_version, key, limit))
+        if cached is not None:
+            metrics.incr("query_cache.result_hits")
+            return [dict(hit) for hit in cached]
+        metrics.incr("query_cache.result_misses")
+        return None
+
+    def _active_versions_for(self, doc_ids: list[str], corpus_version: int) -> dict[str, int]:
+        # Cached per document until the next write or delete; only documents without a
+        # cached version cost a database query.
+        versions: dict[str, int] = {}
+        missing: list[str] = []
+        for doc_id in doc_ids:
+            version = self._active_versions.get(doc_id)
+            if version is None:
+                missing.append(doc_id)
+            else:
+                versions[doc_id] = version
+        if missing:
+            fetched = self._version_lookup(missing)
+            versions.update(fetched)
+            # Documents without a row yet (still ingesting) are not cached, so they show
+            # up as soon as their row commits.
+            if corpus_version == self._corpus_version:
+                for doc_id, version in fetched.items():
+                    self._active_versions.set(doc_id, version)
+        return versions
+
+    def _search(self, embedding: list[float], key: str, limit: int, corpus_version: int) -> list[dict[str, Any]]:
+        # Hits from shadow or retired versions are dropped, so the backend is asked for
+        # more than limit. During a replace the shadow chunks can crowd out live ones;
+        # then the search is repeated with a larger window.
+        fetch = limit * 2
+        while True:
+            try:
+                with self._lock.read():
+                    results = self._get_backend().search(embedding, k=fetch)
+            except VectorStoreError:
+                raise
+            except Exception as exc:
+                raise VectorStoreError(
+                    "Vector search failed. Confirm the embedding provider and the vector store are healthy."
+                ) from exc
+
+            hits = self._active_hits(results, corpus_version)
+            # A short page means the index has nothing more to give.
+            if len(hits) >= limit or len(results) < fetch or fetch >= limit * MAX_SEARCH_WINDOW_FACTOR:
+                break
+            metrics.incr("vector_store.search_refetches")
+            fetch *= 4
+
+        hits = hits[:limit]
+        if corpus_version == self._corpus_version:
+            self._results.set((corpus_version, key, limit), hits)
+        return [dict(hit) for hit in hits]
+
+    def _active_hits(self, results: list[VectorHit], corpus_version: int) -> list[dict[str, Any]]:
+        doc_ids = sorted({str(result.metadata.get("doc_id", "")) for result in results})
+        active_versions = self._active_versions_for(doc_ids, corpus_version)
 
         hits: list[dict[str, Any]] = []
-        for doc, distance in results:
-            score = 1.0 / (1.0 + float(distance))
-            metadata = doc.metadata or {}
+        for result in results:
+            metadata = result.metadata
+            doc_id = str(metadata.get("doc_id", ""))
+            if active_versions.get(doc_id) != _entry_version(metadata):
+                continue
+            score = 1.0 / (1.0 + result.distance)
             hits.append(
                 {
-                    "text": doc.page_content,
+                    "text": result.text,
                     "filename": str(metadata.get("filename", "unknown")),
-                    "doc_id": str(metadata.get("doc_id", "")),
+                    "doc_id": doc_id,
+                    "page": metadata.get("page"),
                     "score": score,
                 }
             )
         return hits
 
+    def retrieve(self, query: str, limit: int = 6) -> list[dict[str, Any]]:
+        self._sync_corpus_generation()
+        key = _normalize_query(query)
+        corpus_version = self._corpus_version
+        cached = self._cached_hits(key, limit)
+        if cached is not None:
+            return cached
+        # Only a cache miss is worth checking: an empty index needs no query embedding.
+        if self.is_empty():
+            return []
+
+        try:
+            embedding = self._embed_query(query, key)
+        except VectorStoreError:
+            raise
+        except Exception as exc:
+            raise VectorStoreError(
+                "Vector search failed. Confirm the embedding provider and the vector store are healthy."
+            ) from exc
+        return self._search(embedding, key, limit, corpus_version)
+
+    async def aretrieve(self, query: str, limit: int = 6) -> list[dict[str, Any]]:
+        # The query is embedded with the provider's async client; the index lookup is local
+        # and short, so it runs in a worker thread.
+        if self._sync_due():
+            await asyncio.to_thread(self._sync_corpus_generation)
+        key = _normalize_query(query)
+        corpus_version = self._corpus_version
+        cached = self._cached_hits(key, limit)
+        if cached is not None:
+            return cached
+        if await self.ais_empty():
+            return []
+
+        try:
+            embedding = await self._aembed_query(query, key)
+        except VectorStoreError:
+            raise
+        except Exception as exc:
+            raise VectorStoreError(
+                "Vector search failed. Confirm the embedding provider and the vector store are healthy."
+            ) from exc
+        return await asyncio.to_thread(self._search, embedding, key, limit, corpus_version)
+
     def is_empty(self) -> bool:
+        # An unreachable index is an error, not an empty corpus.
         try:
-            return self._get_store()._collection.count() == 0
+            with self._lock.read():
+                return self._get_backend().is_empty()
         except VectorStoreError:
-            return False
-        except Exception:
-            return True
+            raise
+        except Exception as exc:
+            raise VectorStoreError("The vector store is unavailable. Confirm the vector store is healthy.") from exc
+
+    async def ais_empty(self) -> bool:
+        return await asyncio.to_thread(self.is_empty)
+
+    def reset(self) -> None:
+        # Drops the open backend and embedding client so the next call reopens them from
+        # current settings, e.g. after an API key or embedding provider change. In-flight
+        # operations finish first.
+        with self._lock.write():
+            with self._init_lock:
+                opened, self._opened = self._opened, None
+            self._query_embeddings.clear()
+            # Every worker resets on a settings change, so nothing is published.
+            self._clear_cached_results()
+            if opened is not None:
+                opened[0].close()
+        metrics.incr("vector_store.resets")
+
+    def close(self) -> None:
+        self._gc_executor.shutdown(wait=True)
+        with self._lock.write():
+            with self._init_lock:
+                opened, self._opened = self._opened, None
+            if opened is not None:
+                opened[0].close()
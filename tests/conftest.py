@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Point the app at a throwaway SQLite database and data directory before rag_core is
+# imported; its settings are read once at import time.
+_TEST_ROOT = Path(tempfile.mkdtemp(prefix="rag-chatbot-tests-"))
+os.environ["SUPABASE_DB_URL"] = f"sqlite:///{_TEST_ROOT / 'app.db'}"
+os.environ["DATA_DIR"] = str(_TEST_ROOT / "data")
+os.environ["DOC_STORAGE_BACKEND"] = "local"
+os.environ["EMBEDDING_PROVIDER"] = "hashing"
+os.environ["SETTINGS_NOTIFY"] = "poll"
+
+from rag_core.db import models  # noqa: E402,F401
+from rag_core.db.base import Base  # noqa: E402
+from rag_core.db.schema import ensure_schema  # noqa: E402
+from rag_core.db.session import SessionLocal, engine  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    ensure_schema(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+
+@pytest.fixture
+def make_vector_store(tmp_path, monkeypatch):
+    # VectorStores on a numpy index in a per-test directory, embedding with the offline
+    # hashing provider.
+    import rag_core.vector_store as vector_store_module
+    from rag_core.vector_backends.numpy_index import NumpyBackend
+
+    monkeypatch.setattr(
+        vector_store_module,
+        "create_backend",
+        lambda signature, name=None: NumpyBackend(signature, directory=tmp_path / "vector_index"),
+    )
+    stores = []
+
+    def make(**kwargs):
+        store = vector_store_module.VectorStore(**kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
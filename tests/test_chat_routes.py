@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+
+from app.api.routes import chat
+from rag_core.admission import AdmissionController, AdmissionRejected
+from rag_core.llm_service import LLMService
+from rag_core.metrics import metrics
+from rag_core.settings_service import ProviderLimits, SettingsService
+from tests.test_rag_service import HITS, AsyncOnlyModel, StaticVectorStore
+
+
+class ClosingModel(AsyncOnlyModel):
+    # Notes when its stream is closed, as a provider's HTTP response would be.
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.closed = asyncio.Event()
+
+    async def astream(self, messages):
+        try:
+            async for chunk in super().astream(messages):
+                yield chunk
+        finally:
+            self.closed.set()
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    value = ProviderLimits(max_concurrency=1, max_queue=0, max_wait_seconds=5.0)
+    monkeypatch.setattr(SettingsService, "get_provider_limits", lambda self, provider, data=None: value)
+    return value
+
+
+@pytest.fixture
+def app(monkeypatch, limits):
+    model = ClosingModel(["Revenue "] + ["grew "] * 200, delay=0.05)
+    monkeypatch.setattr(LLMService, "_get_model", lambda self, settings, api_key: (model, False))
+    application = FastAPI()
+    application.include_router(chat.router)
+    application.state.vector_store = StaticVectorStore(HITS)
+    application.state.admission = AdmissionController()
+    application.state.model = model
+    return application
+
+
+class Client:
+    # Drives the ASGI app directly, so a test can disconnect or fail the send at will.
+    def __init__(self, fail_start: bool = False) -> None:
+        self.messages: list[dict] = []
+        self.disconnect = asyncio.Event()
+        self.first_token = asyncio.Event()
+        self.fail_start = fail_start
+        self._body_sent = False
+
+    async def receive(self) -> dict:
+        if not self._body_sent:
+            self._body_sent = True
+            body = json.dumps({"message": "How did revenue change?", "history": []}).encode()
+            return {"type": "http.request", "body": body, "more_body": False}
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "http.response.start" and self.fail_start:
+            raise OSError("connection reset by peer")
+        self.messages.append(message)
+        if b'"token"' in message.get("body", b""):
+            self.first_token.set()
+
+    @property
+    def status(self) -> int:
+        return self.messages[0]["status"]
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {key.decode(): value.decode() for key, value in self.messages[0]["headers"]}
+
+    async def post(self, app: FastAPI, spec_version: str = "2.3") -> None:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": spec_version},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/chat/stream",
+            "raw_path": b"/api/chat/stream",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/json"), (b"host", b"test")],
+            "client": ("127.0.0.1", 5000),
+            "server": ("test", 80),
+            "app": app,
+        }
+        await app(scope, self.receive, self.send)
+
+
+def _gate(app: FastAPI):
+    return app.state.admission._gates["ollama"]
+
+
+def test_full_provider_answers_429_with_retry_after(app, limits):
+    async def scenario() -> Client:
+        running = app.state.admission.enter("ollama", limits)
+        client = Client()
+        try:
+            await client.post(app)
+        finally:
+            running.release()
+        return client
+
+    client = asyncio.run(scenario())
+
+    assert client.status == 429
+    assert int(client.headers["retry-after"]) >= 1
+    assert _gate(app).active == 0
+
+
+def test_ticket_is_released_when_the_response_never_starts(app):
+    async def scenario() -> None:
+        client = Client(fail_start=True)
+        with pytest.raises(Exception):
+            await client.post(app, spec_version="2.4")
+
+    asyncio.run(scenario())
+
+    gate = _gate(app)
+    assert gate.active == 0 and not gate.waiting
+
+
+def test_disconnect_cancels_the_model_stream(app):
+    cancelled_before = metrics.counter("chat.stream.cancelled")
+
+    async def scenario() -> Client:
+        client = Client()
+        request = asyncio.ensure_future(client.post(app))
+        await asyncio.wait_for(client.first_token.wait(), 5)
+        client.disconnect.set()
+        await asyncio.wait_for(request, 5)
+        # The provider stream is closed long before its 10 s of tokens would have ended.
+        await asyncio.wait_for(app.state.model.closed.wait(), 1)
+        return client
+
+    client = asyncio.run(scenario())
+
+    assert client.status == 200
+    assert not any(b'"done"' in message.get("body", b"") for message in client.messages)
+    assert metrics.counter("chat.stream.cancelled") == cancelled_before + 1
+    assert _gate(app).active == 0
+
+
+def test_deployment_limits_are_split_across_workers():
+    limits = ProviderLimits(max_concurrency=4, max_queue=5, max_wait_seconds=5.0)
+
+    async def scenario() -> None:
+        # Three workers: each runs ceil(4 / 3) = 2 generations and queues ceil(5 / 3) = 2.
+        admission = AdmissionController(workers=3)
+        tickets = [admission.enter("openai", limits) for _ in range(4)]
+        assert [ticket.position for ticket in tickets] == [0, 0, 1, 2]
+        with pytest.raises(AdmissionRejected):
+            admission.enter("openai", limits)
+        for ticket in tickets:
+            ticket.release()
+
+        # A limit below the worker count still lets each worker run one.
+        single = AdmissionController(workers=3).enter("ollama", ProviderLimits(1, 0, 5.0))
+        assert single.position == 0
+        single.release()
+
+    asyncio.run(scenario())
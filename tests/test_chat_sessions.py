@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.routes.chat import _recorded
+from rag_core.admission import AdmissionController
+from rag_core.chat_sessions import ChatSessionService, refresh_summary
+from rag_core.db.models import ChatSession
+from rag_core.llm_service import LLMService
+from rag_core.settings_service import ProviderLimits, SettingsService
+
+
+def _session_with_history(db, exchanges: int = 10) -> str:
+    service = ChatSessionService(db)
+    chat_session = service.create()
+    for idx in range(exchanges):
+        service.record_exchange(chat_session.id, f"question {idx} " + "word " * 300, f"answer {idx} " + "word " * 300)
+    return chat_session.id
+
+
+@pytest.fixture
+def summaries(monkeypatch):
+    calls: list[list[dict[str, str]]] = []
+
+    async def acomplete(self, settings, api_key, messages) -> str:
+        calls.append(messages)
+        return "The user asked about ten topics."
+
+    monkeypatch.setattr(LLMService, "acomplete", acomplete)
+    return calls
+
+
+def _limit(monkeypatch, limits: ProviderLimits) -> ProviderLimits:
+    monkeypatch.setattr(SettingsService, "get_provider_limits", lambda self, provider, data=None: limits)
+    return limits
+
+
+async def _chunks(*chunks: str):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _drain(generator) -> list[str]:
+    return [chunk async for chunk in generator]
+
+
+def test_summary_waits_for_a_generation_slot(db, summaries, monkeypatch):
+    limits = _limit(monkeypatch, ProviderLimits(max_concurrency=1, max_queue=4, max_wait_seconds=5.0))
+    session_id = _session_with_history(db)
+
+    async def scenario() -> None:
+        admission = AdmissionController()
+        answer = admission.enter("ollama", limits)
+        summary = asyncio.create_task(refresh_summary(session_id, admission))
+        await asyncio.sleep(0.2)
+        # The running answer holds the only slot.
+        assert summaries == []
+        answer.release()
+        await summary
+        gate = admission._gates["ollama"]
+        assert gate.active == 0 and not gate.waiting
+
+    asyncio.run(scenario())
+
+    assert len(summaries) == 1
+    db.expire_all()
+    assert db.get(ChatSession, session_id).summary == "The user asked about ten topics."
+
+
+def test_summary_is_deferred_when_the_provider_is_full(db, summaries, monkeypatch):
+    limits = _limit(monkeypatch, ProviderLimits(max_concurrency=1, max_queue=0, max_wait_seconds=5.0))
+    session_id = _session_with_history(db)
+
+    async def scenario() -> None:
+        admission = AdmissionController()
+        answer = admission.enter("ollama", limits)
+        await refresh_summary(session_id, admission)
+        assert admission._gates["ollama"].active == 1
+        answer.release()
+
+    asyncio.run(scenario())
+
+    assert summaries == []
+    db.expire_all()
+    assert db.get(ChatSession, session_id).summary is None
+
+
+def test_only_real_answers_are_recorded(db):
+    service = ChatSessionService(db)
+    session_id = service.create().id
+
+    canned = SimpleNamespace(answered=False)
+    asyncio.run(_drain(_recorded(_chunks("Model request failed: timeout"), canned, session_id, "first?")))
+    assert service.list_turns(session_id) == []
+
+    answered = SimpleNamespace(answered=True)
+    asyncio.run(_drain(_recorded(_chunks("Revenue ", "grew."), answered, session_id, "second?")))
+    assert [(turn.role, turn.content) for turn in service.list_turns(session_id)] == [
+        ("user", "second?"),
+        ("assistant", "Revenue grew."),
+    ]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+from uuid import uuid4
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from rag_core.db.models import Document
+from rag_core.db.session import _instrument, async_database_url, dispose_async_engine, get_async_sessionmaker
+from rag_core.metrics import metrics
+from rag_core.repositories import AsyncDocumentRepository
+
+
+def test_async_url_uses_an_async_driver():
+    assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+psycopg://u:p@db:5432/app"
+    assert async_database_url("sqlite:////data/app.db") == "sqlite+aiosqlite:////data/app.db"
+
+
+def test_async_routes_read_the_local_sqlite_database(db):
+    document = Document(
+        id=str(uuid4()),
+        original_name="notes.txt",
+        stored_name="notes.txt",
+        file_type="txt",
+        size_bytes=10,
+        chunk_count=1,
+    )
+    db.add(document)
+    db.commit()
+
+    async def read() -> tuple[Document | None, list[tuple[str, int, int, int]]]:
+        try:
+            async with get_async_sessionmaker()() as session:
+                repo = AsyncDocumentRepository(session)
+                return await repo.get(document.id), await repo.stats_by_type()
+        finally:
+            await dispose_async_engine()
+
+    found, stats = asyncio.run(read())
+
+    assert found is not None and found.original_name == "notes.txt"
+    assert stats == [("txt", 1, 10, 1)]
+
+
+def test_pool_events_time_connects_and_holds_and_count_exhaustion(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=0)
+    _instrument(engine, "test.pool", limit=1)
+
+    for _ in range(2):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    engine.dispose()
+
+    timings = metrics.snapshot()["timings"]
+    # One connection opened, then reused; both checkouts took the only slot.
+    assert timings["test.pool.connect"]["count"] == 1
+    assert timings["test.pool.hold"]["count"] == 2
+    assert metrics.counter("test.pool.exhausted") == 2
+    assert metrics.snapshot()["gauges"]["test.pool.checked_out"] == 0
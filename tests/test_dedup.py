@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import threading
+from uuid import uuid4
+
+from fastapi import UploadFile
+
+from rag_core.db.models import Document, IngestionJob
+from rag_core.db.session import SessionLocal
+from rag_core.document_service import JOB_ACTIVE_STATUSES, JOB_DONE, DocumentService
+from rag_core.repositories import IngestionJobRepository
+from rag_core.storage.local import LocalStorage
+
+
+CONTENT = b"the same quarterly report " * 100
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+class BarrierStorage(LocalStorage):
+    # Holds every upload at the storage write until all of them got there, so each one
+    # has already passed the duplicate lookup.
+    def __init__(self, root_dir, parties: int) -> None:
+        super().__init__(root_dir)
+        self.barrier = threading.Barrier(parties, timeout=10)
+
+    def save_bytes(self, doc_id, ext, content):
+        self.barrier.wait()
+        return super().save_bytes(doc_id, ext, content)
+
+
+def _upload(name: str, content: bytes = CONTENT) -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=name)
+
+
+def _stage(storage, name: str) -> tuple[IngestionJob, bool]:
+    with SessionLocal() as session:
+        service = DocumentService(session, vector_store=None, storage=storage)
+        return asyncio.run(service.stage_upload(_upload(name)))
+
+
+def _indexed_document(db) -> Document:
+    document = Document(
+        id=str(uuid4()),
+        original_name="report.txt",
+        stored_name="existing.txt",
+        file_type="txt",
+        size_bytes=len(CONTENT),
+        chunk_count=4,
+        content_sha256=DIGEST,
+    )
+    db.add(document)
+    db.commit()
+    return document
+
+
+def test_identical_upload_reuses_indexed_document(db, tmp_path):
+    storage = LocalStorage(tmp_path / "uploads")
+    _indexed_document(db)
+    service = DocumentService(db, vector_store=None, storage=storage)
+
+    job, queued = asyncio.run(service.stage_upload(_upload("copy.txt")))
+
+    assert not queued
+    assert job.deduplicated and job.status == JOB_DONE and job.chunk_count == 4
+    assert list(storage.root_dir.iterdir()) == []
+
+
+def test_concurrent_identical_uploads_queue_one_job(db, tmp_path):
+    storage = BarrierStorage(tmp_path / "uploads", parties=2)
+    results: list[tuple[IngestionJob, bool]] = []
+    threads = [
+        threading.Thread(target=lambda name=name: results.append(_stage(storage, name)))
+        for name in ("a.txt", "b.txt")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(queued for _job, queued in results) == [False, True]
+    assert len({job.id for job, _queued in results}) == 1
+    assert len(IngestionJobRepository(db).list_by_status(JOB_ACTIVE_STATUSES)) == 1
+    # The losing upload's bytes are not left behind.
+    assert len(list(storage.root_dir.iterdir())) == 1
+
+
+def test_job_finishes_as_duplicate_when_bytes_were_indexed_meanwhile(db, tmp_path):
+    storage = LocalStorage(tmp_path / "uploads")
+    stored = storage.save_bytes(doc_id="queued", ext=".txt", content=CONTENT)
+    job = IngestionJobRepository(db).upsert(
+        IngestionJob(
+            id=str(uuid4()),
+            document_id=str(uuid4()),
+            original_name="late.txt",
+            stored_name=stored.stored_name,
+            file_type="txt",
+            size_bytes=stored.size_bytes,
+            content_sha256=DIGEST,
+        )
+    )
+    existing = _indexed_document(db)
+    job = IngestionJobRepository(db).claim(job.id, "worker-a", 60, JOB_ACTIVE_STATUSES)
+
+    document = DocumentService(db, vector_store=None, storage=storage).ingest(job)
+
+    assert document.id == existing.id
+    db.refresh(job)
+    assert job.status == JOB_DONE and job.deduplicated and job.document_id == existing.id
+    assert not (storage.root_dir / stored.stored_name).exists()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from rag_core.db.models import Document
+from rag_core.db.schema import ensure_schema
+from rag_core.db.session import dispose_async_engine, engine, get_async_sessionmaker
+from rag_core.document_service import DocumentQueries, _stats_payload
+from rag_core.repositories import _page_statement
+
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _add(db, doc_id: str, name: str, file_type: str, seconds: int, size: int = 10, chunks: int = 1) -> None:
+    db.add(
+        Document(
+            id=doc_id,
+            original_name=name,
+            stored_name=f"{doc_id}.{file_type}",
+            file_type=file_type,
+            size_bytes=size,
+            chunk_count=chunks,
+            created_at=START + timedelta(seconds=seconds),
+        )
+    )
+
+
+def _walk(limit: int, **filters) -> list[str]:
+    # Every page through the service, following next_cursor to the end.
+    async def walk() -> list[str]:
+        try:
+            async with get_async_sessionmaker()() as session:
+                queries = DocumentQueries(session)
+                seen: list[str] = []
+                cursor = None
+                while True:
+                    rows, cursor = await queries.list_page(limit, cursor, **filters)
+                    ids = [row.id for row in rows]
+                    assert not set(ids) & set(seen), "a page repeated earlier rows"
+                    seen.extend(ids)
+                    if cursor is None:
+                        return seen
+        finally:
+            await dispose_async_engine()
+
+    return asyncio.run(walk())
+
+
+def test_pages_break_timestamp_ties_on_id_without_gaps_or_repeats(db):
+    # Three documents per second: every page boundary falls inside a tie.
+    for idx in range(12):
+        _add(db, f"doc-{idx:02d}", f"report-{idx}.pdf", "pdf", seconds=idx // 3)
+    db.commit()
+
+    expected = [f"doc-{idx:02d}" for idx in reversed(range(12))]
+    for limit in (1, 2, 4, 5, 12, 50):
+        assert _walk(limit) == expected
+
+
+def test_name_and_type_filters_apply_across_pages(db):
+    _add(db, "a", "Q1_Revenue.pdf", "pdf", seconds=1)
+    _add(db, "b", "q1-revenue-notes.txt", "txt", seconds=2)
+    _add(db, "c", "Q1%Revenue.pdf", "pdf", seconds=3)
+    _add(db, "d", "budget.pdf", "pdf", seconds=4)
+    _add(db, "e", "Q1 REVENUE.docx", "docx", seconds=5)
+    db.commit()
+
+    assert _walk(1, name="revenue") == ["e", "c", "b", "a"]
+    assert _walk(1, name="revenue", file_type=".PDF") == ["c", "a"]
+    # LIKE wildcards in the filter match themselves only.
+    assert _walk(2, name="q1_") == ["a"]
+    assert _walk(2, name="1%r") == ["c"]
+    assert _walk(2, name="  ") == ["e", "d", "c", "b", "a"]
+
+
+def test_stats_aggregate_per_type_and_overall(db):
+    _add(db, "a", "a.pdf", "pdf", seconds=1, size=100, chunks=4)
+    _add(db, "b", "b.pdf", "pdf", seconds=2, size=50, chunks=0)
+    _add(db, "c", "c.txt", "txt", seconds=3, size=7, chunks=1)
+    db.commit()
+
+    async def stats() -> dict:
+        try:
+            async with get_async_sessionmaker()() as session:
+                return await DocumentQueries(session).storage_stats()
+        finally:
+            await dispose_async_engine()
+
+    assert asyncio.run(stats()) == {
+        "count": 3,
+        "bytes": 157,
+        "chunks": 5,
+        "by_type": [
+            {"file_type": "pdf", "count": 2, "bytes": 150, "chunks": 4},
+            {"file_type": "txt", "count": 1, "bytes": 7, "chunks": 1},
+        ],
+    }
+    assert _stats_payload([]) == {"count": 0, "bytes": 0, "chunks": 0, "by_type": []}
+
+
+def test_documents_from_before_the_python_default_keep_their_place(db):
+    # Rows written by CURRENT_TIMESTAMP carry no fraction; ensure_schema pads them so
+    # they sort with new rows from the same second.
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO documents (id, original_name, stored_name, file_type, size_bytes, chunk_count, created_at) "
+                "VALUES ('legacy', 'old.pdf', 'old.pdf', 'pdf', 1, 1, '2026-01-01 00:00:05')"
+            )
+        )
+    _add(db, "newer", "new.pdf", "pdf", seconds=5)
+    _add(db, "older", "older.pdf", "pdf", seconds=4)
+    db.commit()
+    ensure_schema(engine)
+
+    assert _walk(1) == ["newer", "legacy", "older"]
+
+
+def test_pages_are_read_from_the_created_at_index(db):
+    stmt = _page_statement(50, (START, "doc-00"), None, None)
+    compiled = stmt.compile(engine, compile_kwargs={"literal_binds": True})
+
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+    assert "ix_documents_created_at_id" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+from uuid import uuid4
+
+from fastapi import UploadFile
+
+import rag_core.document_service as document_service
+from rag_core.db.models import Document
+from rag_core.document_service import DocumentService
+from rag_core.extraction import extract_chunks_in_pool
+from rag_core.storage.local import LocalStorage
+from rag_core.text_chunker import TextChunk
+from rag_core.vector_store import ReindexStats
+
+
+class VersionedVectorStore:
+    def __init__(self) -> None:
+        self.versions: dict[str, int] = {}
+
+    def write_version(self, doc_id, version, filename, chunks, base_version=None, on_progress=None) -> ReindexStats:
+        self.versions[doc_id] = version
+        return ReindexStats(reused=0, added=len(chunks), removed=0)
+
+    def delete_version(self, doc_id, version) -> None:
+        pass
+
+    def collect_stale_versions(self, doc_id, keep_version) -> None:
+        pass
+
+
+async def _max_loop_stall(work) -> float:
+    # Longest gap between ticks of a 10 ms heartbeat while work runs.
+    stalls = [0.0]
+    done = asyncio.Event()
+
+    async def heartbeat() -> None:
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    ticker = asyncio.create_task(heartbeat())
+    try:
+        await work
+    finally:
+        done.set()
+        await ticker
+    return max(stalls)
+
+
+def test_extract_chunks_in_pool_parses_text():
+    chunks = extract_chunks_in_pool(".txt", ("alpha beta gamma. " * 400).encode())
+
+    assert chunks and all(isinstance(chunk, TextChunk) for chunk in chunks)
+    assert "alpha beta gamma" in chunks[0].text
+
+
+def test_replace_keeps_the_event_loop_responsive(db, tmp_path, monkeypatch):
+    def slow_extract(ext: str, content: bytes) -> list[TextChunk]:
+        # Stands in for a CPU-heavy parse; run on the loop it would stall every request.
+        time.sleep(0.5)
+        return [TextChunk(text=content.decode())]
+
+    monkeypatch.setattr(document_service, "extract_chunks_in_pool", slow_extract)
+    storage = LocalStorage(tmp_path / "uploads")
+    doc_id = str(uuid4())
+    stored = storage.save_bytes(doc_id=doc_id, ext=".txt", content=b"old text")
+    db.add(
+        Document(
+            id=doc_id,
+            original_name="old.txt",
+            stored_name=stored.stored_name,
+            file_type="txt",
+            size_bytes=stored.size_bytes,
+            chunk_count=1,
+        )
+    )
+    db.commit()
+    service = DocumentService(db, VersionedVectorStore(), storage)
+    upload = UploadFile(file=io.BytesIO(b"new text"), filename="new.txt")
+
+    stall = asyncio.run(_max_loop_stall(service.replace(doc_id, upload)))
+
+    assert stall < 0.25
+    db.expire_all()
+    row = db.get(Document, doc_id)
+    assert row.active_version == 2 and row.original_name == "new.txt"
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import sqlite3
+
+from rag_core.embedding_cache import EmbeddingCache
+
+
+DIMENSIONS = 384
+VECTOR_BYTES = DIMENSIONS * 4
+
+
+def _vectors(prefix: str, count: int) -> dict[str, list[float]]:
+    return {f"{prefix}-{idx}": [float(idx)] * DIMENSIONS for idx in range(count)}
+
+
+def _stored_bytes(path) -> int:
+    with sqlite3.connect(str(path)) as conn:
+        return int(conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0])
+
+
+def test_processes_sharing_the_file_evict_against_one_total(tmp_path):
+    path = tmp_path / "embeddings.sqlite3"
+    cap = 100 * VECTOR_BYTES
+    # Two handles on one file behave like two worker processes.
+    first = EmbeddingCache(path, cap)
+    second = EmbeddingCache(path, cap)
+
+    for round_ in range(3):
+        first.put_many("model", _vectors(f"a{round_}", 60))
+        second.put_many("model", _vectors(f"b{round_}", 60))
+
+    assert _stored_bytes(path) <= cap
+    assert first.size() == second.size() == _stored_bytes(path)
+
+
+def test_rewriting_a_vector_does_not_grow_the_total(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3", 10 * 1024 * 1024)
+    cache.put_many("model", _vectors("a", 10))
+    cache.put_many("model", _vectors("a", 10))
+
+    assert cache.size() == 10 * VECTOR_BYTES == _stored_bytes(tmp_path / "embeddings.sqlite3")
+    assert cache.get_many("model", ["a-3"])["a-3"] == [3.0] * DIMENSIONS
+
+
+def test_large_eviction_returns_free_pages(tmp_path):
+    path = tmp_path / "embeddings.sqlite3"
+    EmbeddingCache(path, 64 * 1024 * 1024).put_many("model", _vectors("bulk", 8000))
+    small = EmbeddingCache(path, 100 * VECTOR_BYTES)
+
+    small.put_many("model", _vectors("new", 1))
+
+    assert small.size() <= 100 * VECTOR_BYTES
+    with sqlite3.connect(str(path)) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_existing_cache_file_is_adopted(tmp_path):
+    path = tmp_path / "embeddings.sqlite3"
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute(
+            "CREATE TABLE embeddings (namespace TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "last_used REAL NOT NULL, PRIMARY KEY (namespace, text_hash))"
+        )
+        conn.execute("INSERT INTO embeddings VALUES ('model', 'old', ?, 0)", (b"\0" * VECTOR_BYTES,))
+
+    cache = EmbeddingCache(path, 10 * 1024 * 1024)
+
+    assert cache.size() == VECTOR_BYTES
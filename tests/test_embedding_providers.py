@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+import rag_core.vector_store as vector_store_module
+from rag_core.embedding_providers import EmbeddingProvider, HashingEmbeddings, select_embedding_provider
+from rag_core.text_chunker import TextChunk
+from rag_core.vector_backends.numpy_index import NumpyBackend
+from rag_core.vector_store import VectorStoreError
+
+
+CHUNKS = [TextChunk(text=f"quarterly revenue grew in region {idx}") for idx in range(3)]
+
+
+def _cosine(left: list[float], right: list[float]) -> float:
+    return sum(a * b for a, b in zip(left, right))
+
+
+def test_hashing_embeddings_are_deterministic_unit_vectors():
+    first = HashingEmbeddings(64)
+    second = HashingEmbeddings(64)
+    text = "Quarterly revenue grew 12% in 2024."
+
+    vector = first.embed_query(text)
+
+    # Same text, new instance: the same vector, as a later process would compute it.
+    assert second.embed_documents([text]) == [vector]
+    assert first.embed_query(text.upper()) == vector
+    assert len(vector) == 64
+    assert math.isclose(math.sqrt(sum(component * component for component in vector)), 1.0)
+
+
+def test_hashing_embeddings_rank_shared_words_higher():
+    embeddings = HashingEmbeddings(384)
+    query = embeddings.embed_query("revenue growth by region")
+
+    related = embeddings.embed_query("revenue growth was strongest in the northern region")
+    unrelated = embeddings.embed_query("the cafeteria menu changes on fridays")
+
+    assert _cosine(query, related) > _cosine(query, unrelated)
+
+
+def test_hashing_embeddings_give_empty_text_a_usable_vector():
+    vector = HashingEmbeddings(8).embed_query("   ")
+
+    assert vector == [1.0] + [0.0] * 7
+
+
+def _switch_provider(monkeypatch, provider: EmbeddingProvider) -> None:
+    monkeypatch.setattr(vector_store_module, "select_embedding_provider", lambda: provider)
+
+
+def test_index_refuses_a_different_embedding_model(make_vector_store, monkeypatch):
+    built = make_vector_store()
+    built.add_document_chunks("report", "report.pdf", CHUNKS)
+    built.close()
+    current = select_embedding_provider()
+    _switch_provider(monkeypatch, EmbeddingProvider("hashing", "other-model", current.dimensions, current.embeddings))
+
+    with pytest.raises(VectorStoreError, match="was built with hashing/"):
+        make_vector_store().retrieve("revenue")
+
+
+def test_index_refuses_different_dimensions(make_vector_store, monkeypatch):
+    built = make_vector_store()
+    built.add_document_chunks("report", "report.pdf", CHUNKS)
+    built.close()
+    current = select_embedding_provider()
+    _switch_provider(monkeypatch, EmbeddingProvider("hashing", current.model, 64, HashingEmbeddings(64)))
+
+    with pytest.raises(VectorStoreError, match="64 dimensions"):
+        make_vector_store().retrieve("revenue")
+
+
+def _unsigned_index(directory, dimensions: int) -> None:
+    # An index from before signatures were recorded: vectors, but no model on file.
+    backend = NumpyBackend({"embedding_dimensions": dimensions}, directory=directory)
+    embeddings = HashingEmbeddings(dimensions)
+    backend.upsert(
+        ["legacy:1:0"],
+        embeddings.embed_documents(["legacy revenue notes"]),
+        ["legacy revenue notes"],
+        [{"doc_id": "legacy", "version": 1, "chunk_index": 0}],
+    )
+    backend.close()
+
+
+def test_unsigned_index_with_matching_vectors_is_adopted(make_vector_store, tmp_path):
+    current = select_embedding_provider()
+    _unsigned_index(tmp_path / "vector_index", current.dimensions)
+
+    store = make_vector_store()
+    store.is_empty()
+
+    assert store._get_backend().read_signature() == {
+        "embedding_provider": current.name,
+        "embedding_model": current.model,
+        "embedding_dimensions": current.dimensions,
+    }
+
+
+def test_unsigned_index_with_other_vectors_is_refused(make_vector_store, tmp_path):
+    _unsigned_index(tmp_path / "vector_index", 16)
+
+    with pytest.raises(VectorStoreError, match="holds 16-dimensional vectors"):
+        make_vector_store().is_empty()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import threading
+
+import httpx
+import pytest
+from langchain_core.embeddings import Embeddings
+
+import rag_core.embedding_scheduler as embedding_scheduler
+from rag_core.embedding_scheduler import EmbeddingScheduler
+
+
+def _status_error(status: int, headers: dict[str, str] | None = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://embeddings.example/v1/embed")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+class FlakyEmbeddings(Embeddings):
+    # Raises the queued errors first (one per call), then embeds each text as [len(text)].
+    def __init__(self, errors: list[Exception] | None = None) -> None:
+        self.errors = list(errors or [])
+        self.calls: list[list[str]] = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        with self._lock:
+            self.calls.append(list(texts))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            error = self.errors.pop(0) if self.errors else None
+        try:
+            if error is not None:
+                raise error
+            threading.Event().wait(0.02)
+            return [[float(len(text))] for text in texts]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def embed_query(self, text: str) -> list[float]:
+        return [float(len(text))]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded: list[float] = []
+    monkeypatch.setattr(embedding_scheduler.time, "sleep", recorded.append)
+    return recorded
+
+
+def _run(scheduler: EmbeddingScheduler, texts: list[str]) -> tuple[list[list[float]], object]:
+    vectors: list[list[float] | None] = [None] * len(texts)
+
+    def on_batch(offset: int, batch: list[list[float]]) -> None:
+        vectors[offset : offset + len(batch)] = batch
+
+    stats = scheduler.run(texts, on_batch)
+    return vectors, stats
+
+
+def test_batches_run_concurrently_and_land_at_their_offsets(sleeps):
+    embeddings = FlakyEmbeddings()
+    texts = ["x" * idx for idx in range(1, 11)]
+
+    vectors, stats = _run(EmbeddingScheduler(embeddings, batch_size=3, max_concurrency=2), texts)
+
+    assert vectors == [[float(idx)] for idx in range(1, 11)]
+    assert stats.batches == 4 and stats.chunks == 10 and stats.retries == 0
+    assert embeddings.peak == 2
+
+
+def test_rate_limited_batch_waits_for_retry_after(sleeps):
+    embeddings = FlakyEmbeddings([_status_error(429, {"retry-after": "7"}), _status_error(503)])
+
+    vectors, stats = _run(EmbeddingScheduler(embeddings, batch_size=10, max_retries=3, base_delay=0.5), ["a", "bb"])
+
+    assert vectors == [[1.0], [2.0]]
+    assert stats.retries == 2
+    assert 7.0 <= sleeps[0] <= 7.5
+    # Without Retry-After the second attempt backs off exponentially with jitter.
+    assert 0.5 <= sleeps[1] <= 1.0
+
+
+def test_client_errors_are_not_retried(sleeps):
+    embeddings = FlakyEmbeddings([_status_error(400)])
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _run(EmbeddingScheduler(embeddings, batch_size=10, max_retries=3), ["a"])
+
+    assert len(embeddings.calls) == 1 and sleeps == []
+
+
+def test_retries_stop_after_max_retries(sleeps):
+    embeddings = FlakyEmbeddings([httpx.ConnectError("refused") for _ in range(5)])
+
+    with pytest.raises(httpx.ConnectError):
+        _run(EmbeddingScheduler(embeddings, batch_size=10, max_retries=2, base_delay=1.0), ["a"])
+
+    assert len(embeddings.calls) == 3
+    assert len(sleeps) == 2 and sleeps[1] <= 2.0
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+
+from rag_core.db.models import Document, IngestionJob
+from rag_core.document_service import JOB_ACTIVE_STATUSES, JOB_DONE, JOB_FAILED, JOB_QUEUED, DocumentService
+from rag_core.ingestion import IngestionQueue
+from rag_core.repositories import IngestionJobRepository
+from rag_core.storage.local import LocalStorage
+
+
+class RecordingVectorStore:
+    # Stands in for VectorStore: records writes and deletes instead of embedding.
+    def __init__(self, write_delay: float = 0.0) -> None:
+        self.write_delay = write_delay
+        self.writes: list[str] = []
+        self.deletes: list[str] = []
+        self._lock = threading.Lock()
+
+    def add_document_chunks(self, doc_id, filename, chunks, version=1, on_progress=None) -> None:
+        time.sleep(self.write_delay)
+        with self._lock:
+            self.writes.append(doc_id)
+        if on_progress is not None:
+            on_progress(len(chunks))
+
+    def delete_document(self, doc_id, db=None) -> None:
+        with self._lock:
+            self.deletes.append(doc_id)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(tmp_path / "uploads")
+
+
+def _queue_job(db, storage, content: bytes = b"hello world " * 200) -> IngestionJob:
+    doc_id = str(uuid4())
+    stored = storage.save_bytes(doc_id=doc_id, ext=".txt", content=content)
+    job = IngestionJob(
+        id=str(uuid4()),
+        document_id=doc_id,
+        original_name="notes.txt",
+        stored_name=stored.stored_name,
+        file_type="txt",
+        size_bytes=stored.size_bytes,
+        status=JOB_QUEUED,
+    )
+    return IngestionJobRepository(db).upsert(job)
+
+
+def _wait_for(db, job_id: str, timeout: float = 30.0) -> IngestionJob:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.expire_all()
+        job = db.get(IngestionJob, job_id)
+        if job.status not in JOB_ACTIVE_STATUSES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_claim_is_exclusive(db, storage):
+    job = _queue_job(db, storage)
+    first = IngestionJobRepository(db).claim(job.id, "worker-a", 60, JOB_ACTIVE_STATUSES)
+    second = IngestionJobRepository(db).claim(job.id, "worker-b", 60, JOB_ACTIVE_STATUSES)
+
+    assert first is not None and first.claimed_by == "worker-a"
+    assert second is None
+
+
+def test_expired_lease_can_be_taken_over(db, storage):
+    job = _queue_job(db, storage)
+    repo = IngestionJobRepository(db)
+    assert repo.claim(job.id, "crashed-worker", -1, JOB_ACTIVE_STATUSES) is not None
+
+    taken = repo.claim(job.id, "worker-b", 60, JOB_ACTIVE_STATUSES)
+
+    assert taken is not None and taken.claimed_by == "worker-b"
+    # The previous owner can no longer write progress.
+    assert not repo.hold(taken, "crashed-worker", 60, status=JOB_FAILED)
+
+
+def test_two_queues_resuming_one_job_ingest_it_once(db, storage):
+    job = _queue_job(db, storage)
+    vector_store = RecordingVectorStore(write_delay=0.2)
+    queues = [IngestionQueue(vector_store, storage, max_workers=2) for _ in range(2)]
+    try:
+        for queue in queues:
+            queue.resume_pending()
+        finished = _wait_for(db, job.id)
+    finally:
+        for queue in queues:
+            queue.shutdown()
+
+    assert finished.status == JOB_DONE
+    assert vector_store.writes == [job.document_id]
+    document = db.get(Document, job.document_id)
+    assert document is not None and document.chunk_count == finished.chunk_count
+    assert storage.read_bytes(document.stored_name)
+
+
+def test_job_without_text_fails_and_cleans_up(db, storage):
+    job = _queue_job(db, storage, content=b"   \n  ")
+    vector_store = RecordingVectorStore()
+    queue = IngestionQueue(vector_store, storage, max_workers=1)
+    try:
+        queue.submit(job.id)
+        finished = _wait_for(db, job.id)
+    finally:
+        queue.shutdown()
+
+    assert finished.status == JOB_FAILED
+    assert "No readable text" in finished.error
+    assert not (storage.root_dir / job.stored_name).exists()
+    assert db.get(Document, job.document_id) is None
+
+
+def test_failure_never_removes_a_committed_document(db, storage):
+    job = _queue_job(db, storage)
+    db.add(
+        Document(
+            id=job.document_id,
+            original_name=job.original_name,
+            stored_name=job.stored_name,
+            file_type=job.file_type,
+            size_bytes=job.size_bytes,
+            chunk_count=3,
+        )
+    )
+    db.commit()
+    job = IngestionJobRepository(db).claim(job.id, "worker-a", 60, JOB_ACTIVE_STATUSES)
+    vector_store = RecordingVectorStore()
+    service = DocumentService(db, vector_store, storage)
+
+    service._fail_job(job, "worker-a", "UNIQUE constraint failed: documents.stored_name")
+
+    assert (storage.root_dir / job.stored_name).exists()
+    assert vector_store.deletes == []
+    db.refresh(job)
+    assert job.status == JOB_DONE and job.chunks_indexed == 3
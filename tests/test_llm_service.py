@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import rag_core.llm_service as llm_service
+from rag_core.llm_service import LLMService, aclose_http_clients, clear_client_cache
+from rag_core.metrics import metrics
+from rag_core.settings_service import EffectiveSettings
+
+
+def _settings(provider: str, model: str) -> EffectiveSettings:
+    return EffectiveSettings(provider=provider, model=model, ollama_base_url="http://127.0.0.1:11434", temperature=0.2)
+
+
+def _transports(model) -> tuple[object, object]:
+    if hasattr(model, "http_client"):
+        return model.http_client._transport, model.http_async_client._transport
+    if hasattr(model, "google_api_key"):
+        api_client = model.client._api_client
+        return api_client._httpx_client._transport, api_client._async_httpx_client._transport
+    return model._client._client._transport, model._async_client._client._transport
+
+
+@pytest.fixture(autouse=True)
+def _fresh_clients():
+    asyncio.run(aclose_http_clients())
+    yield
+    asyncio.run(aclose_http_clients())
+
+
+def test_cached_models_reuse_one_model_per_key():
+    service = LLMService()
+    first, warm_first = service._get_model(_settings("openai", "gpt-4o-mini"), "sk-one")
+    second, warm_second = service._get_model(_settings("openai", "gpt-4o-mini"), "sk-one")
+
+    assert first is second
+    assert (warm_first, warm_second) == (False, True)
+
+
+def test_every_model_shares_the_process_connection_pools():
+    service = LLMService()
+    openai, _ = service._get_model(_settings("openai", "gpt-4o-mini"), "sk-one")
+    other_key, _ = service._get_model(_settings("openai", "gpt-4o-mini"), "sk-two")
+    ollama, _ = service._get_model(_settings("ollama", "llama3.1:8b"), None)
+    anthropic, _ = service._get_model(_settings("anthropic", "claude-3-5-haiku-latest"), "sk-ant")
+    gemini, _ = service._get_model(_settings("gemini", "gemini-2.5-flash"), "gm-key")
+
+    shared = llm_service._transports
+    assert _transports(openai) == _transports(other_key) == _transports(ollama) == _transports(gemini) == shared
+    assert (anthropic._client._client, anthropic._async_client._client) == llm_service._anthropic_clients
+
+
+def test_dropping_cached_models_keeps_the_pools_open():
+    service = LLMService()
+    before, _ = service._get_model(_settings("groq", "llama-3.1-8b-instant"), "gsk-one")
+    transports = llm_service._transports
+
+    clear_client_cache()
+    after, warm = service._get_model(_settings("groq", "llama-3.1-8b-instant"), "gsk-one")
+
+    assert after is not before and not warm
+    assert _transports(after) == transports
+
+
+def test_shutdown_closes_the_pools(monkeypatch):
+    service = LLMService()
+    service._get_model(_settings("openai", "gpt-4o-mini"), "sk-one")
+    transport, async_transport = llm_service._transports
+    closed: list[str] = []
+    monkeypatch.setattr(transport, "close", lambda: closed.append("sync"))
+
+    async def aclose() -> None:
+        closed.append("async")
+
+    monkeypatch.setattr(async_transport, "aclose", aclose)
+
+    asyncio.run(aclose_http_clients())
+
+    assert closed == ["sync", "async"]
+    assert llm_service._transports is None and llm_service._anthropic_clients is None
+    assert len(llm_service._clients) == 0
+
+
+class OneTokenModel:
+    async def astream(self, messages):
+        yield type("Chunk", (), {"content": "Hi"})()
+
+
+def test_time_to_first_token_is_recorded_for_new_and_reused_clients_apart(monkeypatch):
+    monkeypatch.setattr(LLMService, "_build_model", lambda self, settings, api_key: OneTokenModel())
+    before = metrics.snapshot()["histograms"]
+    service = LLMService()
+
+    async def answer() -> None:
+        async for _text in service.astream_completion(_settings("openai", "gpt-4o-mini"), "sk-one", []):
+            pass
+
+    for _ in range(3):
+        asyncio.run(answer())
+
+    after = metrics.snapshot()["histograms"]
+    # The first answer built the client; the next two reused it.
+    assert after["llm.ttft.cold"]["le_inf"] - before.get("llm.ttft.cold", {}).get("le_inf", 0) == 1
+    assert after["llm.ttft.warm"]["le_inf"] - before.get("llm.ttft.warm", {}).get("le_inf", 0) == 2
+    assert after["llm.ttft.warm"]["le_50ms"] == after["llm.ttft.warm"]["le_inf"]
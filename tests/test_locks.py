@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from rag_core.locks import ReadWriteLock, file_lock
+
+
+def _start(target) -> threading.Thread:
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(2, timeout=5)
+
+    def reader() -> None:
+        with lock.read():
+            # Both readers must be inside at once to get past the barrier.
+            inside.wait()
+
+    threads = [_start(reader) for _ in range(2)]
+    for thread in threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+
+def test_waiting_writer_goes_before_new_readers():
+    lock = ReadWriteLock()
+    order: list[str] = []
+    release_first = threading.Event()
+    first_inside = threading.Event()
+
+    def first_reader() -> None:
+        with lock.read():
+            first_inside.set()
+            release_first.wait(5)
+            order.append("first reader")
+
+    def writer() -> None:
+        with lock.write():
+            order.append("writer")
+
+    def late_reader() -> None:
+        with lock.read():
+            order.append("late reader")
+
+    threads = [_start(first_reader)]
+    first_inside.wait(5)
+    threads.append(_start(writer))
+    _wait_until(lambda: lock._writers_waiting == 1)
+    threads.append(_start(late_reader))
+    # The late reader would get in now if readers could overtake a waiting writer.
+    time.sleep(0.1)
+    assert order == []
+
+    release_first.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["first reader", "writer", "late reader"]
+
+
+def test_writer_excludes_readers():
+    lock = ReadWriteLock()
+    entered = threading.Event()
+
+    def reader() -> None:
+        with lock.read():
+            entered.set()
+
+    with lock.write():
+        thread = _start(reader)
+        assert not entered.wait(0.1)
+    thread.join(timeout=5)
+    assert entered.is_set()
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    path = tmp_path / "settings.json.lock"
+    entered = threading.Event()
+
+    def contender() -> None:
+        with file_lock(path):
+            entered.set()
+
+    with file_lock(path):
+        thread = _start(contender)
+        assert not entered.wait(0.1)
+    thread.join(timeout=5)
+    assert entered.is_set()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+
+import rag_core.model_catalog as model_catalog
+from rag_core.model_catalog import ModelCatalog
+
+
+BASE_URL = "http://ollama.test:11434"
+
+
+class FakeOllama:
+    # Serves /api/tags with whatever models it holds, after a delay, or fails.
+    def __init__(self, models: list[str], delay: float = 0.0) -> None:
+        self.models = models
+        self.delay = delay
+        self.failing = False
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.failing:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"models": [{"name": name} for name in self.models]})
+
+
+def _catalog(upstream: FakeOllama, ttl_seconds: float = 300.0) -> ModelCatalog:
+    catalog = ModelCatalog()
+    catalog.ttl_seconds = ttl_seconds
+    catalog._client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    return catalog
+
+
+async def _settle(catalog: ModelCatalog) -> None:
+    # Waits for background refreshes to finish.
+    while catalog._inflight:
+        await asyncio.gather(*catalog._inflight.values())
+
+
+def test_concurrent_misses_share_one_upstream_call():
+    upstream = FakeOllama(["llama3.1:8b", "qwen2.5:7b"], delay=0.05)
+
+    async def scenario() -> list[list[str] | None]:
+        catalog = _catalog(upstream)
+        try:
+            return await asyncio.gather(*(catalog.models("ollama", BASE_URL) for _ in range(10)))
+        finally:
+            await catalog.aclose()
+
+    results = asyncio.run(scenario())
+
+    assert upstream.calls == 1
+    assert results == [["llama3.1:8b", "qwen2.5:7b"]] * 10
+
+
+def test_a_caller_going_away_does_not_cancel_the_shared_lookup():
+    upstream = FakeOllama(["llama3.1:8b"], delay=0.1)
+
+    async def scenario() -> list[str] | None:
+        catalog = _catalog(upstream)
+        try:
+            impatient = asyncio.ensure_future(catalog.models("ollama", BASE_URL))
+            patient = asyncio.ensure_future(catalog.models("ollama", BASE_URL))
+            await asyncio.sleep(0.02)
+            impatient.cancel()
+            return await patient
+        finally:
+            await catalog.aclose()
+
+    assert asyncio.run(scenario()) == ["llama3.1:8b"]
+    assert upstream.calls == 1
+
+
+def test_stale_list_is_served_while_one_refresh_runs():
+    upstream = FakeOllama(["llama3.1:8b"])
+
+    async def scenario() -> None:
+        catalog = _catalog(upstream, ttl_seconds=0.05)
+        try:
+            assert await catalog.models("ollama", BASE_URL) == ["llama3.1:8b"]
+            await asyncio.sleep(0.06)
+            upstream.models = ["llama3.1:8b", "mistral:7b"]
+            upstream.delay = 0.2
+
+            started = time.perf_counter()
+            stale = await asyncio.gather(*(catalog.models("ollama", BASE_URL) for _ in range(5)))
+            # Answered from memory, without waiting for the slow upstream.
+            assert time.perf_counter() - started < 0.1
+            assert stale == [["llama3.1:8b"]] * 5
+
+            await _settle(catalog)
+            assert await catalog.models("ollama", BASE_URL) == ["llama3.1:8b", "mistral:7b"]
+        finally:
+            await catalog.aclose()
+
+    asyncio.run(scenario())
+
+    # The first lookup and a single refresh for all five stale reads.
+    assert upstream.calls == 2
+
+
+def test_failures_keep_the_last_list_and_are_retried_after_the_failure_ttl(monkeypatch):
+    monkeypatch.setattr(model_catalog, "FAILURE_TTL_SECONDS", 0.1)
+    upstream = FakeOllama(["llama3.1:8b"])
+
+    async def scenario() -> None:
+        catalog = _catalog(upstream, ttl_seconds=0.0)
+        try:
+            assert await catalog.models("ollama", BASE_URL) == ["llama3.1:8b"]
+            upstream.failing = True
+            # Stale, so a refresh starts; it fails but the last good list is kept.
+            assert await catalog.models("ollama", BASE_URL) == ["llama3.1:8b"]
+            await _settle(catalog)
+            calls = upstream.calls
+
+            # Within the failure window the dead endpoint is not asked again.
+            for _ in range(5):
+                assert await catalog.models("ollama", BASE_URL) == ["llama3.1:8b"]
+            assert upstream.calls == calls
+
+            upstream.failing = False
+            upstream.models = ["mistral:7b"]
+            await asyncio.sleep(0.11)
+            await catalog.models("ollama", BASE_URL)
+            await _settle(catalog)
+            assert upstream.calls == calls + 1
+            assert await catalog.models("ollama", BASE_URL) == ["mistral:7b"]
+        finally:
+            await catalog.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_a_failure_with_nothing_known_is_remembered(monkeypatch):
+    monkeypatch.setattr(model_catalog, "FAILURE_TTL_SECONDS", 30.0)
+    upstream = FakeOllama([])
+    upstream.failing = True
+
+    async def scenario() -> list[list[str] | None]:
+        catalog = _catalog(upstream)
+        try:
+            return [await catalog.models("ollama", BASE_URL) for _ in range(3)]
+        finally:
+            await catalog.aclose()
+
+    assert asyncio.run(scenario()) == [None, None, None]
+    assert upstream.calls == 1
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import multiprocessing
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from rag_core.vector_backends.numpy_index import NumpyBackend
+
+
+SIGNATURE = {"embedding_provider": "test", "embedding_model": "test", "embedding_dimensions": 32}
+
+
+def _clustered(count: int, dimensions: int = 32, clusters: int = 40, seed: int = 7) -> np.ndarray:
+    # Points scattered around random centres, like embeddings of documents on a few topics.
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimensions))
+    labels = rng.integers(0, clusters, size=count)
+    return (centres[labels] + 0.35 * rng.normal(size=(count, dimensions))).astype(np.float32)
+
+
+def _fill(backend: NumpyBackend, vectors: np.ndarray) -> None:
+    for start in range(0, len(vectors), backend.max_batch_size):
+        block = vectors[start : start + backend.max_batch_size]
+        ids = [f"row-{start + idx}" for idx in range(len(block))]
+        backend.upsert(ids, block.tolist(), ids, [{"doc_id": "corpus"} for _ in ids])
+
+
+def _vector(entry_id: str) -> np.ndarray:
+    vector = np.random.default_rng(zlib.crc32(entry_id.encode())).normal(size=32)
+    return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+def _write_rows(directory: str, worker: str, count: int) -> None:
+    # One worker process adding its own chunks a few at a time.
+    backend = NumpyBackend(SIGNATURE, directory=Path(directory), ivf_min_rows=0)
+    try:
+        for start in range(0, count, 4):
+            ids = [f"{worker}-{idx}" for idx in range(start, start + 4)]
+            backend.upsert(ids, [_vector(entry_id).tolist() for entry_id in ids], ids, [{"doc_id": worker} for _ in ids])
+    finally:
+        backend.close()
+
+
+def _top_ids(backend: NumpyBackend, query: np.ndarray, k: int) -> set[str]:
+    return {hit.text for hit in backend.search(query.tolist(), k=k)}
+
+
+def test_ivf_recall_matches_brute_force(tmp_path):
+    # Held-out points from the same topics serve as queries.
+    vectors, queries = np.split(_clustered(6050), [6000])
+    exact = NumpyBackend(SIGNATURE, directory=tmp_path / "exact", ivf_min_rows=0)
+    ivf = NumpyBackend(SIGNATURE, directory=tmp_path / "ivf", ivf_min_rows=5000, nprobe=8)
+    try:
+        _fill(exact, vectors)
+        _fill(ivf, vectors)
+        assert ivf._centroids is not None and exact._centroids is None
+
+        found = sum(len(_top_ids(ivf, query, 10) & _top_ids(exact, query, 10)) for query in queries)
+    finally:
+        exact.close()
+        ivf.close()
+
+    assert found / (10 * len(queries)) >= 0.9
+
+
+def test_ivf_trains_on_fewer_rows_than_lists(tmp_path):
+    vectors = _clustered(8)
+    backend = NumpyBackend(SIGNATURE, directory=tmp_path / "tiny", ivf_min_rows=5, nprobe=4)
+    try:
+        _fill(backend, vectors)
+
+        assert backend._centroids is not None and len(backend._centroids) == 8
+        hits = backend.search(vectors[3].tolist(), k=3)
+    finally:
+        backend.close()
+
+    assert hits[0].text == "row-3"
+
+
+def test_workers_sharing_an_index_never_claim_the_same_row(tmp_path):
+    directory = tmp_path / "shared"
+    NumpyBackend(SIGNATURE, directory=directory, ivf_min_rows=0).close()
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_write_rows, args=(str(directory), name, 400)) for name in ("a", "b")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    backend = NumpyBackend(SIGNATURE, directory=directory, ivf_min_rows=0)
+    try:
+        assert backend.count() == 800
+        for name in ("a", "b"):
+            records = backend.get_by_doc(name, with_embeddings=True)
+            assert len(records) == 400
+            for record in records:
+                assert np.allclose(record.embedding, _vector(record.id), atol=1e-6)
+    finally:
+        backend.close()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import rag_core.pdf_extractor as pdf_extractor
+from rag_core.extraction import create_process_pool, recycle_process_pool
+from rag_core.pdf_extractor import extract_page_range, extract_pdf_pages
+
+
+def make_pdf(page_count: int, lines_per_page: int = 30) -> bytes:
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(page_count):
+        lines = [
+            f"BT /F1 10 Tf 40 {780 - line * 18} Td (Page {page + 1} line {line} lorem ipsum dolor) Tj ET"
+            for line in range(lines_per_page)
+        ]
+        stream = "\n".join(lines).encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        kids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+class FakePage:
+    def __init__(self, text: str, delay: float = 0.0, broken: bool = False) -> None:
+        self.text = text
+        self.delay = delay
+        self.broken = broken
+
+    def extract_text(self) -> str:
+        time.sleep(self.delay)
+        if self.broken:
+            raise ValueError("corrupt content stream")
+        return self.text
+
+
+def fake_reader(pages: list[FakePage], failing_opens: set[int] = frozenset()):
+    opens = []
+
+    class FakeReader:
+        def __init__(self, path) -> None:
+            opens.append(path)
+            if len(opens) in failing_opens:
+                raise OSError("cannot reopen")
+            self.pages = pages
+
+    return FakeReader, opens
+
+
+def test_slow_page_is_skipped(monkeypatch):
+    pages = [FakePage("one"), FakePage("two", delay=2.0), FakePage("three")]
+    reader, _opens = fake_reader(pages)
+    monkeypatch.setattr(pdf_extractor, "PdfReader", reader)
+
+    started = time.perf_counter()
+    results = extract_page_range("doc.pdf", 0, 3, page_timeout=0.2)
+
+    assert results == [(1, "one"), (2, None), (3, "three")]
+    assert time.perf_counter() - started < 1.5
+
+
+def test_failed_reopen_only_skips_that_page(monkeypatch):
+    pages = [FakePage("one"), FakePage("two", broken=True), FakePage("three"), FakePage("four")]
+    # The first open works; reopening after the broken page fails once, then works.
+    reader, opens = fake_reader(pages, failing_opens={2})
+    monkeypatch.setattr(pdf_extractor, "PdfReader", reader)
+
+    results = extract_page_range("doc.pdf", 0, 4, page_timeout=0)
+
+    assert results == [(1, "one"), (2, None), (3, None), (4, "four")]
+    assert len(opens) == 3
+
+
+def test_extract_pdf_pages_reads_every_page():
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pages = extract_pdf_pages(make_pdf(5), pool, pages_per_task=2)
+
+    assert [page.number for page in pages] == [1, 2, 3, 4, 5]
+    assert "Page 3 line 0" in pages[2].text
+
+
+def _pid_after(seconds: float) -> int:
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_document_timeout_frees_the_pool_workers():
+    pool = create_process_pool(2)
+    # Start both workers up front so the page ranges are running when the budget ends.
+    workers = {future.result() for future in [pool.submit(_pid_after, 0.3) for _ in range(2)]}
+    abandoned = []
+
+    def on_abandoned() -> None:
+        abandoned.append(True)
+        recycle_process_pool(pool)
+
+    # Each range takes far longer than the wait below, so only stopping the workers passes.
+    pages = extract_pdf_pages(
+        make_pdf(2000), pool, document_timeout=0.2, pages_per_task=1000, on_abandoned=on_abandoned
+    )
+
+    assert abandoned == [True]
+    assert len(pages) < 2000
+    # The pool's manager thread reaps the stopped workers.
+    deadline = time.monotonic() + 5
+    while any(_is_running(pid) for pid in workers) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not any(_is_running(pid) for pid in workers)
+    with pytest.raises(RuntimeError):
+        pool.submit(time.sleep, 0)
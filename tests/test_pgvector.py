@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+import rag_core.vector_backends.pgvector as pgvector
+from rag_core.vector_backends.pgvector import CHUNKS_TABLE, META_TABLE, PgVectorBackend
+
+
+# The suite runs on SQLite; these run only against a Postgres with the vector extension
+# available, e.g. PGVECTOR_TEST_DB_URL=postgresql+psycopg://postgres@localhost/rag_test
+DB_URL = os.getenv("PGVECTOR_TEST_DB_URL")
+pytestmark = pytest.mark.skipif(not DB_URL, reason="PGVECTOR_TEST_DB_URL is not set")
+
+SIGNATURE = {"embedding_provider": "test", "embedding_model": "test", "embedding_dimensions": 4}
+
+
+def _drop_tables(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {CHUNKS_TABLE}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {META_TABLE}"))
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    engine = create_engine(DB_URL)
+    _drop_tables(engine)
+    monkeypatch.setattr(pgvector, "engine", engine)
+    yield PgVectorBackend(SIGNATURE)
+    _drop_tables(engine)
+    engine.dispose()
+
+
+def _add(backend: PgVectorBackend, doc_id: str, vectors: list[list[float]]) -> None:
+    ids = [f"{doc_id}:1:{idx}" for idx in range(len(vectors))]
+    texts = [f"{doc_id} chunk {idx}" for idx in range(len(vectors))]
+    backend.upsert(ids, vectors, texts, [{"doc_id": doc_id, "version": 1} for _ in ids])
+
+
+def test_upsert_and_search(backend):
+    assert backend.is_empty()
+    _add(backend, "north", [[1.0, 0.0, 0.0, 0.0], [0.9, 0.1, 0.0, 0.0]])
+    _add(backend, "south", [[0.0, 0.0, 1.0, 0.0]])
+    # Upserting an existing id replaces it.
+    _add(backend, "south", [[0.0, 0.0, 0.0, 1.0]])
+
+    assert not backend.is_empty()
+    assert backend.count() == 3
+    hits = backend.search([0.0, 0.0, 0.1, 1.0], k=2)
+    assert [hit.text for hit in hits] == ["south chunk 0", "north chunk 1"]
+    assert hits[0].distance < hits[1].distance
+    records = backend.get_by_doc("south", with_embeddings=True)
+    assert [record.embedding for record in records] == [[0.0, 0.0, 0.0, 1.0]]
+    assert records[0].metadata == {"doc_id": "south", "version": 1}
+
+
+def test_document_delete_follows_the_callers_transaction(backend):
+    _add(backend, "north", [[1.0, 0.0, 0.0, 0.0], [0.9, 0.1, 0.0, 0.0]])
+    _add(backend, "south", [[0.0, 0.0, 1.0, 0.0]])
+
+    with Session(pgvector.engine) as db:
+        assert backend.delete_document_in(db, "north")
+        db.rollback()
+    assert backend.count() == 3
+
+    with Session(pgvector.engine) as db:
+        backend.delete_document_in(db, "north")
+        db.commit()
+    assert backend.get_by_doc("north") == []
+    assert backend.count() == 1
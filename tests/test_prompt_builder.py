@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from rag_core.prompt_builder import build_prompt, estimate_tokens, prompt_budget
+
+
+SYSTEM = "Answer only from the provided context."
+WINDOW = 3024  # 2000 tokens of prompt after the default 1024-token answer reserve
+
+
+def _hit(idx: int, score: float, words: int = 200) -> dict:
+    return {"text": f"fact{idx} " + "detail " * words, "filename": f"doc{idx}.pdf", "page": 1, "score": score}
+
+
+def _turns(count: int, words: int = 60) -> list[dict[str, str]]:
+    return [
+        {"role": "user" if idx % 2 == 0 else "assistant", "content": f"turn{idx} " + "word " * words}
+        for idx in range(count)
+    ]
+
+
+def _sent_tokens(messages: list[dict[str, str]]) -> int:
+    return sum(estimate_tokens(message["content"]) + 4 for message in messages)
+
+
+def test_prompt_stays_within_the_budget():
+    hits = [_hit(idx, score=1.0 - idx / 100) for idx in range(20)]
+
+    messages, usage = build_prompt(SYSTEM, "What changed?", _turns(30), hits, WINDOW, summary="Earlier: pricing.")
+
+    assert usage.budget_tokens == prompt_budget(WINDOW) == 2000
+    assert _sent_tokens(messages) == usage.prompt_tokens <= usage.budget_tokens
+    assert usage.chunks_dropped > 0 and usage.turns_dropped > 0
+
+
+def test_highest_scoring_chunks_are_kept():
+    hits = [_hit(idx, score=idx / 10) for idx in range(10)]
+
+    messages, usage = build_prompt(SYSTEM, "What changed?", [], hits, WINDOW)
+
+    context = messages[1]["content"]
+    kept = [idx for idx in range(10) if f"fact{idx} " in context]
+    assert kept == list(range(10 - usage.chunks_used, 10))
+    # Ranked by score, best first.
+    assert context.index("fact9 ") < context.index("fact8 ")
+
+
+def test_oldest_turns_are_dropped_first():
+    turns = _turns(40)
+
+    messages, usage = build_prompt(SYSTEM, "And then?", turns, [_hit(0, 0.9)], WINDOW)
+
+    sent = [message for message in messages if message["role"] in {"user", "assistant"}][:-1]
+    assert sent == turns[usage.turns_dropped :]
+    assert usage.turns_used and usage.turns_dropped
+    assert messages[-1] == {"role": "user", "content": "And then?"}
+
+
+def test_history_takes_only_its_share_from_context():
+    hits = [_hit(idx, 0.5) for idx in range(8)]
+
+    _messages, alone = build_prompt(SYSTEM, "What changed?", [], hits, WINDOW)
+    _messages, shared = build_prompt(SYSTEM, "What changed?", _turns(200), hits, WINDOW)
+
+    # Without history, context may use the whole budget; with it, about 70% of it.
+    assert alone.history_tokens == 0 and alone.chunks_used == 5
+    assert shared.chunks_used == 3 and shared.turns_used > 0
+    assert shared.context_tokens <= 0.7 * shared.budget_tokens
+    assert shared.prompt_tokens <= shared.budget_tokens
+
+
+def test_oversized_best_chunk_is_truncated_not_dropped():
+    huge = _hit(0, score=0.99, words=5000)
+
+    messages, usage = build_prompt(SYSTEM, "Summarize", [], [huge, _hit(1, score=0.1)], WINDOW)
+
+    assert usage.chunks_used == 1 and usage.chunks_dropped == 1
+    assert "fact0 " in messages[1]["content"]
+    assert usage.prompt_tokens <= usage.budget_tokens
+
+
+def test_summary_comes_before_the_kept_turns():
+    messages, usage = build_prompt(SYSTEM, "Next?", _turns(4, words=5), [_hit(0, 0.9)], WINDOW, summary="User likes tables.")
+
+    assert messages[2]["role"] == "system" and messages[2]["content"].endswith("User likes tables.")
+    assert usage.summary_tokens > 0 and usage.turns_used == 4
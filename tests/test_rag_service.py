@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from rag_core.llm_service import LLMService
+from rag_core.rag_service import NO_HITS_MESSAGE, NO_SOURCES_MESSAGE, SOURCES_UNAVAILABLE_MESSAGE, RagService
+from rag_core.vector_store import VectorStoreError
+
+
+HITS = [{"text": "Revenue grew 12% in 2024.", "filename": "report.pdf", "doc_id": "report", "page": 3, "score": 0.9}]
+
+
+class StaticVectorStore:
+    def __init__(self, hits: list[dict]) -> None:
+        self.hits = hits
+
+    async def ais_empty(self) -> bool:
+        return False
+
+    async def aretrieve(self, query: str, limit: int = 6) -> list[dict]:
+        return list(self.hits)
+
+
+class EmptyVectorStore(StaticVectorStore):
+    async def ais_empty(self) -> bool:
+        return True
+
+
+class UnreachableVectorStore(StaticVectorStore):
+    async def ais_empty(self) -> bool:
+        raise VectorStoreError("connection refused")
+
+    async def aretrieve(self, query: str, limit: int = 6) -> list[dict]:
+        raise VectorStoreError("connection refused")
+
+
+class AsyncOnlyModel:
+    # Streams its chunks with a pause before each one, the way a provider sends tokens,
+    # then raises fail_with if given.
+    def __init__(self, chunks: list[str], delay: float = 0.05, fail_with: Exception | None = None) -> None:
+        self.chunks = chunks
+        self.delay = delay
+        self.fail_with = fail_with
+
+    async def astream(self, messages):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield AIMessageChunk(content=chunk)
+        if self.fail_with is not None:
+            raise self.fail_with
+
+    def stream(self, messages):
+        raise AssertionError("the async path must not fall back to the blocking client")
+
+
+@pytest.fixture
+def model(monkeypatch):
+    holder: dict[str, AsyncOnlyModel] = {}
+
+    def use(fake: AsyncOnlyModel) -> AsyncOnlyModel:
+        holder["model"] = fake
+        return fake
+
+    monkeypatch.setattr(LLMService, "_get_model", lambda self, settings, api_key: (holder["model"], False))
+    return use
+
+
+async def _answer(rag: RagService, message: str = "How did revenue change?") -> list[str]:
+    return [chunk async for chunk in rag.astream_answer(message=message, history=[])]
+
+
+def test_answer_streams_from_the_async_client(model):
+    model(AsyncOnlyModel(["Revenue ", "grew ", "12%."]))
+    rag = RagService(StaticVectorStore(HITS))
+
+    chunks = asyncio.run(_answer(rag))
+
+    assert chunks == ["Revenue ", "grew ", "12%."]
+    assert rag.answered
+    assert rag.prompt_usage is not None and rag.prompt_usage.chunks_dropped == 0
+
+
+def test_concurrent_answers_share_the_event_loop(model):
+    model(AsyncOnlyModel(["token "] * 5, delay=0.05))
+
+    async def both() -> float:
+        started = time.perf_counter()
+        await asyncio.gather(_answer(RagService(StaticVectorStore(HITS))), _answer(RagService(StaticVectorStore(HITS))))
+        return time.perf_counter() - started
+
+    # Two 0.25 s streams overlap instead of running one after the other.
+    assert asyncio.run(both()) < 0.45
+
+
+def test_no_hits_skips_the_model(model):
+    model(AsyncOnlyModel(["unused"]))
+    rag = RagService(StaticVectorStore([]))
+
+    assert asyncio.run(_answer(rag)) == [NO_HITS_MESSAGE]
+    assert not rag.answered
+
+
+def test_canned_replies_are_not_answers(model):
+    model(AsyncOnlyModel(["unused"]))
+    rag = RagService(EmptyVectorStore([]))
+
+    assert asyncio.run(_answer(rag)) == [NO_SOURCES_MESSAGE]
+    assert not rag.answered
+
+
+def test_unreachable_index_is_not_reported_as_empty(model):
+    model(AsyncOnlyModel(["unused"]))
+    rag = RagService(UnreachableVectorStore([]))
+
+    assert asyncio.run(_answer(rag)) == [SOURCES_UNAVAILABLE_MESSAGE]
+    assert not rag.answered
+
+
+def test_failed_model_call_is_not_an_answer(model):
+    model(AsyncOnlyModel(["Revenue "], fail_with=RuntimeError("upstream reset")))
+    rag = RagService(StaticVectorStore(HITS))
+
+    chunks = asyncio.run(_answer(rag))
+
+    assert chunks == ["Revenue ", "Model request failed: upstream reset"]
+    assert not rag.answered
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from rag_core.locks import ReadWriteLock
+from rag_core.metrics import metrics
+from rag_core.settings_store import SettingsStore, add_change_listener, remove_change_listener, set_watched
+
+
+def _write_from_another_process(path, **values) -> None:
+    # Written next to the file and renamed over it, the way other workers save.
+    current = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps({**current, **values}), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _settled(seen: list, count: int, timeout: float = 5.0) -> list:
+    # Listeners run on their own thread shortly after the change.
+    deadline = time.monotonic() + timeout
+    while len(seen) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    return seen
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "settings.json"
+
+
+@pytest.fixture
+def changes():
+    seen: list[tuple[int, int]] = []
+
+    def listener(previous, current) -> None:
+        seen.append((previous.version, current.version))
+
+    add_change_listener(listener)
+    yield seen
+    remove_change_listener(listener)
+
+
+def test_unchanged_file_is_parsed_once(path):
+    SettingsStore(path).update("openai", "gpt-4o-mini", "http://localhost:11434", 0.1)
+    reloads = metrics.counter("settings.reloads")
+
+    first = SettingsStore(path).load()
+    second = SettingsStore(path).load()
+
+    assert first is second
+    assert metrics.counter("settings.reloads") == reloads
+
+
+def test_change_from_another_worker_is_picked_up(path, changes):
+    SettingsStore(path).update("openai", "gpt-4o-mini", "http://localhost:11434", 0.1)
+    assert SettingsStore(path).load().model == "gpt-4o-mini"
+
+    _write_from_another_process(path, model="gpt-4.1", version=7)
+
+    current = SettingsStore(path).load()
+    assert (current.model, current.version) == ("gpt-4.1", 7)
+    assert _settled(changes, 2)[-1] == (1, 7)
+
+
+def test_a_request_keeps_one_view_of_the_settings(path):
+    SettingsStore(path).update("openai", "gpt-4o-mini", "http://localhost:11434", 0.1)
+    store = SettingsStore(path)
+    assert store.load().model == "gpt-4o-mini"
+
+    _write_from_another_process(path, model="gpt-4.1", version=2)
+
+    assert store.load().model == "gpt-4o-mini"
+    assert SettingsStore(path).load().model == "gpt-4.1"
+
+
+def test_watched_snapshot_changes_only_on_refresh(path, changes):
+    SettingsStore(path).update("openai", "gpt-4o-mini", "http://localhost:11434", 0.1)
+    SettingsStore(path).load()
+    set_watched(True)
+    try:
+        _write_from_another_process(path, model="gpt-4.1", version=5)
+        # Requests trust the watcher and skip the file check.
+        assert SettingsStore(path).load().model == "gpt-4o-mini"
+
+        SettingsStore(path).refresh()
+
+        assert SettingsStore(path).load().model == "gpt-4.1"
+        assert _settled(changes, 2)[-1] == (1, 5)
+    finally:
+        set_watched(False)
+
+
+def test_saves_bump_the_version_and_notify_once(path, changes):
+    store = SettingsStore(path)
+    assert store.load().version == 0
+    store.update("openai", "gpt-4o-mini", "http://localhost:11434", 0.1)
+    store.update("openai", "gpt-4.1", "http://localhost:11434", 0.1)
+
+    assert store.load().version == 2
+    assert _settled(changes, 2) == [(0, 1), (1, 2)]
+    # Re-reading the file this process wrote is not another change.
+    SettingsStore(path).refresh()
+    assert _settled(changes, 3) == [(0, 1), (1, 2)]
+
+
+def test_hand_edit_with_invalid_json_keeps_the_last_good_settings(path):
+    SettingsStore(path).update("openai", "gpt-4o-mini", "http://localhost:11434", 0.1)
+    SettingsStore(path).load()
+
+    path.write_text("{ not json", encoding="utf-8")
+
+    assert SettingsStore(path).load().model == "gpt-4o-mini"
+
+
+def test_listener_never_runs_on_a_thread_holding_its_lock(path):
+    # A search holds the store's read lock while it loads settings; the listener resets
+    # the store under the write lock. Run inline, that thread would wait on itself.
+    SettingsStore(path).update("openai", "gpt-4o-mini", "http://localhost:11434", 0.1)
+    SettingsStore(path).load()
+    lock = ReadWriteLock()
+    reset = threading.Event()
+
+    def reset_store(previous, current) -> None:
+        with lock.write():
+            reset.set()
+
+    def search() -> None:
+        with lock.read():
+            SettingsStore(path).load()
+
+    add_change_listener(reset_store)
+    try:
+        _write_from_another_process(path, model="gpt-4.1", version=9)
+        searcher = threading.Thread(target=search, daemon=True)
+        searcher.start()
+        searcher.join(timeout=5)
+
+        assert not searcher.is_alive()
+        assert reset.wait(5)
+    finally:
+        remove_change_listener(reset_store)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from rag_core.db.models import Document, IngestionJob
+from rag_core.db.session import SessionLocal
+from rag_core.document_service import JOB_ACTIVE_STATUSES, DocumentService
+from rag_core.repositories import IngestionJobRepository
+from rag_core.storage.local import LocalStorage
+
+
+UPLOADERS = 3
+UPLOADS_EACH = 4
+SEEDED = 6
+
+
+def _text(name: str) -> bytes:
+    # Distinct bytes per document, long enough to split into several chunks.
+    return " ".join(f"{name} paragraph {idx} covers quarterly revenue and regional growth." for idx in range(120)).encode()
+
+
+def _ingest(store, storage, name: str) -> Document:
+    doc_id = str(uuid4())
+    with SessionLocal() as session:
+        stored = storage.save_bytes(doc_id=doc_id, ext=".txt", content=_text(name))
+        jobs = IngestionJobRepository(session)
+        job = jobs.upsert(
+            IngestionJob(
+                id=str(uuid4()),
+                document_id=doc_id,
+                original_name=f"{name}.txt",
+                stored_name=stored.stored_name,
+                file_type="txt",
+                size_bytes=stored.size_bytes,
+            )
+        )
+        job = jobs.claim(job.id, name, 60, JOB_ACTIVE_STATUSES)
+        return DocumentService(session, store, storage).ingest(job)
+
+
+def _delete(store, storage, doc_id: str) -> None:
+    with SessionLocal() as session:
+        DocumentService(session, store, storage).delete(doc_id)
+
+
+def test_uploads_deletes_and_chats_share_one_store(db, tmp_path, make_vector_store):
+    # One store, as the app's lifespan shares it, under uploads, deletes and searches at once.
+    store = make_vector_store()
+    storage = LocalStorage(tmp_path / "uploads")
+    seeded = [_ingest(store, storage, f"seed-{idx}").id for idx in range(SEEDED)]
+    errors: list[BaseException] = []
+    stop = threading.Event()
+
+    def guarded(work):
+        def run() -> None:
+            try:
+                work()
+            except BaseException as exc:
+                errors.append(exc)
+                stop.set()
+
+        return run
+
+    def upload(worker: int) -> None:
+        for idx in range(UPLOADS_EACH):
+            _ingest(store, storage, f"upload-{worker}-{idx}")
+
+    def delete() -> None:
+        for doc_id in seeded[::2]:
+            _delete(store, storage, doc_id)
+
+    def chat() -> None:
+        # Questions vary so most of them miss the result cache and search the index.
+        asked = 0
+        while not stop.is_set():
+            for hit in store.retrieve(f"paragraph {asked % 120} quarterly revenue", limit=6):
+                assert hit["text"] and hit["doc_id"]
+            asked += 1
+
+    writers = [threading.Thread(target=guarded(lambda worker=worker: upload(worker))) for worker in range(UPLOADERS)]
+    writers.append(threading.Thread(target=guarded(delete)))
+    chatters = [threading.Thread(target=guarded(chat)) for _ in range(2)]
+    for thread in writers + chatters:
+        thread.start()
+    for thread in writers:
+        thread.join(timeout=120)
+    stop.set()
+    for thread in chatters:
+        thread.join(timeout=30)
+
+    assert errors == []
+    documents = list(db.scalars(select(Document)).all())
+    assert len(documents) == SEEDED - len(seeded[::2]) + UPLOADERS * UPLOADS_EACH
+    backend = store._get_backend()
+    for document in documents:
+        indexes = sorted(record.metadata["chunk_index"] for record in backend.get_by_doc(document.id))
+        # Every chunk present exactly once.
+        assert indexes == list(range(document.chunk_count))
+    for doc_id in seeded[::2]:
+        assert backend.get_by_doc(doc_id) == []
+    assert backend.count() == sum(document.chunk_count for document in documents)
+    assert store.retrieve("quarterly revenue and regional growth", limit=6)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from rag_core.streaming import StreamStats, coalesce
+
+
+async def _provider(script: list[tuple[float, str]], fail_with: Exception | None = None, closed: list | None = None):
+    # Yields each chunk after its delay, like tokens arriving from a model.
+    try:
+        for delay, chunk in script:
+            await asyncio.sleep(delay)
+            yield chunk
+        if fail_with is not None:
+            raise fail_with
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+async def _frames(script, window: float = 0.1, max_bytes: int = 1024, **provider) -> tuple[list[str], StreamStats]:
+    stats = StreamStats(started=time.perf_counter())
+    frames = [frame async for frame in coalesce(_provider(script, **provider), stats, window, max_bytes)]
+    return frames, stats
+
+
+def test_zero_window_sends_every_chunk():
+    frames, stats = asyncio.run(_frames([(0, "a"), (0, ""), (0, "b"), (0, "c")], window=0))
+
+    assert frames == ["a", "b", "c"]
+    assert (stats.chunks, stats.frames, stats.chars) == (3, 3, 3)
+
+
+def test_first_token_is_sent_alone_and_a_burst_shares_a_frame():
+    script = [(0, "Hello")] + [(0.001, f" w{idx}") for idx in range(20)]
+
+    frames, stats = asyncio.run(_frames(script, window=0.2))
+
+    assert frames[0] == "Hello"
+    assert "".join(frames) == "Hello" + "".join(f" w{idx}" for idx in range(20))
+    assert len(frames) <= 3
+    assert stats.chunks == 21 and stats.frames == len(frames)
+    assert stats.first_token_at is not None
+
+
+def test_full_frame_is_sent_before_the_window_closes():
+    script = [(0, "x")] + [(0, "y" * 10) for _ in range(10)]
+
+    async def timed() -> tuple[list[str], float]:
+        started = time.perf_counter()
+        frames, _stats = await _frames(script, window=5.0, max_bytes=40)
+        return frames, time.perf_counter() - started
+
+    frames, elapsed = asyncio.run(timed())
+
+    assert elapsed < 1.0
+    assert frames[0] == "x"
+    assert all(len(frame.encode()) >= 40 for frame in frames[1:-1])
+
+
+def test_quiet_provider_still_gets_its_partial_frame_out():
+    script = [(0, "first"), (0.01, " partial"), (0.5, " late")]
+
+    async def arrivals() -> list[tuple[float, str]]:
+        stats = StreamStats(started=time.perf_counter())
+        seen = []
+        async for frame in coalesce(_provider(script), stats, 0.05, 1024):
+            seen.append((time.perf_counter() - stats.started, frame))
+        return seen
+
+    seen = asyncio.run(arrivals())
+
+    assert [frame for _at, frame in seen] == ["first", " partial", " late"]
+    # " partial" left when its window closed, not when " late" arrived.
+    assert seen[1][0] < 0.3
+
+
+def test_provider_error_is_raised_after_buffered_text():
+    async def collect() -> list[str]:
+        frames: list[str] = []
+        stats = StreamStats(started=time.perf_counter())
+        with pytest.raises(RuntimeError, match="stream reset"):
+            async for frame in coalesce(_provider([(0, "a"), (0, "b")], fail_with=RuntimeError("stream reset")), stats, 0.05, 1024):
+                frames.append(frame)
+        return frames
+
+    assert "".join(asyncio.run(collect())) == "ab"
+
+
+def test_closing_the_frames_stops_the_provider():
+    closed: list[bool] = []
+
+    async def first_frame_only() -> None:
+        stats = StreamStats(started=time.perf_counter())
+        frames = coalesce(_provider([(0, "a")] + [(0.05, "b")] * 100, closed=closed), stats, 0.01, 1024)
+        assert await frames.__anext__() == "a"
+        await frames.aclose()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(first_frame_only())
+
+    assert closed == [True]
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+import rag_core.vector_store as vector_store_module
+from rag_core.text_chunker import TextChunk
+from rag_core.vector_store import VectorStoreError
+
+
+CHUNKS = [TextChunk(text=f"quarterly revenue grew in region {idx}") for idx in range(6)]
+
+
+class VersionLookup:
+    def __init__(self, versions: dict[str, int]) -> None:
+        self.versions = versions
+        self.calls: list[list[str]] = []
+
+    def __call__(self, doc_ids: list[str]) -> dict[str, int]:
+        self.calls.append(list(doc_ids))
+        return {doc_id: self.versions[doc_id] for doc_id in doc_ids if doc_id in self.versions}
+
+
+def test_shadow_versions_do_not_crowd_out_live_hits(make_vector_store):
+    lookup = VersionLookup({"report": 4})
+    store = make_vector_store(version_lookup=lookup)
+    # Retired versions with the same text, and so the same embeddings, written first so
+    # they win every tie with the live version.
+    for version in (1, 2, 3, 4):
+        store.write_version("report", version, "report.txt", CHUNKS)
+
+    hits = store.retrieve("quarterly revenue region", limit=6)
+
+    assert len(hits) == 6
+    assert sorted(hit["text"] for hit in hits) == sorted(chunk.text for chunk in CHUNKS)
+
+
+def test_active_versions_are_cached_until_the_corpus_changes(make_vector_store):
+    lookup = VersionLookup({"report": 1})
+    store = make_vector_store(version_lookup=lookup)
+    store.write_version("report", 1, "report.txt", CHUNKS)
+
+    store.retrieve("revenue", limit=3)
+    store.retrieve("region", limit=3)
+    assert len(lookup.calls) == 1
+
+    lookup.versions["report"] = 2
+    store.write_version("report", 2, "report.txt", CHUNKS[:2], base_version=1)
+    hits = store.retrieve("growth", limit=6)
+
+    assert len(lookup.calls) == 2
+    assert len(hits) == 2
+
+
+def test_changes_from_another_worker_drop_cached_results(db, make_vector_store):
+    lookup = VersionLookup({"report": 1})
+    # Two stores on one database stand in for two worker processes.
+    reader = make_vector_store(version_lookup=lookup, sync_seconds=0)
+    writer = make_vector_store(version_lookup=lookup)
+    reader.write_version("report", 1, "report.txt", CHUNKS)
+
+    assert len(reader.retrieve("revenue", limit=6)) == 6
+    assert len(reader.retrieve("revenue", limit=6)) == 6
+    assert len(lookup.calls) == 1
+
+    # The other worker writes a new version into the shared index and activates it.
+    lookup.versions["report"] = 2
+    writer.write_version("report", 2, "report.txt", CHUNKS[:2], base_version=1)
+
+    assert len(reader.retrieve("revenue", limit=6)) == 2
+    assert len(lookup.calls) == 2
+
+
+def test_cached_results_skip_the_database_and_the_index(db, make_vector_store, monkeypatch):
+    lookup = VersionLookup({"report": 1})
+    reader = make_vector_store(version_lookup=lookup, sync_seconds=0.3)
+    writer = make_vector_store(version_lookup=lookup)
+    reader.write_version("report", 1, "report.txt", CHUNKS)
+    assert len(reader.retrieve("revenue", limit=6)) == 6
+
+    reads: list[str] = []
+    generation = vector_store_module.corpus_generation
+    monkeypatch.setattr(vector_store_module, "corpus_generation", lambda: reads.append("generation") or generation())
+    backend = reader._get_backend()
+    monkeypatch.setattr(backend, "is_empty", lambda: reads.append("index") or False)
+    for _ in range(20):
+        assert len(reader.retrieve("revenue", limit=6)) == 6
+    assert reads == []
+
+    # Another worker's change shows once the sync interval has passed.
+    lookup.versions["report"] = 2
+    writer.write_version("report", 2, "report.txt", CHUNKS[:2], base_version=1)
+    time.sleep(0.35)
+    assert len(reader.retrieve("revenue", limit=6)) == 2
+    assert reads == ["generation", "index"]
+
+
+def test_an_unreachable_index_is_an_error_not_an_empty_corpus(make_vector_store, monkeypatch):
+    store = make_vector_store(version_lookup=VersionLookup({"report": 1}))
+    store.write_version("report", 1, "report.txt", CHUNKS)
+    assert not store.is_empty()
+
+    def unreachable() -> int:
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(store._get_backend(), "count", unreachable)
+
+    with pytest.raises(VectorStoreError):
+        store.is_empty()